@@ -0,0 +1,119 @@
+"""
+int8 동적 양자화 품질/속도 비교 스크립트
+CPU에서 fp32 파이프라인과 int8 양자화 파이프라인을 같은 시드로 실행하여 비교
+
+비교 항목:
+1. 배치 1개 기준 평균 생성 시간 (warmup 제외)
+2. fp32 결과 대비 PSNR (dB, 높을수록 원본과 비슷)
+3. 스텝별 평균 지연
+
+사용법:
+python compare_quantization.py                      # 기본 곤충 키워드로 비교
+python compare_quantization.py butterfly bee --runs 3 --save comparison/
+
+현재 서비스 설정(640×400, 3스텝, guidance 1.5)을 그대로 사용합니다.
+메모리 사용량을 줄이기 위해 두 파이프라인을 순서대로 로드합니다.
+"""
+
+import gc
+import os
+import time
+import argparse
+
+import numpy as np
+
+from config import settings
+from services.character_generator import CharacterGenerator
+from services.diffusion_engine import DiffusionEngine, GENERATION_PARAMS
+from services.model_snapshot import resolve_model_source
+
+DEFAULT_KEYWORDS = ["butterfly", "bee", "ladybug", "dragonfly"]
+
+
+def psnr(reference, image) -> float:
+    """두 이미지의 PSNR (dB)"""
+    a = np.asarray(reference, dtype=np.float64)
+    b = np.asarray(image, dtype=np.float64)
+    mse = np.mean((a - b) ** 2)
+    if mse == 0:
+        return float("inf")
+    return 10 * np.log10(255.0 ** 2 / mse)
+
+
+def run_engine(quantize: bool, prompts, runs: int):
+    """
+    엔진을 로드해 프롬프트별 이미지를 생성하고 시간 측정
+
+    Returns:
+        (이미지 목록, 평균 생성 시간, 평균 스텝 지연, 로딩 시간)
+    """
+    model_source = resolve_model_source(
+        os.path.join(settings.MODEL_PATH, settings.GENERATION_MODEL),
+        settings.GENERATION_MODEL_ID,
+        verify=settings.GENERATION_SNAPSHOT_VERIFY
+    )
+    engine = DiffusionEngine(
+        model_source,
+        device="cpu",
+        torch_dtype="float32",
+        num_threads=settings.GENERATION_CPU_THREADS,
+        quantize=quantize,
+        quantized_cache_dir=settings.GENERATION_QUANTIZED_CACHE_DIR,
+        embed_cache_size=0
+    )
+    engine.load()
+    engine.warmup()
+
+    images = []
+    latencies = []
+    step_latencies = []
+    for prompt in prompts:
+        for run in range(runs):
+            start_time = time.time()
+            image, _ = engine.run_batch([{"prompt": prompt, "seed": settings.GENERATION_CACHE_SEED}])[0]
+            latencies.append(time.time() - start_time)
+            step_latencies.extend(engine.last_step_latencies)
+        images.append(image)
+
+    load_time = engine.load_time
+    del engine
+    gc.collect()
+    return images, float(np.mean(latencies)), float(np.mean(step_latencies)), load_time
+
+
+def main():
+    parser = argparse.ArgumentParser(description="fp32 vs int8 동적 양자화 비교")
+    parser.add_argument("keywords", nargs="*", default=DEFAULT_KEYWORDS, help="비교할 곤충 키워드")
+    parser.add_argument("--runs", type=int, default=2, help="키워드당 반복 횟수")
+    parser.add_argument("--save", default="", help="비교 이미지를 저장할 폴더")
+    args = parser.parse_args()
+
+    template = CharacterGenerator.PROMPT_TEMPLATE
+    prompts = [template.format(keyword=keyword) for keyword in args.keywords]
+
+    print("=" * 60)
+    print("🐛 int8 동적 양자화 비교")
+    print(f"설정: {GENERATION_PARAMS['width']}×{GENERATION_PARAMS['height']}, "
+          f"{GENERATION_PARAMS['num_inference_steps']}스텝, guidance {GENERATION_PARAMS['guidance_scale']}")
+    print("=" * 60)
+
+    fp_images, fp_latency, fp_step, fp_load = run_engine(False, prompts, args.runs)
+    q_images, q_latency, q_step, q_load = run_engine(True, prompts, args.runs)
+
+    print(f"{'':12}{'fp32':>12}{'int8':>12}")
+    print(f"{'로딩(초)':12}{fp_load:>12.2f}{q_load:>12.2f}")
+    print(f"{'생성(초)':12}{fp_latency:>12.3f}{q_latency:>12.3f}")
+    print(f"{'스텝(ms)':12}{fp_step * 1000:>12.1f}{q_step * 1000:>12.1f}")
+    print(f"속도 향상: {fp_latency / q_latency:.2f}배")
+    print("-" * 60)
+
+    for keyword, fp_image, q_image in zip(args.keywords, fp_images, q_images):
+        print(f"{keyword}: PSNR {psnr(fp_image, q_image):.2f} dB")
+        if args.save:
+            os.makedirs(args.save, exist_ok=True)
+            fp_image.save(os.path.join(args.save, f"{keyword}_fp32.png"))
+            q_image.save(os.path.join(args.save, f"{keyword}_int8.png"))
+
+
+if __name__ == "__main__":
+    main()
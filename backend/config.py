@@ -34,11 +34,51 @@ class Settings:
     MAX_FILE_SIZE: int = int(os.getenv("MAX_FILE_SIZE", "10485760"))  # 10MB
     UPLOAD_DIR: str = os.getenv("UPLOAD_DIR", "uploads")
     ALLOWED_EXTENSIONS: List[str] = [".jpg", ".jpeg", ".png", ".bmp", ".gif"]
+    BATCH_MAX_FILES: int = int(os.getenv("BATCH_MAX_FILES", "30"))  # 배치 분류 최대 파일 수
+    BATCH_CONCURRENCY: int = int(os.getenv("BATCH_CONCURRENCY", "4"))  # 배치 분류 동시 실행 수
+    MULTI_IMAGE_BATCH_SIZE: int = int(os.getenv("MULTI_IMAGE_BATCH_SIZE", "6"))  # 한 프롬프트에 묶을 사진 수
     
     # AI 모델 설정
     MODEL_PATH: str = os.getenv("MODEL_PATH", "models/")
     CLASSIFICATION_MODEL: str = os.getenv("CLASSIFICATION_MODEL", "insect_classifier.pth")
-    GENERATION_MODEL: str = os.getenv("GENERATION_MODEL", "character_generator.pth")
+    GENERATION_MODEL: str = os.getenv("GENERATION_MODEL", "sdxl-turbo")  # MODEL_PATH 아래 고정 스냅샷 디렉토리 이름
+    GENERATION_MODEL_ID: str = os.getenv("GENERATION_MODEL_ID", "stabilityai/sdxl-turbo")  # 원본 허브 모델 ID (스냅샷이 없을 때 대체)
+    GENERATION_SNAPSHOT_VERIFY: str = os.getenv("GENERATION_SNAPSHOT_VERIFY", "size")  # 시작 시 스냅샷 검증 방식 (size / sha256 / off, 전체 해시는 materialize_model.py --verify)
+    GENERATION_ALLOW_HUB_FALLBACK: bool = os.getenv("GENERATION_ALLOW_HUB_FALLBACK", "True").lower() == "true"  # 스냅샷을 쓸 수 없으면 허브에서 로딩
+    GENERATION_MAX_BATCH_SIZE: int = int(os.getenv("GENERATION_MAX_BATCH_SIZE", "4"))  # 한 번에 생성할 최대 요청 수
+    GENERATION_MAX_BATCH_WAIT_MS: int = int(os.getenv("GENERATION_MAX_BATCH_WAIT_MS", "50"))  # 배치 수집 대기 시간
+    GENERATION_QUEUE_SIZE: int = int(os.getenv("GENERATION_QUEUE_SIZE", "32"))  # 생성 대기열 최대 크기 (초과 시 503)
+    GENERATION_WORKERS: int = int(os.getenv("GENERATION_WORKERS", "0"))  # CPU 생성 워커 프로세스 수 (0이면 API 프로세스 내 스레드)
+    GENERATION_WORKER_THREADS: int = int(os.getenv("GENERATION_WORKER_THREADS", "0"))  # 워커당 연산 스레드 수 (0이면 할당된 코어 수)
+    GENERATION_CACHE_ENABLED: bool = os.getenv("GENERATION_CACHE_ENABLED", "True").lower() == "true"  # 키워드별 생성 이미지 캐시
+    GENERATION_CACHE_VARIANTS: int = int(os.getenv("GENERATION_CACHE_VARIANTS", "3"))  # 키워드당 변형 이미지 수
+    GENERATION_CACHE_SEED: int = int(os.getenv("GENERATION_CACHE_SEED", "0"))  # 변형 시드 시작값
+    GENERATION_CACHE_MAX_KEYWORDS: int = int(os.getenv("GENERATION_CACHE_MAX_KEYWORDS", "1000"))  # 요청 횟수 / 라운드 로빈 상태를 기억할 최대 키워드 수
+    GENERATION_CACHE_MAX_FILES: int = int(os.getenv("GENERATION_CACHE_MAX_FILES", "2000"))  # 보관할 최대 캐시 이미지 수 (0이면 제한 없음)
+    GENERATION_CACHE_WARMUP: bool = os.getenv("GENERATION_CACHE_WARMUP", "False").lower() == "true"  # 서버 시작 시 기본 곤충 이미지 미리 생성
+    PROMPT_EMBED_CACHE_SIZE: int = int(os.getenv("PROMPT_EMBED_CACHE_SIZE", "64"))  # 프롬프트 임베딩 LRU 크기 (0이면 사용 안 함)
+    PROMPT_EMBED_CACHE_DIR: str = os.getenv("PROMPT_EMBED_CACHE_DIR", "")  # 임베딩 디스크 저장 폴더 (비우면 메모리만)
+    GENERATION_BACKEND: str = os.getenv("GENERATION_BACKEND", "auto")  # auto, cuda, cpu
+    GENERATION_CPU_DTYPE: str = os.getenv("GENERATION_CPU_DTYPE", "auto")  # auto(CPU 기능에 따라 bf16/fp32), bfloat16, float32
+    GENERATION_CPU_THREADS: int = int(os.getenv("GENERATION_CPU_THREADS", "0"))  # CPU 연산 스레드 수 (0이면 torch 기본값)
+    GENERATION_TORCH_COMPILE: bool = os.getenv("GENERATION_TORCH_COMPILE", "False").lower() == "true"  # UNet torch.compile
+    GENERATION_QUANTIZE: bool = os.getenv("GENERATION_QUANTIZE", "False").lower() == "true"  # CPU int8 동적 양자화 (UNet, 텍스트 인코더)
+    GENERATION_QUANTIZED_CACHE_DIR: str = os.getenv("GENERATION_QUANTIZED_CACHE_DIR", "cache/quantized")  # 양자화 결과(state_dict) 저장 폴더
+    GENERATION_DECODER: str = os.getenv("GENERATION_DECODER", "")  # 전체 디코더 지정 (full: SDXL VAE, fast: TAESD, 비우면 프로필 기본값)
+    GENERATION_FAST_DECODER_MODEL: str = os.getenv("GENERATION_FAST_DECODER_MODEL", "madebyollin/taesdxl")  # 비우면 fast 디코더 사용 안 함
+    GENERATION_DEFAULT_PROFILE: str = os.getenv("GENERATION_DEFAULT_PROFILE", "standard")  # preview, standard, quality
+    GENERATION_ADAPTIVE_PROFILES: bool = os.getenv("GENERATION_ADAPTIVE_PROFILES", "True").lower() == "true"  # 부하 시 가벼운 프로필로 자동 전환
+    GENERATION_TARGET_WAIT_MS: int = int(os.getenv("GENERATION_TARGET_WAIT_MS", "2000"))  # 목표 대기 시간 (넘으면 프로필 하향)
+    GENERATION_ADAPTIVE_COOLDOWN: float = float(os.getenv("GENERATION_ADAPTIVE_COOLDOWN", "10"))  # 프로필 단계 변경 최소 간격 (초)
+    GENERATION_REQUEST_TIMEOUT: float = float(os.getenv("GENERATION_REQUEST_TIMEOUT", "120"))  # 생성 요청 기한 (초, 넘으면 중단 후 504, 0이면 제한 없음)
+    GENERATION_JOB_CONCURRENCY: int = int(os.getenv("GENERATION_JOB_CONCURRENCY", "8"))  # 동시에 처리할 생성 작업 수 (배치 크기 이상 권장)
+    GENERATION_JOB_QUEUE_SIZE: int = int(os.getenv("GENERATION_JOB_QUEUE_SIZE", "200"))  # 대기 작업 최대 수
+    GENERATION_JOB_HISTORY: int = int(os.getenv("GENERATION_JOB_HISTORY", "1000"))  # 보관할 완료 작업 수
+    JOB_STORE_PATH: str = os.getenv("JOB_STORE_PATH", "cache/jobs.db")  # 작업 저장소 SQLite 파일 (빈 값이면 메모리에만 보관)
+    GRACEFUL_DRAIN_TIMEOUT: float = float(os.getenv("GRACEFUL_DRAIN_TIMEOUT", "25"))  # 종료 시 실행 중 작업을 기다리는 최대 시간 (초)
+    LOCAL_CLASSIFIER_ENABLED: bool = os.getenv("LOCAL_CLASSIFIER_ENABLED", "True").lower() == "true"
+    LOCAL_CONFIDENCE_THRESHOLD: float = float(os.getenv("LOCAL_CONFIDENCE_THRESHOLD", "0.85"))  # 이 이상이면 Gemini 호출 생략
+    LOCAL_CLASSIFIER_THREADS: int = int(os.getenv("LOCAL_CLASSIFIER_THREADS", "2"))  # ONNX Runtime 추론 스레드 수 (TorchScript는 프로세스의 torch 스레드 설정을 따름)
     
     # 로깅 설정
     LOG_LEVEL: str = os.getenv("LOG_LEVEL", "INFO")
@@ -51,7 +91,34 @@ class Settings:
     
     # Google Gemini API 설정
     GEMINI_API_KEY: str = os.getenv("GEMINI_API_KEY")
+    GEMINI_TIMEOUT: float = float(os.getenv("GEMINI_TIMEOUT", "40"))  # 요청 타임아웃 (초)
+    GEMINI_CONNECT_TIMEOUT: float = float(os.getenv("GEMINI_CONNECT_TIMEOUT", "5"))
+    GEMINI_SUMMARY_TIMEOUT: float = float(os.getenv("GEMINI_SUMMARY_TIMEOUT", "20"))  # 음성 요약용
+    GEMINI_MAX_CONNECTIONS: int = int(os.getenv("GEMINI_MAX_CONNECTIONS", "20"))
+    GEMINI_MAX_KEEPALIVE_CONNECTIONS: int = int(os.getenv("GEMINI_MAX_KEEPALIVE_CONNECTIONS", "10"))
+    GEMINI_KEEPALIVE_EXPIRY: float = float(os.getenv("GEMINI_KEEPALIVE_EXPIRY", "30"))
+    GEMINI_STRUCTURED_OUTPUT: bool = os.getenv("GEMINI_STRUCTURED_OUTPUT", "False").lower() == "true"  # JSON 스키마 응답 (선택 사용)
+    GEMINI_COMBINED_SUMMARY: bool = os.getenv("GEMINI_COMBINED_SUMMARY", "False").lower() == "true"  # 분류와 음성 요약을 한 번에 요청
     
+    # 분류 결과 캐시 설정
+    CLASSIFICATION_CACHE_ENABLED: bool = os.getenv("CLASSIFICATION_CACHE_ENABLED", "True").lower() == "true"
+    CLASSIFICATION_CACHE_DIR: str = os.getenv("CLASSIFICATION_CACHE_DIR", "cache/classification")
+    CLASSIFICATION_CACHE_MEMORY_SIZE: int = int(os.getenv("CLASSIFICATION_CACHE_MEMORY_SIZE", "512"))
+    CLASSIFICATION_CACHE_DISK_MAX_ENTRIES: int = int(os.getenv("CLASSIFICATION_CACHE_DISK_MAX_ENTRIES", "20000"))  # 0이면 제한 없음
+    
+    # 지각 해시 유사 이미지 인덱스 설정
+    PHASH_INDEX_ENABLED: bool = os.getenv("PHASH_INDEX_ENABLED", "True").lower() == "true"
+    PHASH_INDEX_PATH: str = os.getenv("PHASH_INDEX_PATH", "cache/phash_index.txt")
+    PHASH_MAX_DISTANCE: int = int(os.getenv("PHASH_MAX_DISTANCE", "4"))  # 해밍 거리 임계값 (64비트 중)
+    PHASH_INDEX_MAX_ENTRIES: int = int(os.getenv("PHASH_INDEX_MAX_ENTRIES", "100000"))  # 최대 항목 수 (넘으면 오래된 항목부터 제거)
+    
+    # Gemini 업로드 전 이미지 전처리 설정
+    INGEST_ENABLED: bool = os.getenv("INGEST_ENABLED", "True").lower() == "true"
+    INGEST_MAX_LONG_EDGE: int = int(os.getenv("INGEST_MAX_LONG_EDGE", "768"))  # 긴 변 최대 픽셀
+    INGEST_FORMAT: str = os.getenv("INGEST_FORMAT", "JPEG")  # JPEG 또는 WEBP
+    INGEST_QUALITY: int = int(os.getenv("INGEST_QUALITY", "85"))
+    INGEST_MAX_BYTES: int = int(os.getenv("INGEST_MAX_BYTES", "300000"))  # 약 300KB
+
     def __init__(self):
         """설정 초기화 및 디렉토리 생성"""
         # 필요한 디렉토리들 생성
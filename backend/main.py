@@ -12,15 +12,26 @@ FastAPI를 사용한 메인 애플리케이션
 
 from fastapi import FastAPI, File, UploadFile, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse, FileResponse
+from fastapi.responses import JSONResponse, FileResponse, StreamingResponse
 from fastapi.staticfiles import StaticFiles
+from typing import List, Optional
+from PIL import Image
 import uvicorn
+import asyncio
+import json
+import io
+import base64
+import time
 import os
 from datetime import datetime
 
 # AI 모델 관련 임포트 (추후 구현)
 from services.insect_classifier import InsectClassifier
 from services.character_generator import CharacterGenerator
+from services.generation_cache import species_keywords
+from services.generation_batcher import QueueFullError
+from services.job_manager import JobManager
+from services.job_store import JobStore
 from services.voice_generator import VoiceGenerator, DummyVoiceGenerator
 from config import settings
 
@@ -48,6 +59,41 @@ os.makedirs(UPLOAD_DIR, exist_ok=True)
 insect_classifier = InsectClassifier(api_key=settings.GEMINI_API_KEY)  # Gemini API 기반 분류기
 character_generator = CharacterGenerator()
 
+# 비동기 생성 작업 관리자 (작업 접수 후 백그라운드에서 우선순위 순으로 처리, SQLite에 상태 기록)
+job_manager = JobManager(
+    concurrency=settings.GENERATION_JOB_CONCURRENCY,
+    max_queued=settings.GENERATION_JOB_QUEUE_SIZE,
+    history_size=settings.GENERATION_JOB_HISTORY,
+    store=JobStore(settings.JOB_STORE_PATH) if settings.JOB_STORE_PATH else None
+)
+
+async def run_character_job(params: dict, on_progress) -> dict:
+    """
+    캐릭터 생성 작업 처리 함수
+    """
+    # 재시작 직후 다시 접수된 작업은 모델 로딩이 끝날 때까지 기다렸다가 실행
+    await character_generator.wait_until_ready()
+    result = await character_generator.generate_with_info(
+        params["keyword"],
+        decoder=params.get("decoder"),
+        profile=params.get("profile"),
+        on_progress=on_progress,
+        deadline=generation_deadline()
+    )
+    return {**result, "image_url": f"/generated-images/{result['filename']}"}
+
+async def run_voice_job(params: dict, on_progress) -> dict:
+    """
+    AI 음성 생성 작업 처리 함수
+    """
+    result = await create_voice_for_insect(params["insect_data"])
+    if not result["success"]:
+        raise RuntimeError(result["error"])
+    return result
+
+job_manager.register_handler("character", run_character_job)
+job_manager.register_handler("voice", run_voice_job)
+
 # 음성 생성기 초기화
 try:
     voice_generator = VoiceGenerator()
@@ -62,10 +108,67 @@ except Exception as e:
 if hasattr(voice_generator, 'audio_dir') and os.path.exists(voice_generator.audio_dir):
     app.mount("/audio", StaticFiles(directory=voice_generator.audio_dir), name="audio")
 
+# 클라이언트 연결 끊김 확인 간격 (초)
+DISCONNECT_POLL_INTERVAL = 0.5
+
+def generation_deadline() -> Optional[float]:
+    """
+    설정된 생성 요청 기한 (time.time() 기준 시각, 제한이 없으면 None)
+    """
+    if settings.GENERATION_REQUEST_TIMEOUT <= 0:
+        return None
+    return time.time() + settings.GENERATION_REQUEST_TIMEOUT
+
+async def run_until_disconnected(request: Request, coro):
+    """
+    클라이언트 연결이 유지되는 동안 코루틴 실행
+    연결이 끊기면(탭 닫힘, axios 타임아웃) 실행을 취소하여 생성 대기열 / 파이프라인에서 빠지게 함
+    
+    Raises:
+        HTTPException: 연결이 끊겨 취소한 경우 (499)
+    """
+    task = asyncio.create_task(coro)
+    while True:
+        done, _ = await asyncio.wait({task}, timeout=DISCONNECT_POLL_INTERVAL)
+        if done:
+            return task.result()
+        if await request.is_disconnected():
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+            raise HTTPException(status_code=499, detail="클라이언트 연결이 끊어져 요청을 취소했습니다.")
+
 # 생성된 캐릭터 이미지 정적 파일 서빙 설정
 output_image_dir = "out_put_image"
 os.makedirs(output_image_dir, exist_ok=True)
 
+@app.on_event("startup")
+async def startup_event():
+    """
+    서버 시작 시 모델 로딩을 백그라운드 작업으로 시작 (포트는 로딩을 기다리지 않고 바로 열림)
+    - 캐릭터 생성 모델: 워커 프로세스 시작 또는 추론 스레드에서 로딩 → warmup
+    - 로컬 분류 모델: 별도 스레드에서 로딩 (그동안은 Gemini로 분류)
+    끊겼던 작업 재접수 및 자주 쓰는 곤충 캐릭터 이미지 캐시 예열 (설정된 경우)
+    """
+    character_generator.start()
+    insect_classifier.start_local_model_loading()
+    await job_manager.restore()
+    # 분류 대상 곤충은 처음 요청부터 나머지 변형을 채움
+    character_generator.image_cache.set_preferred_keywords(species_keywords(insect_classifier.classes))
+    if settings.GENERATION_CACHE_WARMUP:
+        character_generator.start_cache_warmup(species_keywords(insect_classifier.classes))
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """
+    서버 종료(SIGTERM) 시 새 작업 접수를 멈추고 실행 중 작업을 제한 시간까지 마무리
+    (못 끝낸 작업은 대기 상태로 저장되어 다음 시작 때 다시 실행)
+    이후 Gemini 커넥션 풀과 추론 스레드/워커 프로세스 정리
+    """
+    await job_manager.drain(settings.GRACEFUL_DRAIN_TIMEOUT)
+    await job_manager.close()
+    await insect_classifier.close()
+    character_generator.close()
+
 # CORS 헤더가 포함된 커스텀 정적 파일 핸들러
 @app.get("/generated-images/{filename}")
 async def get_generated_image(filename: str):
@@ -104,14 +207,17 @@ async def root():
 async def health_check():
     """
     서버 헬스 체크 엔드포인트
-    서버 상태와 AI 모델 로딩 상태를 확인
+    서버 상태와 AI 모델별 실제 로딩 상태(loading / warming / ready / failed + 소요 시간)를 확인
+    모델이 로딩 중이어도 서버 자체는 정상이므로 200을 반환합니다.
     """
     return {
         "server": "healthy",
         "models": {
-            "insect_classifier": "loaded",
-            "character_generator": "loaded"
-        }
+            "insect_classifier": insect_classifier.get_status(),
+            "character_generator": character_generator.get_status(),
+            "voice_generator": {"state": "ready" if voice_generator.is_available() else "disabled"}
+        },
+        "timestamp": datetime.now().isoformat()
     }
 
 @app.post("/upload-image")
@@ -192,31 +298,219 @@ async def classify_insect(file: UploadFile = File(...)):
         raise HTTPException(status_code=500, detail=f"곤충 분류 중 오류가 발생했습니다: {str(e)}")
 
 @app.post("/generate-character")
-async def generate_character(keyword: str):
+async def generate_character(request: Request, keyword: str, decoder: Optional[str] = None,
+                             profile: Optional[str] = None):
     """
     캐릭터 생성 엔드포인트
     곤충 키워드를 기반으로 귀여운 캐릭터 이미지 생성
     
     Args:
         keyword: 캐릭터 생성에 사용할 곤충 키워드
+        decoder: 디코더 모드 ("full" 또는 빠른 근사 디코더 "fast", 생략 시 프로필 기본값)
+        profile: 생성 프로필 (preview / standard / quality, 부하가 높으면 더 가벼운 프로필로 자동 하향)
     
     Returns:
-        생성된 캐릭터 이미지 정보
+        생성된 캐릭터 이미지 정보 (기한 초과 시 504, 연결이 끊기면 생성 취소)
     """
     try:
         # AI 모델로 캐릭터 생성
-        character_filename = await character_generator.generate(keyword)
-
-        return {
-            "message": "캐릭터 생성이 완료되었습니다.",
-            "image_filename": character_filename,
-            "image_url": f"/generated-images/{character_filename}",
-            "timestamp": datetime.now().isoformat()
-        }
+        result = await run_until_disconnected(
+            request,
+            character_generator.generate_with_info(
+                keyword, decoder=decoder, profile=profile, deadline=generation_deadline()
+            )
+        )
+        return character_response(result)
         
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"캐릭터 생성 중 오류가 발생했습니다: {str(e)}")
 
+def character_keyword(classification_result: dict) -> str:
+    """
+    분류 결과 → 캐릭터 생성 키워드 (프론트엔드 getCharacterKeyword와 같은 우선순위)
+    영문 이름 → 곤충 이름 → 곤충 종류 → 예측 클래스(괄호 안 영문 이름) 순
+    """
+    parsed_data = classification_result.get("parsed_data") or {}
+    for field in ("곤충_이름_영문", "곤충_이름", "곤충_종류"):
+        value = parsed_data.get(field)
+        if value:
+            return value
+    if classification_result.get("status") == "success" and classification_result.get("predicted_class"):
+        return species_keywords([classification_result["predicted_class"]])[0]
+    return "곤충"
+
+def character_response(result: dict) -> dict:
+    """
+    캐릭터 생성 결과 → 응답 본문 (일반 / 스트리밍 엔드포인트 공통)
+    """
+    character_filename = result["filename"]
+    return {
+        "message": "캐릭터 생성이 완료되었습니다.",
+        "image_filename": character_filename,
+        "image_url": f"/generated-images/{character_filename}",
+        "profile": result["profile"],
+        "requested_profile": result["requested_profile"],
+        "degraded": result["degraded"],
+        "cached": result["cached"],
+        "timestamp": datetime.now().isoformat()
+    }
+
+def sse_event(event: str, data: dict) -> str:
+    """Server-Sent Events 형식 메시지"""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+@app.get("/generate-character/stream")
+async def generate_character_stream(keyword: str, decoder: Optional[str] = None, profile: Optional[str] = None):
+    """
+    캐릭터 생성 스트리밍 엔드포인트 (Server-Sent Events)
+    디노이즈 스텝마다 저해상도 미리보기를 보내고, 마지막에 최종 이미지 경로를 보냄
+    
+    이벤트:
+        start: 생성 시작
+        preview: {"step", "total", "image": 미리보기 JPEG data URL}
+        result: /generate-character와 같은 응답 본문
+        error: {"status_code", "detail"}
+    
+    Args:
+        keyword: 캐릭터 생성에 사용할 곤충 키워드
+        decoder: 디코더 모드 ("full" / "fast", 생략 시 프로필 기본값)
+        profile: 생성 프로필 (preview / standard / quality)
+    
+    Returns:
+        text/event-stream 응답 (캐시된 이미지면 미리보기 없이 바로 result)
+    """
+    if not character_generator.is_ready():
+        raise HTTPException(status_code=503, detail=character_generator.not_ready_detail())
+    
+    events: asyncio.Queue = asyncio.Queue()
+    
+    def on_preview(step: int, total: int, preview: Image.Image):
+        """스텝 미리보기를 JPEG data URL로 변환하여 전송 대기열에 추가"""
+        buffer = io.BytesIO()
+        preview.save(buffer, format="JPEG", quality=80)
+        encoded = base64.b64encode(buffer.getvalue()).decode("ascii")
+        events.put_nowait(("preview", {
+            "step": step,
+            "total": total,
+            "image": f"data:image/jpeg;base64,{encoded}"
+        }))
+    
+    async def run_generation():
+        """생성 실행 후 결과 / 오류를 전송 대기열에 추가"""
+        try:
+            result = await character_generator.generate_with_info(
+                keyword, decoder=decoder, profile=profile, on_preview=on_preview, deadline=generation_deadline()
+            )
+            events.put_nowait(("result", character_response(result)))
+        except HTTPException as e:
+            events.put_nowait(("error", {"status_code": e.status_code, "detail": e.detail}))
+        except Exception as e:
+            events.put_nowait(("error", {"status_code": 500, "detail": f"캐릭터 생성 중 오류가 발생했습니다: {str(e)}"}))
+    
+    generation_task = asyncio.create_task(run_generation())
+    
+    async def event_stream():
+        """미리보기 → 결과 순서로 이벤트 전송"""
+        try:
+            yield sse_event("start", {"keyword": keyword, "timestamp": datetime.now().isoformat()})
+            while True:
+                event, data = await events.get()
+                yield sse_event(event, data)
+                if event in ("result", "error"):
+                    break
+        finally:
+            # 클라이언트 연결이 끊겨 스트림이 닫히면 생성도 취소
+            if not generation_task.done():
+                generation_task.cancel()
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@app.post("/jobs/character")
+async def submit_character_job(keyword: str, decoder: Optional[str] = None, profile: Optional[str] = None,
+                               priority: str = "normal"):
+    """
+    캐릭터 생성 작업 접수 엔드포인트
+    생성이 끝날 때까지 기다리지 않고 작업 ID를 바로 반환
+    
+    Args:
+        keyword: 캐릭터 생성에 사용할 곤충 키워드
+        decoder: 디코더 모드 ("full" / "fast", 생략 시 프로필 기본값)
+        profile: 생성 프로필 (preview / standard / quality)
+        priority: 작업 우선순위 (high / normal / low)
+    
+    Returns:
+        작업 ID와 상태/결과 조회 경로
+    """
+    return await submit_job(
+        "character",
+        {"keyword": keyword, "decoder": decoder, "profile": profile},
+        priority
+    )
+
+async def submit_job(kind: str, params: dict, priority: str) -> dict:
+    """
+    작업 접수 후 작업 ID와 조회 경로 반환 (작업 접수 엔드포인트 공통)
+    """
+    try:
+        job = await job_manager.submit(kind, params, priority=priority)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except QueueFullError as e:
+        raise HTTPException(status_code=503, detail=f"작업을 접수할 수 없습니다. 잠시 후 다시 시도해주세요. ({e})")
+    
+    return {
+        "job_id": job["job_id"],
+        "status": job["status"],
+        "priority": job["priority"],
+        "position": job_manager.position(job["job_id"]),
+        "status_url": f"/jobs/{job['job_id']}",
+        "result_url": f"/jobs/{job['job_id']}/result",
+        "timestamp": datetime.now().isoformat()
+    }
+
+@app.get("/jobs/{job_id}")
+async def get_job_status(job_id: str):
+    """
+    작업 상태 조회 엔드포인트
+    
+    Returns:
+        상태(queued / running / done / failed), 진행률(0~1), 대기 순번
+    """
+    job_info = await job_manager.describe(job_id)
+    if job_info is None:
+        raise HTTPException(status_code=404, detail="작업을 찾을 수 없습니다")
+    return job_info
+
+@app.get("/jobs/{job_id}/result")
+async def get_job_result(job_id: str):
+    """
+    작업 결과 조회 엔드포인트
+    
+    Returns:
+        완료된 작업의 결과 (캐릭터 작업이면 생성 이미지 경로)
+    """
+    job = await job_manager.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="작업을 찾을 수 없습니다")
+    if job["status"] == "failed":
+        raise HTTPException(status_code=500, detail=f"작업 처리 중 오류가 발생했습니다: {job['error']}")
+    if job["status"] != "done":
+        raise HTTPException(status_code=409, detail=f"작업이 아직 완료되지 않았습니다 (상태: {job['status']})")
+    
+    return {
+        "job_id": job["job_id"],
+        "kind": job["kind"],
+        "status": job["status"],
+        **job["result"],
+        "timestamp": datetime.now().isoformat()
+    }
+
 @app.post("/process-full")
 async def process_full_pipeline(file: UploadFile = File(...)):
     """
@@ -242,8 +536,8 @@ async def process_full_pipeline(file: UploadFile = File(...)):
         # 1단계: 곤충 분류
         classification_result = await insect_classifier.classify(file_path)
         
-        # 2단계: 캐릭터 생성
-        character_result = await character_generator.generate(file_path)
+        # 2단계: 분류된 곤충 이름으로 캐릭터 생성
+        character_result = await character_generator.generate(character_keyword(classification_result))
         
         return {
             "message": "전체 처리가 완료되었습니다.",
@@ -253,6 +547,8 @@ async def process_full_pipeline(file: UploadFile = File(...)):
             "timestamp": datetime.now().isoformat()
         }
         
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"전체 처리 중 오류가 발생했습니다: {str(e)}")
 
@@ -302,6 +598,58 @@ async def remove_api_key():
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"API 키 해제 중 오류: {str(e)}")
 
+async def read_validated_image(file: UploadFile) -> bytes:
+    """
+    업로드된 이미지 파일 검증 및 읽기
+    형식(JPG, PNG, GIF, WEBP), 크기(10MB), 이미지 유효성을 확인
+    
+    Args:
+        file: 업로드된 이미지 파일
+    
+    Returns:
+        이미지 바이트
+    
+    Raises:
+        HTTPException: 검증 실패 시 (400, 413)
+    """
+    # 파일 형식 확인
+    allowed_types = ["image/jpeg", "image/png", "image/gif", "image/webp"]
+    if file.content_type not in allowed_types:
+        raise HTTPException(
+            status_code=400,
+            detail="지원되지 않는 파일 형식입니다. JPG, PNG, GIF, WEBP만 가능합니다."
+        )
+    
+    # 파일 크기 제한 (10MB)
+    max_size = 10 * 1024 * 1024  # 10MB
+    file_size = 0
+    file_content = bytearray()
+    
+    # 파일 읽기
+    while True:
+        chunk = await file.read(64 * 1024)
+        if not chunk:
+            break
+        file_size += len(chunk)
+        if file_size > max_size:
+            raise HTTPException(
+                status_code=413,
+                detail="파일 크기가 너무 큽니다. 10MB 이하의 파일을 업로드하세요."
+            )
+        file_content.extend(chunk)
+    
+    # 이미지 유효성 검사
+    try:
+        image = Image.open(io.BytesIO(file_content))
+        image.verify()
+    except Exception:
+        raise HTTPException(
+            status_code=400,
+            detail="유효하지 않은 이미지 파일입니다."
+        )
+    
+    return bytes(file_content)
+
 @app.post("/classify-insect-detailed")
 async def classify_insect_detailed(file: UploadFile = File(...)):
     """
@@ -315,43 +663,8 @@ async def classify_insect_detailed(file: UploadFile = File(...)):
         상세한 곤충 분류 결과 (어린이용)
     """
     try:
-        # 파일 형식 확인
-        allowed_types = ["image/jpeg", "image/png", "image/gif", "image/webp"]
-        if file.content_type not in allowed_types:
-            raise HTTPException(
-                status_code=400,
-                detail="지원되지 않는 파일 형식입니다. JPG, PNG, GIF, WEBP만 가능합니다."
-            )
-        
-        # 파일 크기 제한 (10MB)
-        max_size = 10 * 1024 * 1024  # 10MB
-        file_size = 0
-        file_content = bytearray()
-        
-        # 파일 읽기
-        while True:
-            chunk = await file.read(1024)
-            if not chunk:
-                break
-            file_size += len(chunk)
-            if file_size > max_size:
-                raise HTTPException(
-                    status_code=413,
-                    detail="파일 크기가 너무 큽니다. 10MB 이하의 파일을 업로드하세요."
-                )
-            file_content.extend(chunk)
-        
-        # 이미지 유효성 검사
-        try:
-            from PIL import Image
-            import io
-            image = Image.open(io.BytesIO(file_content))
-            image.verify()
-        except Exception:
-            raise HTTPException(
-                status_code=400,
-                detail="유효하지 않은 이미지 파일입니다."
-            )
+        # 파일 형식/크기/유효성 검사 후 읽기
+        file_content = await read_validated_image(file)
         
         # Gemini API를 사용한 어린이용 곤충 분류
         if not insect_classifier.api_key:
@@ -360,7 +673,7 @@ async def classify_insect_detailed(file: UploadFile = File(...)):
                 detail="Gemini API 키가 설정되지 않았습니다. /set-api-key를 먼저 호출하세요."
             )
         
-        result = insect_classifier.classify_insect_for_kids(bytes(file_content), file.filename)
+        result = await insect_classifier.classify_insect_for_kids(file_content, file.filename)
         
         if "success" in result and result["success"]:
             # 파싱된 데이터를 직접 반환 (프론트엔드에서 바로 사용할 수 있도록)
@@ -402,43 +715,8 @@ async def classify_insect_simple(file: UploadFile = File(...)):
         파싱된 간단한 곤충 정보
     """
     try:
-        # 파일 형식 확인
-        allowed_types = ["image/jpeg", "image/png", "image/gif", "image/webp"]
-        if file.content_type not in allowed_types:
-            raise HTTPException(
-                status_code=400,
-                detail="지원되지 않는 파일 형식입니다. JPG, PNG, GIF, WEBP만 가능합니다."
-            )
-        
-        # 파일 크기 제한 (10MB)
-        max_size = 10 * 1024 * 1024  # 10MB
-        file_size = 0
-        file_content = bytearray()
-        
-        # 파일 읽기
-        while True:
-            chunk = await file.read(1024)
-            if not chunk:
-                break
-            file_size += len(chunk)
-            if file_size > max_size:
-                raise HTTPException(
-                    status_code=413,
-                    detail="파일 크기가 너무 큽니다. 10MB 이하의 파일을 업로드하세요."
-                )
-            file_content.extend(chunk)
-        
-        # 이미지 유효성 검사
-        try:
-            from PIL import Image
-            import io
-            image = Image.open(io.BytesIO(file_content))
-            image.verify()
-        except Exception:
-            raise HTTPException(
-                status_code=400,
-                detail="유효하지 않은 이미지 파일입니다."
-            )
+        # 파일 형식/크기/유효성 검사 후 읽기
+        file_content = await read_validated_image(file)
         
         # Gemini API를 사용한 곤충 분류
         if not insect_classifier.api_key:
@@ -447,7 +725,7 @@ async def classify_insect_simple(file: UploadFile = File(...)):
                 detail="Gemini API 키가 설정되지 않았습니다. /set-api-key를 먼저 호출하세요."
             )
         
-        result = insect_classifier.classify_insect_for_kids(bytes(file_content), file.filename)
+        result = await insect_classifier.classify_insect_for_kids(file_content, file.filename)
         
         if "success" in result and result["success"]:
             # 파싱된 데이터를 직접 반환 (프론트엔드에서 바로 사용할 수 있도록)
@@ -477,6 +755,182 @@ async def classify_insect_simple(file: UploadFile = File(...)):
         )
 
 
+@app.post("/classify-insect-batch")
+async def classify_insect_batch(
+    files: List[UploadFile] = File(...),
+    stream: bool = False,
+    packed: bool = False
+):
+    """
+    여러 장의 곤충 사진을 한 번에 분류하는 배치 엔드포인트
+    수업 시간에 20-30장을 한꺼번에 올리는 경우를 위해 사용
+    
+    Args:
+        files: 분류할 곤충 이미지 파일 목록
+        stream: True면 완료되는 대로 NDJSON으로 스트리밍, False면 한 번에 반환
+        packed: True면 여러 장을 하나의 Gemini 요청으로 묶어서 분류
+    
+    Returns:
+        항목별 분류 결과 (index, filename, success, data/error)
+    """
+    if not files:
+        raise HTTPException(status_code=400, detail="파일이 필요합니다.")
+    if len(files) > settings.BATCH_MAX_FILES:
+        raise HTTPException(
+            status_code=413,
+            detail=f"한 번에 최대 {settings.BATCH_MAX_FILES}개 파일까지 업로드할 수 있습니다."
+        )
+    if not insect_classifier.api_key:
+        raise HTTPException(
+            status_code=500,
+            detail="Gemini API 키가 설정되지 않았습니다. /set-api-key를 먼저 호출하세요."
+        )
+    
+    # 모든 파일을 먼저 한 번에 검증 (잘못된 파일은 항목별 오류로 처리)
+    items = []
+    for index, file in enumerate(files):
+        try:
+            items.append((index, file.filename, await read_validated_image(file), None))
+        except HTTPException as e:
+            items.append((index, file.filename, None, e.detail))
+    
+    semaphore = asyncio.Semaphore(settings.BATCH_CONCURRENCY)
+    
+    def to_item_result(index: int, filename: str, result: dict) -> dict:
+        """분류 결과를 배치 응답 항목 형식으로 변환"""
+        if result.get("success"):
+            return {
+                "index": index,
+                "filename": filename,
+                "success": True,
+                "data": result.get("parsed_data", {})
+            }
+        return {
+            "index": index,
+            "filename": filename,
+            "success": False,
+            "error": result.get("error", "알 수 없는 오류가 발생했습니다.")
+        }
+    
+    async def classify_group(group: list) -> list:
+        """항목 묶음 분류 (동시 실행 수 제한, packed면 한 번의 요청으로 처리)"""
+        async with semaphore:
+            try:
+                if packed:
+                    group_results = await insect_classifier.classify_insects_for_kids_batch(
+                        [(content, filename) for _, filename, content in group]
+                    )
+                else:
+                    group_results = [
+                        await insect_classifier.classify_insect_for_kids(content, filename)
+                        for _, filename, content in group
+                    ]
+            except Exception as e:
+                error = {"error": f"이미지 처리 중 오류가 발생했습니다: {str(e)}"}
+                group_results = [error] * len(group)
+        return [
+            to_item_result(index, filename, result)
+            for (index, filename, _), result in zip(group, group_results)
+        ]
+    
+    # 검증에 실패한 항목은 바로 오류 결과로 처리
+    invalid_results = [
+        {"index": index, "filename": filename, "success": False, "error": error}
+        for index, filename, _, error in items if error
+    ]
+    valid_items = [(index, filename, content) for index, filename, content, error in items if not error]
+    
+    # packed 모드는 여러 장을 한 프롬프트로, 아니면 한 장씩 요청
+    group_size = settings.MULTI_IMAGE_BATCH_SIZE if packed else 1
+    groups = [valid_items[i:i + group_size] for i in range(0, len(valid_items), group_size)]
+    tasks = [asyncio.create_task(classify_group(group)) for group in groups]
+    
+    if stream:
+        async def result_stream():
+            """완료되는 순서대로 한 줄씩 전송"""
+            try:
+                for item_result in invalid_results:
+                    yield json.dumps(item_result, ensure_ascii=False) + "\n"
+                for completed in asyncio.as_completed(tasks):
+                    for item_result in await completed:
+                        yield json.dumps(item_result, ensure_ascii=False) + "\n"
+            finally:
+                for task in tasks:
+                    task.cancel()
+        
+        return StreamingResponse(result_stream(), media_type="application/x-ndjson")
+    
+    group_results = await asyncio.gather(*tasks)
+    results = sorted(
+        invalid_results + [item for group in group_results for item in group],
+        key=lambda item: item["index"]
+    )
+    return JSONResponse(content={
+        "success": True,
+        "total": len(results),
+        "succeeded": sum(1 for r in results if r["success"]),
+        "results": results,
+        "timestamp": datetime.now().isoformat()
+    })
+
+
+async def create_voice_for_insect(insect_data: dict) -> dict:
+    """
+    곤충 정보로 음성 요약을 만들고 TTS 음성 파일 생성
+    (/generate-ai-voice 엔드포인트와 음성 작업에서 함께 사용)
+    
+    Args:
+        insect_data: 곤충 분류 결과 데이터
+    
+    Returns:
+        {"success": True, "summary", "audio_url"} 또는 {"success": False, "error"}
+    
+    Raises:
+        HTTPException: 곤충 데이터 / API 키가 없는 경우
+    """
+    if not insect_data:
+        raise HTTPException(
+            status_code=400,
+            detail="곤충 데이터가 필요합니다."
+        )
+    
+    # Gemini API로 요약 생성 (분류 결과에 요약이 저장되어 있으면 바로 TTS로 진행)
+    if not insect_data.get("음성_요약") and not insect_classifier.api_key:
+        raise HTTPException(
+            status_code=500,
+            detail="Gemini API 키가 설정되지 않았습니다."
+        )
+    
+    summary_text = await insect_classifier.create_summary_for_voice(insect_data)
+    
+    # Google Cloud TTS로 음성 생성
+    if not voice_generator.is_available():
+        return {
+            "success": False,
+            "error": "Google Cloud Text-to-Speech가 설정되지 않았습니다."
+        }
+    
+    # 기본 설정으로 음성 생성 (1배속, 고정 설정)
+    voice_result = await voice_generator.generate_voice(
+        text=summary_text,
+        voice_name=voice_generator.get_recommended_voice(),
+        speaking_rate=1.0,  # 1배속 고정
+        pitch=1.5,          # 어린이용 음높이 고정
+        volume_gain_db=0.0
+    )
+    
+    if voice_result["success"]:
+        return {
+            "success": True,
+            "summary": summary_text,
+            "audio_url": voice_result["audio_url"],
+            "timestamp": datetime.now().isoformat()
+        }
+    return {
+        "success": False,
+        "error": voice_result["error"]
+    }
+
 @app.post("/generate-ai-voice")
 async def generate_ai_voice(request_data: dict):
     """
@@ -489,51 +943,7 @@ async def generate_ai_voice(request_data: dict):
         생성된 음성 파일 정보
     """
     try:
-        insect_data = request_data.get("insect_data", {})
-        
-        if not insect_data:
-            raise HTTPException(
-                status_code=400,
-                detail="곤충 데이터가 필요합니다."
-            )
-        
-        # Gemini API로 요약 생성
-        if not insect_classifier.api_key:
-            raise HTTPException(
-                status_code=500,
-                detail="Gemini API 키가 설정되지 않았습니다."
-            )
-        
-        summary_text = insect_classifier.create_summary_for_voice(insect_data)
-        
-        # Google Cloud TTS로 음성 생성
-        if not voice_generator.is_available():
-            return JSONResponse(content={
-                "success": False,
-                "error": "Google Cloud Text-to-Speech가 설정되지 않았습니다."
-            })
-        
-        # 기본 설정으로 음성 생성 (1배속, 고정 설정)
-        voice_result = await voice_generator.generate_voice(
-            text=summary_text,
-            voice_name=voice_generator.get_recommended_voice(),
-            speaking_rate=1.0,  # 1배속 고정
-            pitch=1.5,          # 어린이용 음높이 고정
-            volume_gain_db=0.0
-        )
-        
-        if voice_result["success"]:
-            return JSONResponse(content={
-                "success": True,
-                "summary": summary_text,
-                "audio_url": voice_result["audio_url"],
-                "timestamp": datetime.now().isoformat()
-            })
-        else:
-            return JSONResponse(content={
-                "success": False,
-                "error": voice_result["error"]
-            })
+        return JSONResponse(content=await create_voice_for_insect(request_data.get("insect_data", {})))
         
     except HTTPException:
         raise
@@ -543,6 +953,22 @@ async def generate_ai_voice(request_data: dict):
             detail=f"AI 음성 생성 중 오류: {str(e)}"
         )
 
+@app.post("/jobs/voice")
+async def submit_voice_job(request_data: dict, priority: str = "normal"):
+    """
+    AI 음성 생성 작업 접수 엔드포인트
+    
+    Args:
+        request_data: {"insect_data": {...}}
+        priority: 작업 우선순위 (high / normal / low)
+    
+    Returns:
+        작업 ID와 상태/결과 조회 경로
+    """
+    if not request_data.get("insect_data"):
+        raise HTTPException(status_code=400, detail="곤충 데이터가 필요합니다.")
+    return await submit_job("voice", {"insect_data": request_data["insect_data"]}, priority)
+
 
 @app.get("/model-status")
 async def get_model_status():
@@ -559,6 +985,7 @@ async def get_model_status():
         return {
             "insect_classifier": classifier_info,
             "character_generator": generator_info,
+            "jobs": job_manager.get_stats(),
             "status": "healthy",
             "timestamp": datetime.now().isoformat()
         }
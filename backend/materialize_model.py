@@ -0,0 +1,88 @@
+"""
+생성 모델 고정 스냅샷 준비 스크립트
+SDXL-turbo 파이프라인을 MODEL_PATH/GENERATION_MODEL 아래에 내려받고 체크섬 매니페스트 작성
+
+사용법:
+python materialize_model.py                         # 기본 모델(GENERATION_MODEL_ID) 최신 리비전
+python materialize_model.py --revision <커밋 해시>  # 리비전 고정 (권장)
+python materialize_model.py --cpu-only              # fp16 가중치 제외 (CPU fp32 노드용)
+python materialize_model.py --fast-decoder          # TAESD 디코더도 함께 내려받기
+python materialize_model.py --verify                # 내려받지 않고 기존 스냅샷만 검증
+
+서버는 시작할 때 매니페스트로 스냅샷을 검증한 뒤 허브 조회 없이 로컬 파일에서 바로 로딩합니다.
+backend 디렉토리에서 실행해야 서버와 같은 MODEL_PATH를 사용합니다.
+"""
+
+import os
+import time
+import argparse
+
+from config import settings
+from services.model_snapshot import write_manifest, verify_snapshot, MANIFEST_FILENAME
+
+# 파이프라인 로딩에 쓰지 않는 파일 (단일 체크포인트, 구형 포맷)
+IGNORE_PATTERNS = ["sd_xl_turbo*", "*.bin", "*.ckpt", "*.onnx", "*.onnx_data", "*.msgpack", "*.pb"]
+
+# CPU 전용 노드에서 추가로 제외하는 파일 (fp16 variant 가중치)
+CPU_ONLY_IGNORE_PATTERNS = ["*fp16*"]
+
+
+def download(model_id: str, local_dir: str, revision, ignore_patterns) -> str:
+    """허브에서 스냅샷 내려받기 (이미 받은 파일은 건너뜀)"""
+    from huggingface_hub import snapshot_download
+
+    os.makedirs(local_dir, exist_ok=True)
+    return snapshot_download(
+        model_id,
+        revision=revision,
+        local_dir=local_dir,
+        ignore_patterns=ignore_patterns
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="생성 모델 고정 스냅샷 준비")
+    parser.add_argument("--model-id", default=settings.GENERATION_MODEL_ID, help="허브 모델 ID")
+    parser.add_argument("--revision", default=None, help="내려받을 리비전 (커밋 해시 권장)")
+    parser.add_argument("--output", default=os.path.join(settings.MODEL_PATH, settings.GENERATION_MODEL),
+                        help="스냅샷 디렉토리")
+    parser.add_argument("--cpu-only", action="store_true", help="fp16 가중치 제외")
+    parser.add_argument("--fast-decoder", action="store_true", help="TAESD 디코더도 내려받기")
+    parser.add_argument("--verify", action="store_true", help="내려받지 않고 기존 스냅샷만 sha256 검증")
+    args = parser.parse_args()
+
+    print("=" * 50)
+    print("📦 생성 모델 고정 스냅샷")
+    print("=" * 50)
+
+    if args.verify:
+        summary = verify_snapshot(args.output, "sha256")
+        print(f"검증 완료: 파일 {summary['files']}개, 해시 {summary['hashed']}개 ({summary['seconds']:.2f}초)")
+        return
+
+    ignore_patterns = IGNORE_PATTERNS + (CPU_ONLY_IGNORE_PATTERNS if args.cpu_only else [])
+    start_time = time.time()
+    download(args.model_id, args.output, args.revision, ignore_patterns)
+    print(f"내려받기: {args.model_id} → {args.output} ({time.time() - start_time:.1f}초)")
+
+    start_time = time.time()
+    manifest = write_manifest(args.output, args.model_id, args.revision)
+    total_size = sum(entry["size"] for entry in manifest["files"].values())
+    print(
+        f"매니페스트: {os.path.join(args.output, MANIFEST_FILENAME)} "
+        f"(파일 {len(manifest['files'])}개, {total_size / 1024**3:.2f} GB, {time.time() - start_time:.1f}초)"
+    )
+
+    if args.fast_decoder and settings.GENERATION_FAST_DECODER_MODEL:
+        decoder_id = settings.GENERATION_FAST_DECODER_MODEL
+        decoder_dir = os.path.join(settings.MODEL_PATH, decoder_id.rsplit("/", 1)[-1])
+        download(decoder_id, decoder_dir, None, IGNORE_PATTERNS)
+        print(f"fast 디코더: {decoder_id} → {decoder_dir}")
+        print(f"  GENERATION_FAST_DECODER_MODEL={decoder_dir} 로 설정하면 로컬 디코더를 사용합니다")
+
+    if not args.revision:
+        print("⚠️ 리비전을 지정하지 않았습니다. 배포 노드 간 같은 가중치를 쓰려면 --revision으로 고정하세요")
+
+
+if __name__ == "__main__":
+    main()
@@ -18,20 +18,42 @@ import random
 import logging
 import io
 import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
 from fastapi import HTTPException
-from typing import Dict, List, Tuple
+from typing import Callable, Dict, List, Optional, Tuple
 from datetime import datetime
-from diffusers import AutoPipelineForText2Image
+
+from config import settings
+from services.diffusion_engine import DiffusionEngine, DECODER_MODES, GENERATION_PARAMS
+from services.generation_cache import GeneratedImageCache, normalize_keyword
+from services.generation_profiles import AdaptiveProfileController, GENERATION_PROFILES, build_generation_options
+from services.generation_batcher import CancelToken, MicroBatcher, QueueFullError
+from services.generation_worker_pool import GenerationWorkerPool
+from services.single_flight import SingleFlight
+from services.model_status import ModelStatus
+from services.model_snapshot import resolve_model_source
 
 # 로깅 설정 - 메모리 사용량 모니터링을 위해
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# 스텝별 미리보기 콜백: (완료 스텝 수, 전체 스텝 수, 저해상도 미리보기 이미지)
+PreviewCallback = Callable[[int, int, Image.Image], None]
+
 class CharacterGenerator:
     """
     곤충을 귀여운 캐릭터로 변환하는 생성형 AI 모델 클래스
     현재는 더미 데이터를 반환하며, 실제 모델 구현 시 수정 필요
     """
+
+    # 캐릭터 생성 프롬프트 (비교 스크립트 등에서도 같은 프롬프트를 사용)
+    PROMPT_TEMPLATE = (
+        "cute cartoon {keyword}, insect body with six legs, "
+        "colorful wings, antennae, chibi style{keyword}, kawaii{keyword}, bright cheerful colors, "
+        "children's book illustration, simple clean art style, white background, "
+        "NOT human, NOT anthropomorphic, pure insect anatomy, adorable bug character"
+    )
     
     def __init__(self):
         """
@@ -44,216 +66,655 @@ class CharacterGenerator:
     # )
     #     self.negative_prompt = "poorly drawn, bad anatomy, deformed, ugly, extra limbs, incorrect number of legs, mutated, merged body parts, human, anthropomorphic, text, watermark, signature, blurred, grainy, realistic, 3d, complex background, dull colors, grayscale, multiple heads, too many eyes"
             
-        self.prompt = (
-            "cute cartoon {keyword}, insect body with six legs, "
-            "colorful wings, antennae, chibi style{keyword}, kawaii{keyword}, bright cheerful colors, "
-            "children's book illustration, simple clean art style, white background, "
-            "NOT human, NOT anthropomorphic, pure insect anatomy, adorable bug character"
+        self.prompt = self.PROMPT_TEMPLATE
+
+        # 동시 요청을 모아 한 번의 파이프라인 호출로 처리하는 배치 스케줄러 (대기열 크기 제한)
+        # 워커 프로세스를 쓰는 경우 워커 수만큼 배치를 동시에 실행
+        self.batcher = MicroBatcher(
+            self._run_batch,
+            max_batch_size=settings.GENERATION_MAX_BATCH_SIZE,
+            max_wait=settings.GENERATION_MAX_BATCH_WAIT_MS / 1000,
+            max_queue_size=settings.GENERATION_QUEUE_SIZE,
+            max_concurrent_batches=max(1, settings.GENERATION_WORKERS)
+        )
+
+        # 키워드별 생성 이미지 캐시 (프롬프트/생성 파라미터가 같으면 시드별 변형을 재사용)
+        self.image_cache = GeneratedImageCache(
+            "out_put_image",
+            params={"model": settings.GENERATION_MODEL_ID, "prompt": self.prompt, **GENERATION_PARAMS},
+            variants=settings.GENERATION_CACHE_VARIANTS,
+            base_seed=settings.GENERATION_CACHE_SEED,
+            enabled=settings.GENERATION_CACHE_ENABLED,
+            max_keywords=settings.GENERATION_CACHE_MAX_KEYWORDS,
+            max_files=settings.GENERATION_CACHE_MAX_FILES
         )
+        # 같은 변형을 기다리는 요청이 모두 떠나면(연결 끊김 / 기한 초과) 생성도 중단
+        self.render_flight = SingleFlight(cancel_abandoned=True)
 
-        # 앱 시작 시 모델 로드
-        logger.info("모델 로딩 시작...")
-        model_load_start_time = time.time()
+        # 생성 대기 시간에 따라 가벼운 프로필로 자동 전환하는 제어기
+        self.profile_controller = AdaptiveProfileController(
+            target_wait=settings.GENERATION_TARGET_WAIT_MS / 1000,
+            cooldown=settings.GENERATION_ADAPTIVE_COOLDOWN,
+            enabled=settings.GENERATION_ADAPTIVE_PROFILES
+        )
+        self._fill_tasks: Dict[str, asyncio.Task] = {}
+        self._warmup_task = None
+        self._load_task = None
+        self.status = ModelStatus("character_generator")
+        # 고정 로컬 스냅샷 (MODEL_PATH/GENERATION_MODEL, materialize_model.py로 준비)
+        self.snapshot_dir = os.path.join(settings.MODEL_PATH, settings.GENERATION_MODEL)
+        self.model_source = None
+        self.snapshot_check_seconds = None
 
-        try:
-            # 실제 생성 모델 로딩 코드를 여기에 구현
-            # 예: GAN, Stable Diffusion, StyleGAN 등
-            # self.model = torch.load(model_path, map_location=self.device)
-            # self.model.eval()
-            self.pipe = AutoPipelineForText2Image.from_pretrained(
-            "stabilityai/sdxl-turbo",
-            torch_dtype=torch.float16,  # fp16으로 메모리 사용량 절반으로 줄임
-            variant="fp16",
-            use_safetensors=True,  # 안전한 텐서 형식 사용
-            low_cpu_mem_usage=True  # CPU 메모리 사용량 최적화
+        self.engine = None
+        self.executor = None
+        self.worker_pool = None
+
+        if settings.GENERATION_WORKERS > 0:
+            # CPU 워커 프로세스 풀 (fp32 가중치를 mmap으로 공유, 프로세스 시작은 start()에서)
+            # model_id는 start()에서 스냅샷 검증 후 로컬 경로로 바뀜
+            self.worker_pool = GenerationWorkerPool(
+                settings.GENERATION_WORKERS,
+                threads_per_worker=settings.GENERATION_WORKER_THREADS,
+                engine_options={
+                    "model_id": settings.GENERATION_MODEL_ID,
+                    "device": "cpu",
+                    "torch_dtype": "float32",
+                    "variant": None,
+                    "mmap_weights": True,
+                    "torch_compile": settings.GENERATION_TORCH_COMPILE,
+                    "quantize": settings.GENERATION_QUANTIZE,
+                    "quantized_cache_dir": settings.GENERATION_QUANTIZED_CACHE_DIR,
+                    "fast_decoder_model": settings.GENERATION_FAST_DECODER_MODEL or None,
+                    "embed_cache_size": settings.PROMPT_EMBED_CACHE_SIZE,
+                    "embed_cache_dir": settings.PROMPT_EMBED_CACHE_DIR
+                }
             )
+            logger.info(f"생성 워커 프로세스 {settings.GENERATION_WORKERS}개 모드로 초기화")
+            return
 
-            # GPU가 사용 가능한 경우에만 CUDA로 이동
-            if torch.cuda.is_available():
-                self.pipe.to("cuda")
-                # GPU 메모리 최적화 설정
-                torch.backends.cudnn.benchmark = True  # cuDNN 최적화
-                torch.backends.cuda.matmul.allow_tf32 = True  # TF32 사용으로 성능 향상
-                logger.info(f"GPU 메모리 사용량: {torch.cuda.memory_allocated() / 1024**3:.2f} GB")
-            else:
-                logger.warning("CUDA를 사용할 수 없습니다. CPU 모드로 실행됩니다.")
+        # 추론 전용 스레드 (이벤트 루프를 막지 않도록 파이프라인 호출은 여기서만 실행)
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="diffusion-inference")
 
-            model_load_time = time.time() - model_load_start_time
-            logger.info(f"모델 로딩 완료! 소요시간: {model_load_time:.2f}초")
+        # 모델 로딩은 start()에서 백그라운드로 실행 (서버가 로딩을 기다리지 않고 바로 요청을 받음)
+        # 실행 백엔드 선택 (auto면 CUDA 사용 가능 여부로 결정, CPU는 bf16/fp32 자동 선택)
+        device = settings.GENERATION_BACKEND
+        if device == "auto":
+            device = "cuda" if torch.cuda.is_available() else "cpu"
+        self.engine = DiffusionEngine(
+            settings.GENERATION_MODEL_ID,
+            device=device,
+            torch_dtype=settings.GENERATION_CPU_DTYPE if device == "cpu" else "auto",
+            num_threads=settings.GENERATION_CPU_THREADS,
+            torch_compile=settings.GENERATION_TORCH_COMPILE,
+            quantize=settings.GENERATION_QUANTIZE,
+            quantized_cache_dir=settings.GENERATION_QUANTIZED_CACHE_DIR,
+            fast_decoder_model=settings.GENERATION_FAST_DECODER_MODEL or None,
+            embed_cache_size=settings.PROMPT_EMBED_CACHE_SIZE,
+            embed_cache_dir=settings.PROMPT_EMBED_CACHE_DIR
+        )
 
-        except Exception as e:
-            logger.error(f"모델 로딩 실패: {e}")
-        
-        # print(f"캐릭터 생성 모델이 {self.device}에서 초기화되었습니다.")
+    def start(self):
+        """
+        모델 로딩 시작 (서버 시작 이벤트에서 호출, 로딩이 끝나기를 기다리지 않음)
 
-        # 모델 warmup 실행으로 첫 번째 이미지 생성 속도 개선
-        self._warmup_model()
+        두 모드 모두 먼저 로컬 스냅샷을 검증하여 로딩 경로를 정한 뒤,
+        워커 모드는 워커 프로세스를 시작하고, 스레드 모드는 추론 스레드에서 로딩 → warmup을 실행합니다.
+        """
+        if self._load_task is not None:
+            return
+        if self.worker_pool is not None:
+            self._load_task = asyncio.create_task(self._start_workers())
+        else:
+            self._load_task = asyncio.create_task(self._load_engine())
 
-    def _warmup_model(self):
+    def _resolve_model_source(self) -> str:
         """
-        모델 warmup을 통한 첫 번째 이미지 생성 속도 최적화
-        
-        목적:
-        1. CUDA 커널 초기화: GPU에서 처음 연산 시 발생하는 지연을 미리 처리
-        2. 메모리 할당: 필요한 GPU 메모리를 미리 할당하고 캐싱
-        3. 가중치 최적화: 모델 가중치의 GPU 최적화를 사전에 완료
-        4. cuDNN 알고리즘 선택: 최적의 convolution 알고리즘을 미리 결정
-        
-        이 과정을 통해 실제 사용자 요청 시 대기시간을 크게 단축할 수 있습니다.
+        로딩 경로 결정 (검증된 고정 스냅샷, 쓸 수 없으면 설정에 따라 허브 모델 ID)
         """
-        logger.info("🔥 모델 warmup 시작 - 첫 번째 이미지 생성 속도 최적화를 위한 준비 작업")
-        warmup_start_time = time.time()
-        
+        start_time = time.time()
+        self.model_source = resolve_model_source(
+            self.snapshot_dir,
+            settings.GENERATION_MODEL_ID,
+            verify=settings.GENERATION_SNAPSHOT_VERIFY,
+            allow_hub_fallback=settings.GENERATION_ALLOW_HUB_FALLBACK
+        )
+        self.snapshot_check_seconds = round(time.time() - start_time, 2)
+        return self.model_source
+
+    async def _start_workers(self):
+        """
+        스냅샷 검증 후 워커 프로세스 시작 (검증은 워커마다 반복하지 않고 한 번만 수행)
+        """
+        self.status.mark("loading")
         try:
-            # warmup용 간단한 더미 프롬프트 생성
-            # 실제 사용될 프롬프트와 유사한 구조로 구성하여 동일한 연산 경로를 거치도록 함
-            warmup_prompt = "cute butterfly, soft pastels, simple details, plain background"
-            
-            logger.info(f"더미 프롬프트로 warmup 실행: '{warmup_prompt}'")
-            
-            # GPU 메모리 사용량 모니터링 (warmup 전)
-            if torch.cuda.is_available():
-                memory_before_warmup = torch.cuda.memory_allocated()
-                logger.info(f"Warmup 전 GPU 메모리: {memory_before_warmup / 1024**3:.2f} GB")
-            
-            # 실제 추론과 동일한 조건으로 더미 이미지 생성
-            # torch.no_grad()로 그래디언트 계산을 비활성화하여 메모리 절약
-            with torch.no_grad():
-                # 첫 번째 추론에서 발생하는 모든 초기화 작업을 여기서 처리
-                warmup_image = self.pipe(
-                    prompt=warmup_prompt,       # 더미 프롬프트
-                    num_inference_steps=2,      # 빠른 생성을 위해 1스텝 (실제 사용과 동일)
-                    guidance_scale=1.5,         # 가이던스 스케일 0 (실제 사용과 동일)
-                    width=640,                  # 실제 사용과 동일한 해상도
-                    height=400                  # 실제 사용과 동일한 해상도
-                ).images[0]
-            
-            # warmup에서 생성된 이미지는 메모리에서 즉시 삭제
-            # 파일로 저장하지 않고 메모리만 사용하여 디스크 I/O 최소화
-            del warmup_image
-            
-            # GPU 메모리 사용량 모니터링 (warmup 후)
-            if torch.cuda.is_available():
-                memory_after_warmup = torch.cuda.memory_allocated()
-                logger.info(f"Warmup 후 GPU 메모리: {memory_after_warmup / 1024**3:.2f} GB")
-                memory_allocated = (memory_after_warmup - memory_before_warmup) / 1024**2
-                logger.info(f"Warmup 메모리 할당량: {memory_allocated:.2f} MB")
-                
-                # GPU 메모리 캐시 정리로 불필요한 메모리 해제
-                torch.cuda.empty_cache()
-                logger.info("GPU 메모리 캐시 정리 완료")
-            
-            # warmup 완료 시간 측정 및 로깅
-            warmup_time = time.time() - warmup_start_time
-            logger.info(f"✅ 모델 warmup 완료! 소요시간: {warmup_time:.2f}초")
-            logger.info("이제 사용자 요청 시 빠른 이미지 생성이 가능합니다.")
-            
+            source = await asyncio.to_thread(self._resolve_model_source)
         except Exception as e:
-            # warmup 실패 시에도 서비스는 정상 동작하도록 예외 처리
-            # warmup 실패가 전체 서비스를 중단시키지 않도록 주의
-            logger.warning(f"⚠️ 모델 warmup 실패 (서비스는 정상 동작): {e}")
-            logger.info("첫 번째 이미지 생성 시 다소 지연될 수 있습니다.")
-    
-    
-    async def generate(self, keyword: str):
+            self.status.mark("failed", str(e))
+            logger.error(f"모델 스냅샷 확인 실패: {e}")
+            return
+        self.worker_pool.engine_options["model_id"] = source
+        self.worker_pool.start()
+
+    async def _load_engine(self):
+        """
+        추론 스레드에서 모델 로딩 후 warmup 실행 (이벤트 루프는 그동안 다른 요청 처리)
+        """
+        loop = asyncio.get_running_loop()
+        try:
+            self.status.mark("loading")
+            self.engine.model_id = await loop.run_in_executor(self.executor, self._resolve_model_source)
+            # 로컬 스냅샷 + CPU fp32면 safetensors 파일을 복사 없이 mmap으로 연결
+            if (os.path.isdir(self.engine.model_id) and self.engine.device == "cpu"
+                    and self.engine.torch_dtype == "float32" and not self.engine.quantize):
+                self.engine.mmap_weights = True
+            await loop.run_in_executor(self.executor, self.engine.load)
+
+            # 모델 warmup 실행으로 첫 번째 이미지 생성 속도 개선
+            self.status.mark("warming")
+            await loop.run_in_executor(self.executor, self.engine.warmup)
+
+            self.status.mark("ready")
+            logger.info(f"캐릭터 생성 모델 준비 완료: {self.status.to_dict()}")
+        except Exception as e:
+            self.status.mark("failed", str(e))
+            logger.error(f"모델 로딩 실패: {e}")
+
+    def is_ready(self) -> bool:
+        """
+        생성 요청을 처리할 수 있는 상태인지 여부
+        """
+        if self.worker_pool is not None:
+            return self.worker_pool.is_ready()
+        return self.status.ready
+
+    def get_status(self) -> Dict:
+        """
+        /health 응답용 모델 로딩 상태 (loading / warming / ready / failed + 소요 시간)
+        """
+        snapshot = {"model_source": self.model_source, "snapshot_check_seconds": self.snapshot_check_seconds}
+        if self.worker_pool is None:
+            return {**self.status.to_dict(), **snapshot}
+
+        # 워커 모드: 스냅샷 확인 중(워커 시작 전)에는 확인 상태를 그대로 반환
+        workers = self.worker_pool.get_stats()["workers"]
+        if not workers:
+            return {**self.status.to_dict(), **snapshot}
+
+        # 준비된 워커가 하나라도 있으면 ready, 모두 실패 / 종료했으면 failed
+        states = [worker["state"] for worker in workers.values()]
+        load_times = [worker["load_time"] for worker in workers.values() if worker.get("load_time") is not None]
+        if "ready" in states:
+            state = "ready"
+        elif states and all(state in ("failed", "exited") for state in states):
+            state = "failed"
+        else:
+            state = "loading" if states else "pending"
+        info = {
+            "state": state,
+            "load_seconds": round(min(load_times), 2) if load_times else None,
+            **snapshot,
+            "workers": {worker_id: worker["state"] for worker_id, worker in workers.items()},
+        }
+        errors = [worker["error"] for worker in workers.values() if worker.get("error")]
+        if state == "failed" and errors:
+            info["error"] = errors[0]
+        return info
+
+    def not_ready_detail(self) -> str:
+        """모델이 준비되지 않았을 때의 503 응답 메시지"""
+        if self.get_status()["state"] == "failed":
+            return "캐릭터 생성 모델 로딩에 실패했습니다. 관리자에게 문의해주세요."
+        return "캐릭터 생성 모델을 불러오는 중입니다. 잠시 후 다시 시도해주세요."
+
+    async def _run_batch(self, requests: List[Dict], cancel_token: CancelToken) -> List[Tuple[Image.Image, Dict]]:
+        """
+        모인 생성 요청들을 한 번의 파이프라인 호출로 생성
+        (워커 프로세스 풀 또는 추론 전용 스레드에서 실행)
+
+        Args:
+            requests: 생성 요청 목록 (콜백 "on_progress" / "on_preview"는 이 프로세스에서만 사용)
+            cancel_token: 배치의 요청자가 모두 떠나면 취소되는 토큰 (다음 스텝 경계에서 중단)
+
+        Returns:
+            요청 순서대로 (생성된 이미지, 단계별 시간) 목록
+        """
+        loop = asyncio.get_running_loop()
+        progress_callbacks = [request.get("on_progress") for request in requests]
+        preview_callbacks = [request.get("on_preview") for request in requests]
+        engine_requests = [
+            {
+                **{key: value for key, value in request.items() if key not in ("on_progress", "on_preview")},
+                "preview": request.get("on_preview") is not None,
+            }
+            for request in requests
+        ]
+
+        def on_step(step: int, total: int, previews: Optional[List[Image.Image]] = None):
+            # 추론 스레드 / 결과 수신 스레드에서 호출되므로 이벤트 루프로 넘겨서 실행
+            # 디노이즈가 끝나도 디코딩이 남아 있으므로 최대 0.9까지만 표시
+            progress = 0.9 * step / max(total, 1)
+            for callback in progress_callbacks:
+                if callback is not None:
+                    loop.call_soon_threadsafe(callback, progress)
+            if previews is not None:
+                for callback, preview in zip(preview_callbacks, previews):
+                    if callback is not None:
+                        loop.call_soon_threadsafe(callback, step, total, preview)
+
+        if self.worker_pool is not None:
+            return await self.worker_pool.run_batch(engine_requests, on_step, cancel_token)
+
+        return await loop.run_in_executor(
+            self.executor, self.engine.run_batch, engine_requests, on_step, cancel_token.is_cancelled
+        )
+
+    async def generate(self, keyword: str, decoder: Optional[str] = None, profile: Optional[str] = None):
         """
         캐릭터 생성 메인 함수
         
         Args:
             image_path: 원본 곤충 이미지 경로
             style: 캐릭터 스타일 (선택사항)
+            decoder: 디코더 모드 ("full" 또는 "fast", None이면 프로필/설정 기본값)
+            profile: 생성 프로필 (preview / standard / quality, None이면 설정 기본값)
             
         Returns:
             생성 결과 딕셔너리
-        """        
-        # 모델이 로드되었는지 확인
-        if self.pipe is None:
-            raise HTTPException(status_code=503, detail="모델이 아직 로드되지 않았습니다. 잠시 후 다시 시도해주세요.")
-        
-        try:
-            # 전체 요청 시작 시간
-            total_start_time = time.time()
-            print("1")
-            # 요청 시작 로그
-            logger.info(f"이미지 생성 요청: '{keyword}'")
-
-            # 프롬프트 생성
-            prompt = self.prompt.format(keyword=keyword)
-            logger.info(f"생성된 프롬프트: {prompt[:100]}...")
-
-            # GPU 메모리 사용량 로깅 (요청 전)
-            if torch.cuda.is_available():
-                memory_before = torch.cuda.memory_allocated()
-                logger.info(f"생성 전 GPU 메모리: {memory_before / 1024**3:.2f} GB")
-
-            # 이미지 생성 시작 시간
-            generation_start_time = time.time()
-
-            # 이미지 생성 (최적화된 설정)
-            with torch.no_grad():  # 그래디언트 계산 비활성화로 메모리 절약
-                image = self.pipe(
-                    prompt=prompt,
-                    # negative_prompt=self.negative_prompt,
-                    num_inference_steps=3,  # 빠른 생성을 위해 3스텝 사용
-                    guidance_scale=1.5,     # 가이던스 스케일 1.5으로 설정하여 빠른 생성
-                    width=640,              # 카드 비율에 맞게 가로를 더 넓게 (16:10 비율)
-                    height=400              # 카드 이미지 섹션에 맞는 높이
-                ).images[0]
-
-            # 이미지 생성 완료 시간
-            generation_time = time.time() - generation_start_time
-
-            # GPU 메모리 사용량 로깅 (요청 후)
-            if torch.cuda.is_available():
-                memory_after = torch.cuda.memory_allocated()
-                logger.info(f"생성 후 GPU 메모리: {memory_after / 1024**3:.2f} GB")
-                logger.info(f"메모리 증가량: {(memory_after - memory_before) / 1024**2:.2f} MB")
-
-            # 이미지 인코딩 시작 시간
-            encoding_start_time = time.time()
-
-            # 이미지를 메모리 버퍼에 저장
-            buf = io.BytesIO()
-            image.save(buf, format="PNG", optimize=True)  # PNG 최적화 옵션 추가
-            buf.seek(0)
+        """
+        result = await self.generate_with_info(keyword, decoder=decoder, profile=profile)
+        return result["filename"]
 
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            filename = f"{timestamp}_{keyword}.png"
+    async def generate_with_info(self, keyword: str, decoder: Optional[str] = None,
+                                 profile: Optional[str] = None,
+                                 on_progress: Optional[Callable[[float], None]] = None,
+                                 on_preview: Optional[PreviewCallback] = None,
+                                 deadline: Optional[float] = None) -> Dict:
+        """
+        캐릭터 생성 후 실제 적용된 프로필 정보와 함께 반환
 
-            # 생성된 이미지 파일에 저장
-            output_dir = "out_put_image"
-            os.makedirs(output_dir, exist_ok=True)
-            file_path = os.path.join(output_dir, filename)
+        부하가 높으면 적응형 제어기가 요청 프로필보다 가벼운 프로필로 낮춥니다.
+        단, 요청한 프로필의 캐시 이미지가 이미 있으면 부하와 관계없이 그대로 반환합니다.
 
-            with open(file_path, "wb") as f:
-                f.write(buf.getbuffer())
+        Args:
+            keyword: 캐릭터 키워드
+            decoder: 디코더 모드
+            profile: 생성 프로필
+            on_progress: 진행률(0~1) 콜백 (작업 API 상태 표시용)
+            on_preview: 스텝별 미리보기 콜백 (스트리밍 API용, 캐시 적중 시에는 호출되지 않음)
+            deadline: 요청 기한 (time.time() 기준 시각, 넘으면 생성을 중단하고 504)
 
-            # 이미지 인코딩 완료 시간
-            encoding_time = time.time() - encoding_start_time
+        Returns:
+            {"filename", "profile", "requested_profile", "degraded", "cached"}
+
+        호출한 코루틴이 취소되면(클라이언트 연결 끊김) 대기열에서 빠지고,
+        같은 배치의 요청자가 모두 떠나면 파이프라인도 다음 스텝 경계에서 중단됩니다.
+        """
+        # 모델이 로드되었는지 확인
+        if not self.is_ready():
+            raise HTTPException(status_code=503, detail=self.not_ready_detail())
 
-            # 생성된 이미지 객체 메모리에서 제거
-            del image
+        requested_profile = profile or settings.GENERATION_DEFAULT_PROFILE
+        requested_options = self._resolve_options(requested_profile, decoder)
+        # 대기열이 비어 있으면 최근 평균 대기 시간과 관계없이 부하가 없는 것으로 보고 복구
+        current_wait = self.batcher.average_wait() if self.batcher.queue_depth() > 0 else 0.0
+        self.profile_controller.update(current_wait)
 
-            # 전체 요청 완료 시간
-            total_time = time.time() - total_start_time
+        try:
+            # 요청한 품질의 캐시가 있으면 바로 반환 (부족한 변형은 백그라운드에서 채움)
+            if self.image_cache.enabled:
+                self.image_cache.record_request(keyword)
+                cached_filename = self.image_cache.next_variant(keyword, requested_options)
+                if cached_filename is not None:
+                    logger.info(f"캐시된 이미지 반환: '{keyword}' → {cached_filename}")
+                    self._schedule_fill(keyword, requested_options)
+                    return self._generation_result(cached_filename, requested_options, requested_profile, True)
 
-            # 성능 통계 로깅
-            logger.info(f"이미지 생성 완료: '{keyword}'")
-            logger.info(f"📊 성능 통계:")
-            logger.info(f"   - 전체 소요시간: {total_time:.3f}초")
-            logger.info(f"   - 이미지 생성: {generation_time:.3f}초")
-            logger.info(f"   - 이미지 인코딩: {encoding_time:.3f}초")
+            # 부하에 따라 프로필 하향
+            effective_profile = self.profile_controller.select(requested_profile)
+            options = requested_options
+            if effective_profile != requested_profile:
+                options = self._resolve_options(effective_profile, decoder)
+                logger.info(f"부하로 인한 프로필 하향: {requested_profile} → {effective_profile}")
 
-            if torch.cuda.is_available():
-                memory_used = (memory_after - memory_before) / 1024**2
-                logger.info(f"   - 메모리 사용량: {memory_used:.2f} MB")
+            if not self.image_cache.enabled:
+                filename = await self._with_deadline(
+                    self._render(keyword, options=options, on_progress=on_progress, on_preview=on_preview),
+                    deadline
+                )
+                return self._generation_result(filename, options, requested_profile, False)
 
-            # PNG 이미지를 스트리밍 응답으로 반환 (성능 정보 헤더 포함)
-            return filename
+            cached_filename = None
+            if options is not requested_options:
+                cached_filename = self.image_cache.next_variant(keyword, options)
+            cached = cached_filename is not None
+            if not cached:
+                missing = self.image_cache.missing_variants(keyword, options)
+                if not missing:
+                    # 조회 뒤 다른 요청 / 채우기 작업이 변형을 모두 만들었으면 다시 조회
+                    cached_filename = self.image_cache.next_variant(keyword, options)
+                    cached = cached_filename is not None
+            if not cached:
+                index = missing[0][0] if missing else 0
+                cached_filename = await self._with_deadline(
+                    self._render_variant(keyword, index, options, on_progress, on_preview),
+                    deadline
+                )
+            self._schedule_fill(keyword, options)
+            return self._generation_result(cached_filename, options, requested_profile, cached)
 
+        except QueueFullError as e:
+            logger.warning(f"이미지 생성 요청 거절: {e}")
+            raise HTTPException(status_code=503, detail="요청이 많아 잠시 후 다시 시도해주세요.")
+        except asyncio.TimeoutError:
+            logger.warning(f"이미지 생성 기한 초과: '{keyword}'")
+            raise HTTPException(status_code=504, detail="이미지 생성 시간이 초과되었습니다. 잠시 후 다시 시도해주세요.")
         except Exception as e:
             logger.error(f"이미지 생성 실패: {e}")
             # 오류 발생 시 메모리 정리
             # cleanup_memory()
             raise HTTPException(status_code=500, detail=f"이미지 생성 중 오류가 발생했습니다: {str(e)}")
-    
+
+    @staticmethod
+    async def _with_deadline(coro, deadline: Optional[float]):
+        """
+        기한까지 코루틴 실행 (기한이 지나면 취소 후 asyncio.TimeoutError)
+        """
+        if deadline is None:
+            return await coro
+        return await asyncio.wait_for(coro, max(0.0, deadline - time.time()))
+
+    @staticmethod
+    def _generation_result(filename: str, options: Dict, requested_profile: str, cached: bool) -> Dict:
+        """생성 결과 정보 구성"""
+        return {
+            "filename": filename,
+            "profile": options["profile"],
+            "requested_profile": requested_profile,
+            "degraded": options["profile"] != requested_profile,
+            "cached": cached,
+        }
+
+    def _resolve_options(self, profile: Optional[str] = None, decoder: Optional[str] = None) -> Dict:
+        """
+        요청별 생성 옵션 결정 (결과 이미지에 영향을 주므로 캐시 키와 배치 키에 사용)
+
+        Args:
+            profile: 생성 프로필 이름 (None이면 설정 기본값)
+            decoder: 디코더 지정 (None이면 전역 설정, 전역 설정도 없으면 프로필 기본값)
+
+        Raises:
+            HTTPException: 지원하지 않는 프로필 / 디코더인 경우
+        """
+        profile = profile or settings.GENERATION_DEFAULT_PROFILE
+        if profile not in GENERATION_PROFILES:
+            raise HTTPException(
+                status_code=400,
+                detail=f"지원하지 않는 프로필입니다: {profile} (가능: {', '.join(GENERATION_PROFILES)})"
+            )
+
+        decoder = decoder or settings.GENERATION_DECODER or None
+        if decoder is not None and decoder not in DECODER_MODES:
+            raise HTTPException(
+                status_code=400,
+                detail=f"지원하지 않는 디코더입니다: {decoder} (가능: {', '.join(DECODER_MODES)})"
+            )
+        return build_generation_options(profile, decoder)
+
+    async def _render(self, keyword: str, seed: Optional[int] = None, filename: Optional[str] = None,
+                      options: Optional[Dict[str, str]] = None,
+                      on_progress: Optional[Callable[[float], None]] = None,
+                      on_preview: Optional[PreviewCallback] = None) -> str:
+        """
+        이미지 한 장을 생성하여 저장
+
+        Args:
+            keyword: 캐릭터 키워드
+            seed: 생성 시드 (None이면 매번 다른 이미지)
+            filename: 저장할 파일명 (None이면 타임스탬프 기반 이름)
+            options: 생성 옵션 (디코더 등, 같은 옵션끼리만 배치로 묶임)
+            on_progress: 진행률(0~1) 콜백
+            on_preview: 스텝별 미리보기 콜백
+
+        Returns:
+            저장된 파일명
+        """
+        # 전체 요청 시작 시간
+        total_start_time = time.time()
+        # 요청 시작 로그
+        logger.info(f"이미지 생성 요청: '{keyword}'")
+
+        # 프롬프트 생성
+        prompt = self.prompt.format(keyword=keyword)
+        logger.info(f"생성된 프롬프트: {prompt[:100]}...")
+
+        # GPU 메모리 사용량 로깅 (요청 전)
+        if torch.cuda.is_available():
+            memory_before = torch.cuda.memory_allocated()
+            logger.info(f"생성 전 GPU 메모리: {memory_before / 1024**3:.2f} GB")
+
+        # 이미지 생성 시작 시간
+        generation_start_time = time.time()
+
+        # 이미지 생성 (동시 요청과 함께 배치로 처리)
+        options = options or self._resolve_options()
+        prompt_request = {"prompt": prompt, "seed": seed, **options, "on_progress": on_progress, "on_preview": on_preview}
+        image, timings = await self.batcher.submit(
+            prompt_request,
+            batch_key=tuple(sorted(options.items()))
+        )
+
+        # 이미지 생성 완료 시간
+        generation_time = time.time() - generation_start_time
+
+        # GPU 메모리 사용량 로깅 (요청 후)
+        if torch.cuda.is_available():
+            memory_after = torch.cuda.memory_allocated()
+            logger.info(f"생성 후 GPU 메모리: {memory_after / 1024**3:.2f} GB")
+            logger.info(f"메모리 증가량: {(memory_after - memory_before) / 1024**2:.2f} MB")
+
+        # 이미지 인코딩 시작 시간
+        encoding_start_time = time.time()
+
+        # PNG 인코딩과 파일 저장은 별도 스레드에서 수행 (이벤트 루프/추론 스레드 비점유)
+        filename = await asyncio.to_thread(self._save_image, image, keyword, filename)
+        if seed is not None:
+            self.image_cache.record_fill()
+            await asyncio.to_thread(self.image_cache.enforce_limit)
+
+        # 이미지 인코딩 완료 시간
+        encoding_time = time.time() - encoding_start_time
+
+        # 생성된 이미지 객체 메모리에서 제거
+        del image
+
+        # 전체 요청 완료 시간
+        total_time = time.time() - total_start_time
+
+        # 성능 통계 로깅
+        logger.info(f"이미지 생성 완료: '{keyword}'")
+        logger.info(f"📊 성능 통계:")
+        logger.info(f"   - 전체 소요시간: {total_time:.3f}초")
+        logger.info(f"   - 이미지 생성: {generation_time:.3f}초")
+        logger.info(f"     · 디노이즈: {timings['denoise']:.3f}초 (배치 {timings['batch_size']}개, 프로필 {timings['profile']})")
+        logger.info(f"     · 디코딩({timings['decoder']}): {timings['decode']:.3f}초")
+        logger.info(f"   - 이미지 인코딩: {encoding_time:.3f}초")
+
+        if torch.cuda.is_available():
+            memory_used = (memory_after - memory_before) / 1024**2
+            logger.info(f"   - 메모리 사용량: {memory_used:.2f} MB")
+
+        # PNG 이미지를 스트리밍 응답으로 반환 (성능 정보 헤더 포함)
+        return filename
+
+    async def _render_variant(self, keyword: str, index: int, options: Dict[str, str],
+                              on_progress: Optional[Callable[[float], None]] = None,
+                              on_preview: Optional[PreviewCallback] = None) -> str:
+        """
+        캐시 변형 이미지 생성 (같은 변형을 동시에 요청하면 한 번만 생성)
+
+        Args:
+            keyword: 캐릭터 키워드
+            index: 변형 번호
+            options: 생성 옵션
+            on_progress: 진행률 콜백 (같은 변형에 합류한 요청은 진행률 / 미리보기 없이 결과만 받음)
+            on_preview: 스텝별 미리보기 콜백
+
+        Returns:
+            캐시 파일명
+        """
+        filename = self.image_cache.variant_filename(keyword, index, options)
+        return await self.render_flight.run(
+            filename, self._render, keyword, self.image_cache.seed_for(index), filename, options, on_progress, on_preview
+        )
+
+    def _schedule_fill(self, keyword: str, options: Dict[str, str]):
+        """
+        아직 없는 변형 이미지를 백그라운드에서 채우기 (키워드 + 옵션당 작업 하나)
+        분류 대상 곤충이거나 두 번 이상 요청된 키워드만 채움
+        """
+        # 부하로 프로필을 낮춘 상태에서는 사용자 요청을 위해 채우기를 미룸
+        if self.profile_controller.level > 0 or not self.image_cache.should_fill(keyword):
+            return
+        key = f"{normalize_keyword(keyword)}|{sorted(options.items())}"
+        if key in self._fill_tasks or not self.image_cache.missing_variants(keyword, options):
+            return
+        task = asyncio.create_task(self._fill_variants(keyword, options))
+        self._fill_tasks[key] = task
+        task.add_done_callback(lambda _: self._fill_tasks.pop(key, None))
+
+    async def _fill_variants(self, keyword: str, options: Optional[Dict[str, str]] = None):
+        """
+        키워드의 빈 변형을 순서대로 생성
+        """
+        options = options or self._resolve_options()
+        for index, _ in self.image_cache.missing_variants(keyword, options):
+            try:
+                await self._render_variant(keyword, index, options)
+            except QueueFullError:
+                # 사용자 요청이 우선이므로 대기열이 가득 차면 다음 요청 때 다시 채움
+                logger.info(f"대기열이 가득 차 캐시 채우기를 미룹니다: '{keyword}'")
+                return
+            except Exception as e:
+                logger.warning(f"캐시 이미지 생성 실패: '{keyword}' #{index}: {e}")
+                return
+
+    async def wait_until_ready(self, timeout: float = 600.0) -> bool:
+        """
+        모델이 준비될 때까지 대기 (재시작 직후 다시 접수된 작업 / 캐시 예열용)
+
+        Args:
+            timeout: 최대 대기 시간 (초)
+
+        Returns:
+            준비 완료 여부 (로딩에 실패했으면 바로 False)
+        """
+        deadline = time.time() + timeout
+        while not self.is_ready():
+            if time.time() > deadline or self.get_status()["state"] == "failed":
+                return False
+            await asyncio.sleep(1.0)
+        return True
+
+    async def warm_cache(self, keywords: List[str], ready_timeout: float = 600.0) -> Dict[str, int]:
+        """
+        자주 요청되는 곤충 키워드의 변형 이미지를 미리 생성
+
+        Args:
+            keywords: 예열할 키워드 목록
+            ready_timeout: 모델 준비를 기다리는 최대 시간 (초)
+
+        Returns:
+            키워드별 캐시된 변형 수
+        """
+        # 워커 프로세스 모드에서는 모델 로딩이 끝날 때까지 대기
+        if not await self.wait_until_ready(ready_timeout):
+            logger.warning("모델이 준비되지 않아 캐시 예열을 건너뜁니다.")
+            return {}
+
+        logger.info(f"생성 이미지 캐시 예열 시작: {len(keywords)}개 키워드")
+        start_time = time.time()
+        await asyncio.gather(*(self._fill_variants(keyword) for keyword in keywords))
+        logger.info(f"생성 이미지 캐시 예열 완료: {time.time() - start_time:.2f}초")
+
+        options = self._resolve_options()
+        return {keyword: len(self.image_cache.cached_variants(keyword, options)) for keyword in keywords}
+
+    def start_cache_warmup(self, keywords: List[str]):
+        """
+        서버 시작 시 캐시 예열을 백그라운드 작업으로 실행
+        """
+        if not self.image_cache.enabled:
+            return
+        self._warmup_task = asyncio.create_task(self.warm_cache(keywords))
+
+    def _save_image(self, image: Image.Image, keyword: str, filename: Optional[str] = None) -> str:
+        """
+        생성된 이미지를 PNG로 인코딩하여 파일로 저장
+
+        Args:
+            image: 생성된 이미지
+            keyword: 캐릭터 키워드 (파일명에 사용)
+            filename: 저장할 파일명 (캐시 변형 이미지인 경우)
+
+        Returns:
+            저장된 파일명
+        """
+        # 이미지를 메모리 버퍼에 저장
+        buf = io.BytesIO()
+        image.save(buf, format="PNG", optimize=True)  # PNG 최적화 옵션 추가
+        buf.seek(0)
+
+        # 같은 초에 같은 키워드가 배치로 생성될 수 있으므로 고유 접미사 추가
+        if filename is None:
+            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+            filename = f"{timestamp}_{keyword}_{uuid.uuid4().hex[:6]}.png"
+
+        # 생성된 이미지 파일에 저장
+        output_dir = "out_put_image"
+        os.makedirs(output_dir, exist_ok=True)
+        file_path = os.path.join(output_dir, filename)
+
+        # 임시 파일에 쓴 뒤 교체하여 캐시 조회 시 쓰다 만 파일이 보이지 않도록 함
+        temp_path = f"{file_path}.{uuid.uuid4().hex[:6]}.tmp"
+        with open(temp_path, "wb") as f:
+            f.write(buf.getbuffer())
+        os.replace(temp_path, file_path)
+
+        return filename
+
+    def close(self):
+        """
+        추론 스레드 / 워커 프로세스 정리 (서버 종료 시 호출)
+        """
+        if self.executor is not None:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+        if self.worker_pool is not None:
+            self.worker_pool.close()
+
+    def get_model_info(self) -> Dict:
+        """
+        모델 정보 반환
+        """
+        info = {
+            "model_name": settings.GENERATION_MODEL_ID,
+            "model_source": self.model_source,
+            "loaded": self.is_ready(),
+            "status": self.get_status(),
+            "device": "cuda" if torch.cuda.is_available() else "cpu",
+            "inference_executor": "process" if self.worker_pool is not None else "thread",
+            "queue_depth": self.batcher.queue_depth(),
+            "queue_wait_seconds": round(self.batcher.average_wait(), 3),
+            "batching": self.batcher.get_stats(),
+            "image_cache": {**self.image_cache.get_stats(), "filling": len(self._fill_tasks)},
+            "profiles": GENERATION_PROFILES,
+            "default_profile": settings.GENERATION_DEFAULT_PROFILE,
+            "adaptive_profile": self.profile_controller.get_stats()
+        }
+        if self.worker_pool is not None:
+            info["device"] = "cpu"
+            info["worker_pool"] = self.worker_pool.get_stats()
+        elif self.engine is not None:
+            info["device"] = self.engine.device
+            info["engine"] = self.engine.get_info()
+        return info
@@ -0,0 +1,249 @@
+"""
+곤충 분류 결과 캐시
+업로드 이미지 바이트의 다이제스트를 키로 분류 결과를 재사용
+
+주요 기능:
+1. 메모리 LRU 캐시 (빠른 조회)
+2. 디스크 캐시 (서버 재시작 후에도 유지, 최대 항목 수를 넘으면 오래 안 쓴 파일부터 삭제)
+3. 적중/미스/제거 통계 제공
+
+같은 사진을 다시 올리면 Gemini API를 호출하지 않고 저장된 결과를 반환합니다.
+"""
+
+import os
+import json
+import uuid
+import asyncio
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+
+class ClassificationCache:
+    """
+    2단계(메모리 LRU + 디스크) 분류 결과 캐시
+    """
+
+    # 디스크 한도를 넘으면 한도의 이 비율까지 한 번에 줄임 (매 저장마다 디렉토리를 훑지 않도록)
+    DISK_EVICT_TARGET = 0.9
+
+    def __init__(self, cache_dir: str, max_memory_entries: int = 512, enabled: bool = True,
+                 max_disk_entries: int = 20000):
+        """
+        캐시 초기화
+
+        Args:
+            cache_dir: 디스크 캐시 저장 디렉토리
+            max_memory_entries: 메모리 LRU 최대 항목 수
+            enabled: 캐시 사용 여부
+            max_disk_entries: 디스크 캐시 최대 파일 수 (0이면 제한 없음)
+        """
+        self.cache_dir = cache_dir
+        self.max_memory_entries = max_memory_entries
+        self.max_disk_entries = max_disk_entries
+        self.enabled = enabled
+        self._memory: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._disk_lock = threading.Lock()
+        self._disk_entries: Optional[int] = None  # 첫 저장 때 디렉토리를 훑어 초기화
+        self._stats = {
+            "memory_hits": 0,
+            "disk_hits": 0,
+            "misses": 0,
+            "evictions": 0,
+            "disk_evictions": 0,
+            "writes": 0,
+            "disk_errors": 0,
+        }
+
+        if self.enabled:
+            os.makedirs(self.cache_dir, exist_ok=True)
+
+    @staticmethod
+    def make_key(image_bytes: bytes, namespace: str = "kids") -> str:
+        """
+        이미지 바이트로 캐시 키 생성
+
+        Args:
+            image_bytes: 업로드된 이미지 바이트
+            namespace: 프롬프트/응답 형식 구분자 (형식이 바뀌면 다른 키가 됨)
+
+        Returns:
+            str: sha256 기반 캐시 키
+        """
+        digest = hashlib.sha256(image_bytes).hexdigest()
+        return f"{namespace}-{digest}"
+
+    def _disk_path(self, key: str) -> str:
+        """키에 해당하는 디스크 파일 경로 (다이제스트 앞 2자리로 디렉토리 분산)"""
+        digest = key.rsplit("-", 1)[-1]
+        return os.path.join(self.cache_dir, digest[:2], f"{key}.json")
+
+    def _remember(self, key: str, value: Dict[str, Any]):
+        """메모리 LRU에 저장하고 용량 초과 시 가장 오래된 항목 제거"""
+        with self._lock:
+            self._memory[key] = value
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.max_memory_entries:
+                self._memory.popitem(last=False)
+                self._stats["evictions"] += 1
+
+    def _load_from_disk(self, key: str) -> Optional[Dict[str, Any]]:
+        """디스크 캐시에서 항목 로드"""
+        path = self._disk_path(key)
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                value = json.load(f)
+            # 수정 시각을 갱신하여 디스크 정리 시 최근 사용한 항목이 남도록 함
+            os.utime(path)
+            return value
+        except Exception as e:
+            self._stats["disk_errors"] += 1
+            print(f"분류 캐시 읽기 오류: {e}")
+            return None
+
+    def _save_to_disk(self, key: str, value: Dict[str, Any]):
+        """디스크 캐시에 항목 저장 (임시 파일 작성 후 교체)"""
+        path = self._disk_path(key)
+        # 같은 키를 여러 스레드 / 워커가 동시에 쓸 수 있으므로 임시 파일 이름을 고유하게 함
+        tmp_path = f"{path}.{uuid.uuid4().hex[:6]}.tmp"
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            existed = os.path.exists(path)
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(value, f, ensure_ascii=False)
+            os.replace(tmp_path, path)
+        except Exception as e:
+            self._stats["disk_errors"] += 1
+            print(f"분류 캐시 저장 오류: {e}")
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            return
+
+        if not existed:
+            self._count_disk_entry()
+
+    def _list_disk_files(self):
+        """디스크 캐시 파일 목록 (임시 파일 제외)"""
+        files = []
+        for root, _, names in os.walk(self.cache_dir):
+            files.extend(os.path.join(root, name) for name in names if name.endswith(".json"))
+        return files
+
+    def _count_disk_entry(self):
+        """디스크 항목 수를 갱신하고 한도를 넘으면 오래 안 쓴 파일부터 삭제"""
+        if self.max_disk_entries <= 0:
+            return
+
+        with self._disk_lock:
+            if self._disk_entries is None:
+                self._disk_entries = len(self._list_disk_files())
+            else:
+                self._disk_entries += 1
+            if self._disk_entries <= self.max_disk_entries:
+                return
+
+            files = []
+            for path in self._list_disk_files():
+                try:
+                    files.append((os.path.getmtime(path), path))
+                except OSError:
+                    continue
+            files.sort()
+
+            target = int(self.max_disk_entries * self.DISK_EVICT_TARGET)
+            removed = 0
+            for _, path in files[:max(len(files) - target, 0)]:
+                try:
+                    os.remove(path)
+                    removed += 1
+                except OSError:
+                    continue
+            self._disk_entries = len(files) - removed
+            self._stats["disk_evictions"] += removed
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """
+        캐시 조회 (메모리 → 디스크 순)
+
+        Args:
+            key: 캐시 키
+
+        Returns:
+            Optional[Dict]: 저장된 분류 결과 또는 None
+        """
+        if not self.enabled:
+            return None
+
+        with self._lock:
+            value = self._memory.get(key)
+            if value is not None:
+                self._memory.move_to_end(key)
+                self._stats["memory_hits"] += 1
+                return value
+
+        value = self._load_from_disk(key)
+        if value is not None:
+            self._stats["disk_hits"] += 1
+            self._remember(key, value)
+            return value
+
+        self._stats["misses"] += 1
+        return None
+
+    def put(self, key: str, value: Dict[str, Any]):
+        """
+        캐시 저장 (메모리 + 디스크)
+
+        Args:
+            key: 캐시 키
+            value: 저장할 분류 결과 (JSON 직렬화 가능해야 함)
+        """
+        if not self.enabled:
+            return
+        self._remember(key, value)
+        self._save_to_disk(key, value)
+        self._stats["writes"] += 1
+
+    async def aget(self, key: str) -> Optional[Dict[str, Any]]:
+        """
+        비동기 캐시 조회
+        메모리 적중은 바로 반환하고, 디스크 조회만 스레드에서 수행
+        """
+        if not self.enabled:
+            return None
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                self._stats["memory_hits"] += 1
+                return self._memory[key]
+        return await asyncio.to_thread(self.get, key)
+
+    async def aput(self, key: str, value: Dict[str, Any]):
+        """
+        비동기 캐시 저장 (디스크 쓰기를 스레드에서 수행)
+        """
+        if not self.enabled:
+            return
+        await asyncio.to_thread(self.put, key, value)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        캐시 통계 반환
+        """
+        hits = self._stats["memory_hits"] + self._stats["disk_hits"]
+        total = hits + self._stats["misses"]
+        return {
+            "enabled": self.enabled,
+            "hits": hits,
+            **self._stats,
+            "hit_rate": round(hits / total, 3) if total else 0.0,
+            "memory_entries": len(self._memory),
+            "max_memory_entries": self.max_memory_entries,
+            "disk_entries": self._disk_entries,
+            "max_disk_entries": self.max_disk_entries,
+            "cache_dir": self.cache_dir,
+        }
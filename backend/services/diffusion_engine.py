@@ -0,0 +1,728 @@
+"""
+SDXL-turbo 추론 엔진
+파이프라인 로딩, warmup, 배치 추론을 담당하는 동기 클래스
+
+주요 기능:
+1. 파이프라인 로딩 (GPU: fp16 / CPU: CPU 기능에 따라 bf16 또는 fp32, 워커: fp32 + mmap 가중치)
+2. CPU 최적화 (channels_last, 연산 스레드 수, 선택적 torch.compile / int8 동적 양자화)
+3. 첫 추론 지연을 줄이는 warmup
+4. 프롬프트 임베딩 캐시 (반복 키워드는 텍스트 인코더 생략)
+5. 프롬프트 목록을 한 번의 파이프라인 호출로 생성 (스텝별 지연 기록)
+6. 디코더 선택: 전체 SDXL VAE ("full") 또는 TAESD 소형 디코더 ("fast")
+7. 스텝별 저해상도 미리보기 (잠재 텐서 → RGB 선형 근사, 디코더 없이 계산)
+8. 취소 확인: 요청자가 모두 떠나면 다음 스텝 경계에서 디노이즈 중단, 디코딩 생략
+
+API 프로세스의 추론 스레드와 생성 워커 프로세스가 같은 코드를 사용합니다.
+"""
+
+import os
+import time
+import hashlib
+import logging
+import importlib
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import torch
+from PIL import Image
+from diffusers import AutoPipelineForText2Image, AutoencoderTiny, DiffusionPipeline
+
+from services.prompt_embedding_cache import PromptEmbeddingCache, PromptEmbeddings
+from services.model_snapshot import snapshot_revision
+
+logger = logging.getLogger(__name__)
+
+# mmap으로 다시 연결할 파이프라인 구성 요소 (가중치 대부분을 차지)
+MMAP_COMPONENTS = ("unet", "vae", "text_encoder", "text_encoder_2")
+
+# 생성 파라미터 (결과 이미지 캐시 키에도 사용되므로 바꾸면 캐시가 새로 만들어짐)
+GENERATION_PARAMS = {
+    "num_inference_steps": 3,  # 빠른 생성을 위해 3스텝 사용
+    "guidance_scale": 1.5,     # 가이던스 스케일 1.5으로 설정하여 빠른 생성
+    "width": 640,              # 카드 비율에 맞게 가로를 더 넓게 (16:10 비율)
+    "height": 400              # 카드 이미지 섹션에 맞는 높이
+}
+
+# int8 동적 양자화 대상 구성 요소 (Linear 계층 비중이 큰 UNet과 텍스트 인코더)
+QUANTIZE_COMPONENTS = ("unet", "text_encoder", "text_encoder_2")
+
+# 디코더 모드 (full: SDXL VAE, fast: TAESD 소형 오토인코더)
+DECODER_MODES = ("full", "fast")
+
+# bf16 행렬 연산을 하드웨어로 지원하는 CPU 기능 플래그 (/proc/cpuinfo)
+CPU_BF16_FLAGS = ("avx512_bf16", "amx_bf16")
+
+# SDXL 잠재 4채널 → RGB 선형 근사 계수와 편향 (미리보기 전용, 디코더 없이 잠재 해상도 그대로 계산)
+SDXL_LATENT_RGB_FACTORS = [
+    [0.3651, 0.4232, 0.4341],
+    [-0.2533, -0.0042, 0.1068],
+    [0.1076, 0.1111, -0.0362],
+    [-0.3165, -0.2492, -0.2188],
+]
+SDXL_LATENT_RGB_BIAS = [0.1084, -0.0175, -0.0011]
+
+# 스텝 진행 콜백: (완료 스텝 수, 전체 스텝 수, 요청별 미리보기 이미지 또는 None)
+StepCallback = Callable[[int, int, Optional[List[Image.Image]]], None]
+
+# CPU 워커가 내려받을 파일 (fp32 safetensors와 설정 파일만)
+SNAPSHOT_IGNORE_PATTERNS = ["*fp16*", "sd_xl_turbo*", "*.bin", "*.ckpt", "*.onnx", "*.onnx_data", "*.msgpack"]
+
+
+def select_cpu_dtype() -> str:
+    """
+    CPU 기능에 맞는 가중치 자료형 선택
+
+    bf16 명령어(AVX512-BF16 / AMX)가 있으면 bfloat16, 없으면 float32를 사용합니다.
+    fp16은 대부분의 CPU에서 지원되지 않거나 매우 느립니다.
+
+    Returns:
+        "bfloat16" 또는 "float32"
+    """
+    try:
+        with open("/proc/cpuinfo", "r") as f:
+            flags = f.read()
+    except OSError:
+        return "float32"
+    return "bfloat16" if any(flag in flags for flag in CPU_BF16_FLAGS) else "float32"
+
+
+class GenerationCancelled(Exception):
+    """요청자가 모두 떠나 생성을 중단했을 때 발생하는 예외"""
+
+
+def latents_to_preview(latents: torch.Tensor) -> List[Image.Image]:
+    """
+    잠재 텐서를 저해상도 미리보기 이미지로 변환 (VAE 없이 선형 근사)
+
+    잠재 해상도(이미지의 1/8, 640×400이면 80×50) 그대로이며 색감과 구도만 확인하는 용도입니다.
+
+    Args:
+        latents: (배치, 4, H/8, W/8) 잠재 텐서
+
+    Returns:
+        배치 순서대로 미리보기 이미지 목록
+    """
+    factors = torch.tensor(SDXL_LATENT_RGB_FACTORS, dtype=torch.float32, device=latents.device)
+    bias = torch.tensor(SDXL_LATENT_RGB_BIAS, dtype=torch.float32, device=latents.device)
+    rgb = torch.einsum("bchw,cr->bhwr", latents.float(), factors) + bias
+    pixels = ((rgb + 1.0) / 2.0).clamp(0, 1).mul(255).to(torch.uint8).cpu().numpy()
+    return [Image.fromarray(array) for array in pixels]
+
+
+class StepTimer:
+    """
+    파이프라인 스텝 종료 콜백으로 스텝별 지연 시간을 기록하고 진행률(+ 미리보기)을 알림
+    """
+
+    def __init__(self, total_steps: int = 0, on_step: Optional[StepCallback] = None, previews: bool = False,
+                 should_stop: Optional[Callable[[], bool]] = None):
+        """
+        Args:
+            total_steps: 전체 디노이즈 스텝 수
+            on_step: 스텝 완료 시 (완료 스텝 수, 전체 스텝 수, 미리보기 목록)으로 호출할 함수
+            previews: 스텝마다 잠재 텐서 미리보기를 만들지 여부
+            should_stop: True를 반환하면 남은 스텝을 건너뛰도록 파이프라인에 중단 요청
+        """
+        self.latencies: List[float] = []
+        self.total_steps = total_steps
+        self.on_step = on_step
+        self.previews = previews
+        self.should_stop = should_stop
+        self.interrupted = False
+        self._last = time.perf_counter()
+
+    def __call__(self, pipe, step: int, timestep, callback_kwargs: Dict[str, Any]) -> Dict[str, Any]:
+        now = time.perf_counter()
+        self.latencies.append(now - self._last)
+        if self.on_step is not None:
+            try:
+                previews = None
+                if self.previews and "latents" in callback_kwargs:
+                    previews = latents_to_preview(callback_kwargs["latents"])
+                self.on_step(step + 1, self.total_steps, previews)
+            except Exception as e:
+                logger.debug(f"진행률 콜백 오류: {e}")
+        if self.should_stop is not None and not self.interrupted and self.should_stop():
+            # diffusers 파이프라인은 interrupt가 켜지면 남은 스텝의 UNet 호출을 건너뜀
+            pipe._interrupt = True
+            self.interrupted = True
+        # 미리보기 변환 시간은 다음 스텝 지연에 포함하지 않음
+        self._last = time.perf_counter()
+        return callback_kwargs
+
+
+class DiffusionEngine:
+    """
+    텍스트 → 이미지 파이프라인을 감싸는 동기 추론 엔진
+    """
+
+    def __init__(
+        self,
+        model_id: str = "stabilityai/sdxl-turbo",
+        device: Optional[str] = None,
+        torch_dtype: str = "auto",
+        variant: Optional[str] = "auto",
+        mmap_weights: bool = False,
+        num_threads: int = 0,
+        torch_compile: bool = False,
+        quantize: bool = False,
+        quantized_cache_dir: Optional[str] = None,
+        fast_decoder_model: Optional[str] = None,
+        embed_cache_size: int = 64,
+        embed_cache_dir: Optional[str] = None
+    ):
+        """
+        엔진 설정 (실제 로딩은 load()에서 수행)
+
+        Args:
+            model_id: Hugging Face 모델 ID 또는 로컬 경로
+            device: 실행 장치 ("cuda", "cpu", None이면 CUDA 사용 가능 여부로 결정)
+            torch_dtype: 가중치 자료형 이름 ("auto", "float16", "bfloat16", "float32")
+            variant: 가중치 변형 이름 ("auto"면 fp16 자료형일 때 fp16, None이면 기본 가중치)
+            mmap_weights: safetensors 가중치를 mmap 페이지에 직접 연결할지 여부 (fp32 고정)
+            num_threads: CPU 연산 스레드 수 (0이면 torch 기본값)
+            torch_compile: UNet을 torch.compile로 컴파일할지 여부
+            quantize: CPU에서 UNet / 텍스트 인코더 Linear 계층을 int8 동적 양자화할지 여부
+            quantized_cache_dir: 양자화된 구성 요소 저장 폴더 (None이면 매번 양자화)
+            fast_decoder_model: "fast" 디코더로 쓸 TAESD 모델 ID (None이면 full 디코더만 사용)
+            embed_cache_size: 프롬프트 임베딩 캐시 크기 (0이면 사용 안 함)
+            embed_cache_dir: 프롬프트 임베딩 저장 폴더 (None이면 메모리만 사용)
+        """
+        self.model_id = model_id
+        self.device = device or ("cuda" if torch.cuda.is_available() else "cpu")
+        self.mmap_weights = mmap_weights
+        self.num_threads = num_threads
+        self.torch_compile = torch_compile
+        self.quantize = quantize and self.device == "cpu"
+        self.quantized_cache_dir = quantized_cache_dir or None
+        self.torch_dtype = self._resolve_dtype(torch_dtype)
+        self.variant = ("fp16" if self.torch_dtype == "float16" else None) if variant == "auto" else variant
+        self.fast_decoder_model = fast_decoder_model
+        self.fast_decoder = None
+        self.pipe = None
+        self._prequantized: set = set()  # 양자화 캐시에서 바로 만든 구성 요소
+        self.model_revision = ""  # 로컬 스냅샷 리비전 (로딩 시 확인, 허브 ID면 빈 문자열)
+        self.load_time = 0.0
+        self.last_step_latencies: List[float] = []
+        # 양자화된 텍스트 인코더의 임베딩은 fp 결과와 조금 다르므로 구분자에 양자화 여부 포함
+        self.embed_cache = PromptEmbeddingCache(embed_cache_size, embed_cache_dir, self._embed_namespace())
+
+        if quantize and not self.quantize:
+            logger.warning("int8 동적 양자화는 CPU 백엔드에서만 지원됩니다. 양자화 없이 실행합니다.")
+
+    def _resolve_dtype(self, torch_dtype: str) -> str:
+        """
+        실행 장치에 맞는 가중치 자료형 결정
+        """
+        if self.mmap_weights or self.quantize:
+            # 동적 양자화는 fp32 Linear 가중치를 입력으로 받음
+            # 자료형 변환은 가중치 사본을 만들어 mmap 페이지 공유가 깨지므로 fp32 고정
+            return "float32"
+        if torch_dtype != "auto":
+            return torch_dtype
+        if self.device == "cuda":
+            return "float16"  # fp16으로 메모리 사용량 절반으로 줄임
+        return select_cpu_dtype()
+
+    def _embed_namespace(self) -> str:
+        """프롬프트 임베딩 캐시 구분자 (모델 / 리비전 / 자료형 / 양자화 여부)"""
+        return f"{self.model_id}|{self.model_revision}|{self.torch_dtype}|{'int8' if self.quantize else 'fp'}"
+
+    @property
+    def loaded(self) -> bool:
+        """파이프라인 로드 여부"""
+        return self.pipe is not None
+
+    def load(self):
+        """
+        파이프라인 로딩
+
+        Raises:
+            Exception: 로딩 실패 시 (호출자가 처리)
+        """
+        model_load_start_time = time.time()
+
+        model_source = self._resolve_model_dir() if self.mmap_weights else self.model_id
+        local_snapshot = os.path.isdir(model_source)
+        self.model_revision = snapshot_revision(model_source) if local_snapshot else ""
+        self.embed_cache.set_namespace(self._embed_namespace())
+        logger.info(f"모델 로딩 시작: {model_source} ({'로컬 스냅샷' if local_snapshot else '허브'})")
+        options = {
+            "torch_dtype": getattr(torch, self.torch_dtype),
+            "use_safetensors": True,  # 안전한 텐서 형식 사용
+            "low_cpu_mem_usage": True  # CPU 메모리 사용량 최적화
+        }
+        if local_snapshot:
+            # 고정 스냅샷에서는 허브 조회 없이 로컬 파일만 사용
+            options["local_files_only"] = True
+        if self.variant:
+            if local_snapshot and not self._has_variant(model_source, self.variant):
+                logger.warning(f"스냅샷에 {self.variant} 가중치가 없어 기본 가중치를 {self.torch_dtype}로 변환하여 사용합니다.")
+                self.variant = None
+            else:
+                options["variant"] = self.variant
+
+        # 양자화 캐시가 있는 구성 요소는 fp32 가중치를 읽지 않고 int8 모듈로 바로 넘김
+        prequantized = self._load_quantized_components(model_source, local_snapshot) if self.quantize else {}
+        self._prequantized = set(prequantized)
+        self.pipe = AutoPipelineForText2Image.from_pretrained(model_source, **options, **prequantized)
+
+        if self.mmap_weights:
+            self._attach_mmap_weights(model_source)
+
+        if self.fast_decoder_model:
+            self._load_fast_decoder(options["torch_dtype"])
+
+        # GPU가 사용 가능한 경우에만 CUDA로 이동
+        if self.device == "cuda":
+            self.pipe.to("cuda")
+            if self.fast_decoder is not None:
+                self.fast_decoder.to("cuda")
+            # GPU 메모리 최적화 설정
+            torch.backends.cudnn.benchmark = True  # cuDNN 최적화
+            torch.backends.cuda.matmul.allow_tf32 = True  # TF32 사용으로 성능 향상
+            logger.info(f"GPU 메모리 사용량: {torch.cuda.memory_allocated() / 1024**3:.2f} GB")
+        else:
+            logger.warning("CUDA를 사용하지 않습니다. CPU 모드로 실행됩니다.")
+            self._optimize_for_cpu()
+
+        self.load_time = time.time() - model_load_start_time
+        logger.info(f"모델 로딩 완료! 소요시간: {self.load_time:.2f}초")
+
+    def _optimize_for_cpu(self):
+        """
+        CPU 추론 최적화 (스레드 수, channels_last 메모리 형식, 선택적 torch.compile)
+        """
+        if self.num_threads > 0:
+            torch.set_num_threads(self.num_threads)
+
+        if self.quantize:
+            self._apply_quantization()
+
+        # 합성곱 위주의 UNet / VAE는 channels_last에서 oneDNN 커널이 더 빠름
+        # 단, 변환하면 합성곱 가중치가 새 메모리로 복사되므로 mmap 가중치(워커 간 페이지 공유)에는 적용하지 않음
+        if not self.mmap_weights:
+            self.pipe.unet.to(memory_format=torch.channels_last)
+            self.pipe.vae.to(memory_format=torch.channels_last)
+        if self.fast_decoder is not None:
+            self.fast_decoder.to(memory_format=torch.channels_last)
+
+        if self.torch_compile:
+            try:
+                self.pipe.unet = torch.compile(self.pipe.unet)
+                logger.info("UNet torch.compile 적용 (첫 추론 시 컴파일)")
+            except Exception as e:
+                logger.warning(f"torch.compile 적용 실패 (기본 모드로 실행): {e}")
+
+        logger.info(
+            f"CPU 백엔드: dtype={self.torch_dtype}{'+int8' if self.quantize else ''}, "
+            f"threads={torch.get_num_threads()}, {'mmap' if self.mmap_weights else 'channels_last'}"
+        )
+
+    def _quantized_path(self, name: str) -> Optional[str]:
+        """
+        양자화된 구성 요소 저장 경로 (모델 / 스냅샷 리비전 / torch 버전이 바뀌면 다른 파일)
+        """
+        if not self.quantized_cache_dir:
+            return None
+        fingerprint = hashlib.sha256(
+            f"{self.model_id}|{self.model_revision}|{torch.__version__}|{name}|state_dict".encode("utf-8")
+        ).hexdigest()[:12]
+        return os.path.join(self.quantized_cache_dir, f"{name}_int8_{fingerprint}.pt")
+
+    def _load_quantized_components(self, model_source: str, local_snapshot: bool) -> Dict[str, torch.nn.Module]:
+        """
+        양자화 캐시(state_dict)로 int8 구성 요소 복원
+
+        설정 파일로 빈(meta) 골격을 만들고 Linear 계층을 동적 양자화 Linear로 바꾼 뒤
+        저장된 state_dict를 assign=True로 연결하므로 fp32 가중치를 읽지 않습니다.
+        캐시 파일은 weights_only=True로 읽어 텐서 외의 객체는 복원하지 않습니다.
+
+        Returns:
+            구성 요소 이름 → 양자화된 모듈 (캐시가 없거나 복원에 실패한 구성 요소는 제외)
+        """
+        if not self.quantized_cache_dir:
+            return {}
+
+        components = {}
+        model_index = None
+        for name in QUANTIZE_COMPONENTS:
+            path = self._quantized_path(name)
+            if not os.path.exists(path):
+                continue
+
+            start_time = time.time()
+            try:
+                if model_index is None:
+                    model_index = DiffusionPipeline.load_config(model_source, local_files_only=local_snapshot)
+                state_dict = torch.load(path, map_location="cpu", weights_only=True)
+                module = self._build_empty_component(model_source, name, model_index[name], local_snapshot)
+                self._swap_dynamic_linear(module)
+                module.load_state_dict(state_dict, strict=True, assign=True)
+                module.eval()
+            except Exception as e:
+                logger.warning(f"양자화 캐시 복원 실패 ({name}, fp32 로딩 후 다시 양자화): {e}")
+                continue
+
+            components[name] = module
+            logger.info(f"int8 동적 양자화 적용: {name} (디스크 캐시, {time.time() - start_time:.2f}초)")
+        return components
+
+    @staticmethod
+    def _build_empty_component(model_source: str, name: str, spec: List[str], local_snapshot: bool) -> torch.nn.Module:
+        """model_index.json의 (라이브러리, 클래스) 정보로 가중치 없는(meta) 구성 요소 골격 생성"""
+        from accelerate import init_empty_weights
+
+        library, class_name = spec
+        cls = getattr(importlib.import_module(library), class_name)
+        with init_empty_weights():
+            if library == "transformers":
+                config = cls.config_class.from_pretrained(
+                    model_source, subfolder=name, local_files_only=local_snapshot
+                )
+                return cls(config)
+            config = cls.load_config(model_source, subfolder=name, local_files_only=local_snapshot)
+            return cls.from_config(config)
+
+    @staticmethod
+    def _swap_dynamic_linear(module: torch.nn.Module):
+        """quantize_dynamic과 같은 기준(정확히 nn.Linear 타입)으로 Linear를 동적 양자화 Linear로 교체"""
+        for parent in list(module.modules()):
+            for child_name, child in list(parent.named_children()):
+                if type(child) is torch.nn.Linear:
+                    setattr(parent, child_name, torch.ao.nn.quantized.dynamic.Linear(
+                        child.in_features, child.out_features, bias_=child.bias is not None, dtype=torch.qint8
+                    ))
+
+    def _apply_quantization(self):
+        """
+        UNet / 텍스트 인코더의 Linear 계층을 int8 동적 양자화하고 state_dict를 디스크 캐시에 저장
+        (캐시에서 이미 복원한 구성 요소는 건너뜀)
+        """
+        for name in QUANTIZE_COMPONENTS:
+            module = getattr(self.pipe, name, None)
+            if module is None or name in self._prequantized:
+                continue
+
+            start_time = time.time()
+            quantized = torch.ao.quantization.quantize_dynamic(
+                module, {torch.nn.Linear}, dtype=torch.qint8, inplace=True
+            )
+            path = self._quantized_path(name)
+            if path:
+                self._save_quantized(quantized, path)
+
+            setattr(self.pipe, name, quantized)
+            logger.info(f"int8 동적 양자화 적용: {name} (새로 양자화, {time.time() - start_time:.2f}초)")
+
+    @staticmethod
+    def _save_quantized(module: torch.nn.Module, path: str):
+        """양자화된 모듈의 state_dict를 임시 파일에 쓴 뒤 교체하여 저장"""
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temp_path = f"{path}.{os.getpid()}.tmp"
+        try:
+            torch.save(module.state_dict(), temp_path)
+            os.replace(temp_path, path)
+        except Exception as e:
+            logger.warning(f"양자화 캐시 저장 실패: {e}")
+
+    def _load_fast_decoder(self, torch_dtype):
+        """
+        TAESD 소형 디코더 로딩 (실패해도 full 디코더로 서비스 계속)
+        """
+        try:
+            start_time = time.time()
+            self.fast_decoder = AutoencoderTiny.from_pretrained(self.fast_decoder_model, torch_dtype=torch_dtype)
+            logger.info(f"fast 디코더 로딩 완료: {self.fast_decoder_model} ({time.time() - start_time:.2f}초)")
+        except Exception as e:
+            self.fast_decoder = None
+            logger.warning(f"fast 디코더 로딩 실패 (full 디코더만 사용): {e}")
+
+    def _resolve_model_dir(self) -> str:
+        """
+        mmap 대상 safetensors 파일이 있는 로컬 디렉토리 경로 반환
+        (허브 ID인 경우 캐시 스냅샷 경로)
+        """
+        if os.path.isdir(self.model_id):
+            return self.model_id
+
+        from huggingface_hub import snapshot_download
+        return snapshot_download(self.model_id, ignore_patterns=SNAPSHOT_IGNORE_PATTERNS)
+
+    def _attach_mmap_weights(self, model_dir: str):
+        """
+        구성 요소 가중치를 safetensors 파일의 mmap 텐서로 교체
+
+        safetensors는 CPU 텐서를 파일 기반 mmap(copy-on-write)으로 열기 때문에
+        assign=True로 연결하면 여러 워커 프로세스가 같은 페이지 캐시를 공유합니다.
+        추론은 가중치를 쓰지 않으므로 프로세스별 사본이 생기지 않습니다.
+        """
+        from safetensors.torch import load_file
+
+        for name in MMAP_COMPONENTS:
+            module = getattr(self.pipe, name, None)
+            if module is None or name in self._prequantized:
+                # 양자화 캐시에서 만든 구성 요소는 fp32 파일과 키가 다름
+                continue
+
+            weight_path = self._find_weight_file(os.path.join(model_dir, name))
+            if weight_path is None:
+                logger.warning(f"mmap 가중치 파일을 찾을 수 없습니다: {name}")
+                continue
+
+            state_dict = load_file(weight_path, device="cpu")
+            module.load_state_dict(state_dict, strict=False, assign=True)
+            logger.info(f"mmap 가중치 연결: {name} ({os.path.basename(weight_path)})")
+
+    @staticmethod
+    def _has_variant(model_dir: str, variant: str) -> bool:
+        """스냅샷에 해당 variant(fp16 등)의 UNet 가중치가 있는지 여부"""
+        unet_dir = os.path.join(model_dir, "unet")
+        return os.path.isdir(unet_dir) and any(
+            f".{variant}." in filename for filename in os.listdir(unet_dir)
+        )
+
+    @staticmethod
+    def _find_weight_file(component_dir: str) -> Optional[str]:
+        """구성 요소 디렉토리에서 기본(fp32) safetensors 파일 경로 찾기"""
+        for filename in ("diffusion_pytorch_model.safetensors", "model.safetensors"):
+            path = os.path.join(component_dir, filename)
+            if os.path.exists(path):
+                return path
+        return None
+
+    def warmup(self):
+        """
+        모델 warmup을 통한 첫 번째 이미지 생성 속도 최적화
+
+        목적:
+        1. CUDA 커널 초기화: GPU에서 처음 연산 시 발생하는 지연을 미리 처리
+        2. 메모리 할당: 필요한 GPU 메모리를 미리 할당하고 캐싱
+        3. 가중치 최적화: 모델 가중치의 GPU 최적화를 사전에 완료
+        4. cuDNN 알고리즘 선택: 최적의 convolution 알고리즘을 미리 결정
+
+        이 과정을 통해 실제 사용자 요청 시 대기시간을 크게 단축할 수 있습니다.
+        """
+        logger.info("🔥 모델 warmup 시작 - 첫 번째 이미지 생성 속도 최적화를 위한 준비 작업")
+        warmup_start_time = time.time()
+
+        try:
+            # warmup용 간단한 더미 프롬프트 생성
+            # 실제 사용될 프롬프트와 유사한 구조로 구성하여 동일한 연산 경로를 거치도록 함
+            warmup_prompt = "cute butterfly, soft pastels, simple details, plain background"
+
+            logger.info(f"더미 프롬프트로 warmup 실행: '{warmup_prompt}'")
+
+            # GPU 메모리 사용량 모니터링 (warmup 전)
+            if self.device == "cuda":
+                memory_before_warmup = torch.cuda.memory_allocated()
+                logger.info(f"Warmup 전 GPU 메모리: {memory_before_warmup / 1024**3:.2f} GB")
+
+            # 실제 추론과 동일한 조건으로 더미 이미지 생성
+            # torch.no_grad()로 그래디언트 계산을 비활성화하여 메모리 절약
+            with torch.no_grad():
+                # 첫 번째 추론에서 발생하는 모든 초기화 작업을 여기서 처리
+                warmup_image = self.pipe(
+                    prompt=warmup_prompt,       # 더미 프롬프트
+                    num_inference_steps=2,      # 빠른 생성을 위해 1스텝 (실제 사용과 동일)
+                    guidance_scale=1.5,         # 가이던스 스케일 0 (실제 사용과 동일)
+                    width=640,                  # 실제 사용과 동일한 해상도
+                    height=400                  # 실제 사용과 동일한 해상도
+                ).images[0]
+
+            # warmup에서 생성된 이미지는 메모리에서 즉시 삭제
+            # 파일로 저장하지 않고 메모리만 사용하여 디스크 I/O 최소화
+            del warmup_image
+
+            # GPU 메모리 사용량 모니터링 (warmup 후)
+            if self.device == "cuda":
+                memory_after_warmup = torch.cuda.memory_allocated()
+                logger.info(f"Warmup 후 GPU 메모리: {memory_after_warmup / 1024**3:.2f} GB")
+                memory_allocated = (memory_after_warmup - memory_before_warmup) / 1024**2
+                logger.info(f"Warmup 메모리 할당량: {memory_allocated:.2f} MB")
+
+                # GPU 메모리 캐시 정리로 불필요한 메모리 해제
+                torch.cuda.empty_cache()
+                logger.info("GPU 메모리 캐시 정리 완료")
+
+            # warmup 완료 시간 측정 및 로깅
+            warmup_time = time.time() - warmup_start_time
+            logger.info(f"✅ 모델 warmup 완료! 소요시간: {warmup_time:.2f}초")
+            logger.info("이제 사용자 요청 시 빠른 이미지 생성이 가능합니다.")
+
+        except Exception as e:
+            # warmup 실패 시에도 서비스는 정상 동작하도록 예외 처리
+            # warmup 실패가 전체 서비스를 중단시키지 않도록 주의
+            logger.warning(f"⚠️ 모델 warmup 실패 (서비스는 정상 동작): {e}")
+            logger.info("첫 번째 이미지 생성 시 다소 지연될 수 있습니다.")
+
+    def run_batch(self, requests: List[Dict[str, Any]],
+                  on_step: Optional[StepCallback] = None,
+                  should_stop: Optional[Callable[[], bool]] = None) -> List[Tuple[Image.Image, Dict[str, Any]]]:
+        """
+        파이프라인 배치 호출 (디노이즈 → 디코딩 단계별 시간 측정)
+
+        Args:
+            requests: 생성 요청 목록 ({"prompt": str, "seed": Optional[int], "decoder": "full" | "fast",
+                      선택적으로 GENERATION_PARAMS 항목(스텝, 가이던스, 해상도)을 덮어씀)
+                      한 배치의 요청은 같은 생성 옵션을 사용 (배치 키로 구분)
+                      "preview": True인 요청이 하나라도 있으면 스텝마다 배치 전체의 미리보기 생성
+            on_step: 디노이즈 스텝 완료 시 (완료 스텝 수, 전체 스텝 수, 미리보기 목록)으로 호출할 함수
+                     (추론 스레드에서 호출, 미리보기를 요청하지 않았으면 미리보기 목록은 None)
+            should_stop: 배치의 요청자가 모두 떠났는지 확인하는 함수 (시작 전과 스텝마다 확인)
+
+        Returns:
+            요청 순서대로 (생성된 이미지, 단계별 시간) 목록
+
+        Raises:
+            GenerationCancelled: should_stop이 True를 반환하여 중단한 경우
+        """
+        # 추론 스레드 / 워커 큐에서 기다리는 동안 모두 취소되었으면 시작하지 않음
+        if should_stop is not None and should_stop():
+            raise GenerationCancelled("생성 시작 전에 요청이 모두 취소되었습니다")
+
+        # 시드가 지정된 요청은 같은 이미지를 재현할 수 있도록 요청별 생성기 사용
+        generator = None
+        if any(request.get("seed") is not None for request in requests):
+            generator = [
+                torch.Generator(device=self.device).manual_seed(
+                    request["seed"] if request.get("seed") is not None else torch.seed()
+                )
+                for request in requests
+            ]
+
+        # 디코딩은 파이프라인 밖에서 따로 수행하여 시간을 분리
+        params = {key: requests[0].get(key, value) for key, value in GENERATION_PARAMS.items()}
+        pipe_kwargs = dict(params, generator=generator, output_type="latent")
+
+        with torch.no_grad():  # 그래디언트 계산 비활성화로 메모리 절약
+            if self.embed_cache.enabled:
+                # 프롬프트별 임베딩(캐시)을 배치 차원으로 이어 붙여 텍스트 인코더 없이 호출
+                embeddings = [self.encode_prompt(request["prompt"], params["guidance_scale"]) for request in requests]
+                prompt_embeds, negative_embeds, pooled_embeds, negative_pooled_embeds = (
+                    torch.cat(parts, dim=0) if parts[0] is not None else None
+                    for parts in zip(*embeddings)
+                )
+                pipe_kwargs.update(
+                    prompt_embeds=prompt_embeds,
+                    negative_prompt_embeds=negative_embeds,
+                    pooled_prompt_embeds=pooled_embeds,
+                    negative_pooled_prompt_embeds=negative_pooled_embeds
+                )
+            else:
+                pipe_kwargs["prompt"] = [request["prompt"] for request in requests]
+                # pipe_kwargs["negative_prompt"] = self.negative_prompt
+
+            denoise_start_time = time.time()
+            previews = on_step is not None and any(request.get("preview") for request in requests)
+            step_timer = StepTimer(params["num_inference_steps"], on_step, previews, should_stop)
+            latents = self.pipe(callback_on_step_end=step_timer, **pipe_kwargs).images
+            denoise_time = time.time() - denoise_start_time
+
+            if step_timer.interrupted:
+                logger.info(
+                    f"배치 {len(requests)}개 생성 중단: {len(step_timer.latencies)}/{params['num_inference_steps']}스텝 "
+                    f"({denoise_time * 1000:.0f}ms 사용, 디코딩 생략)"
+                )
+                raise GenerationCancelled("요청이 모두 취소되어 생성을 중단했습니다")
+
+            decoder = requests[0].get("decoder", "full")
+            decode_start_time = time.time()
+            images, decoder = self.decode_latents(latents, decoder)
+            decode_time = time.time() - decode_start_time
+
+        self.last_step_latencies = step_timer.latencies
+        logger.info(
+            f"배치 {len(requests)}개 스텝별 지연: "
+            + ", ".join(f"{latency * 1000:.0f}ms" for latency in step_timer.latencies)
+            + f" / 디코딩({decoder}) {decode_time * 1000:.0f}ms"
+        )
+
+        timings = {
+            "batch_size": len(requests),
+            "profile": requests[0].get("profile"),
+            "steps": params["num_inference_steps"],
+            "denoise": round(denoise_time, 3),
+            "decode": round(decode_time, 3),
+            "decoder": decoder,
+            "step_latencies": [round(latency, 3) for latency in step_timer.latencies],
+        }
+        return [(image, timings) for image in images]
+
+    def decode_latents(self, latents: torch.Tensor, decoder: str = "full") -> Tuple[List[Image.Image], str]:
+        """
+        잠재 텐서를 이미지로 디코딩
+
+        Args:
+            latents: 파이프라인이 반환한 잠재 텐서 (output_type="latent")
+            decoder: "full" (SDXL VAE) 또는 "fast" (TAESD)
+
+        Returns:
+            (이미지 목록, 실제 사용한 디코더)
+        """
+        if decoder == "fast" and self.fast_decoder is not None:
+            latents = latents.to(self.fast_decoder.dtype)
+            image = self.fast_decoder.decode(latents / self.fast_decoder.config.scaling_factor, return_dict=False)[0]
+            return self.pipe.image_processor.postprocess(image, output_type="pil"), "fast"
+
+        vae = self.pipe.vae
+        # SDXL VAE는 fp16에서 오버플로가 나므로 파이프라인과 같이 디코딩 동안만 fp32로 올림
+        needs_upcasting = vae.dtype == torch.float16 and vae.config.force_upcast
+        if needs_upcasting:
+            vae.to(dtype=torch.float32)
+        latents = latents.to(next(iter(vae.post_quant_conv.parameters())).dtype)
+
+        image = vae.decode(latents / vae.config.scaling_factor, return_dict=False)[0]
+
+        if needs_upcasting:
+            vae.to(dtype=torch.float16)
+        return self.pipe.image_processor.postprocess(image, output_type="pil"), "full"
+
+    def encode_prompt(self, prompt: str, guidance_scale: Optional[float] = None) -> PromptEmbeddings:
+        """
+        프롬프트 임베딩 계산 (캐시 적중 시 텍스트 인코더 생략)
+
+        guidance_scale > 1이면 classifier-free guidance용 negative 임베딩까지 함께 보관하며,
+        CFG 사용 여부에 따라 결과가 달라지므로 캐시도 따로 구분합니다.
+
+        Args:
+            prompt: 프롬프트 텍스트
+            guidance_scale: 이번 요청에 실제 적용되는 guidance_scale (None이면 기본 생성 파라미터)
+
+        Returns:
+            (prompt_embeds, negative_prompt_embeds, pooled_prompt_embeds, negative_pooled_prompt_embeds)
+        """
+        if guidance_scale is None:
+            guidance_scale = GENERATION_PARAMS["guidance_scale"]
+        guidance = guidance_scale > 1.0
+        embeddings = self.embed_cache.get(prompt, self.device, guidance)
+        if embeddings is not None:
+            return embeddings
+
+        with torch.no_grad():
+            embeddings = self.pipe.encode_prompt(
+                prompt=prompt,
+                device=self.pipe.device,
+                num_images_per_prompt=1,
+                do_classifier_free_guidance=guidance
+            )
+        self.embed_cache.put(prompt, embeddings, guidance)
+        return embeddings
+
+    def get_info(self) -> Dict:
+        """
+        엔진 정보 반환
+        """
+        return {
+            "model_name": self.model_id,
+            "loaded": self.loaded,
+            "device": self.device,
+            "dtype": self.torch_dtype,
+            "mmap_weights": self.mmap_weights,
+            "num_threads": torch.get_num_threads() if self.device == "cpu" else None,
+            "torch_compile": self.torch_compile,
+            "quantized": self.quantize,
+            "fast_decoder": self.fast_decoder_model if self.fast_decoder is not None else None,
+            "last_step_latencies_ms": [round(latency * 1000, 1) for latency in self.last_step_latencies],
+            "load_time_seconds": round(self.load_time, 2),
+            "prompt_embedding_cache": self.embed_cache.get_stats(),
+        }
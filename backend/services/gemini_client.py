@@ -0,0 +1,138 @@
+"""
+Gemini API 비동기 클라이언트
+httpx.AsyncClient 기반으로 Gemini generateContent 호출을 담당
+
+주요 기능:
+1. 이벤트 루프를 막지 않는 비동기 HTTP 호출
+2. 공유 커넥션 풀 (최대 연결 수 제한, HTTP keep-alive)
+3. 호출별 타임아웃 설정
+
+분류기의 모든 Gemini 호출은 이 클라이언트를 통해 수행됩니다.
+"""
+
+import asyncio
+from typing import Any, Dict, Optional
+
+import httpx
+
+from config import settings
+
+
+class GeminiClient:
+    """
+    Gemini generateContent 엔드포인트용 비동기 전송 계층
+    하나의 AsyncClient(커넥션 풀)를 모든 요청이 공유합니다.
+    """
+
+    def __init__(
+        self,
+        base_url: str,
+        api_key: Optional[str] = None,
+        timeout: float = settings.GEMINI_TIMEOUT,
+        connect_timeout: float = settings.GEMINI_CONNECT_TIMEOUT,
+        max_connections: int = settings.GEMINI_MAX_CONNECTIONS,
+        max_keepalive_connections: int = settings.GEMINI_MAX_KEEPALIVE_CONNECTIONS,
+        keepalive_expiry: float = settings.GEMINI_KEEPALIVE_EXPIRY,
+    ):
+        """
+        클라이언트 초기화 (실제 커넥션 풀은 첫 요청 시 생성)
+
+        Args:
+            base_url: generateContent 엔드포인트 URL
+            api_key: Gemini API 키
+            timeout: 기본 요청 타임아웃 (초)
+            connect_timeout: 연결 타임아웃 (초)
+            max_connections: 풀의 최대 동시 연결 수
+            max_keepalive_connections: 유지할 keep-alive 연결 수
+            keepalive_expiry: 유휴 keep-alive 연결 유지 시간 (초)
+        """
+        self.base_url = base_url
+        self.api_key = api_key
+        self.timeout = timeout
+        self.connect_timeout = connect_timeout
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry,
+        )
+        self._client: Optional[httpx.AsyncClient] = None
+        self._client_lock = asyncio.Lock()
+
+    def set_api_key(self, api_key: Optional[str]):
+        """
+        API 키 변경 (요청 헤더에 매번 반영되므로 풀을 다시 만들 필요 없음)
+
+        Args:
+            api_key: Gemini API 키
+        """
+        self.api_key = api_key
+
+    @property
+    def headers(self) -> Optional[Dict[str, str]]:
+        """현재 API 키 기준 요청 헤더"""
+        if not self.api_key:
+            return None
+        return {
+            'Content-Type': 'application/json',
+            'X-goog-api-key': self.api_key
+        }
+
+    async def _get_client(self) -> httpx.AsyncClient:
+        """
+        공유 AsyncClient 반환 (없으면 생성)
+        이벤트 루프 안에서 생성해야 하므로 지연 생성합니다.
+        """
+        if self._client is None or self._client.is_closed:
+            async with self._client_lock:
+                if self._client is None or self._client.is_closed:
+                    self._client = httpx.AsyncClient(
+                        limits=self.limits,
+                        timeout=httpx.Timeout(self.timeout, connect=self.connect_timeout),
+                    )
+        return self._client
+
+    async def generate_content(
+        self,
+        payload: Dict[str, Any],
+        timeout: Optional[float] = None
+    ) -> httpx.Response:
+        """
+        generateContent 호출
+
+        Args:
+            payload: 요청 본문 (contents 등)
+            timeout: 이번 호출에만 적용할 타임아웃 (초, None이면 기본값)
+
+        Returns:
+            httpx.Response: Gemini 응답
+        """
+        client = await self._get_client()
+        request_timeout = (
+            httpx.Timeout(timeout, connect=self.connect_timeout)
+            if timeout is not None else httpx.USE_CLIENT_DEFAULT
+        )
+        return await client.post(
+            self.base_url,
+            headers=self.headers,
+            json=payload,
+            timeout=request_timeout,
+        )
+
+    async def aclose(self):
+        """커넥션 풀 종료 (서버 종료 시 호출)"""
+        if self._client is not None and not self._client.is_closed:
+            await self._client.aclose()
+        self._client = None
+
+    def get_pool_info(self) -> Dict[str, Any]:
+        """
+        커넥션 풀 설정 정보 반환
+        """
+        return {
+            "timeout": self.timeout,
+            "connect_timeout": self.connect_timeout,
+            "max_connections": self.limits.max_connections,
+            "max_keepalive_connections": self.limits.max_keepalive_connections,
+            "keepalive_expiry": self.limits.keepalive_expiry,
+            "client_open": self._client is not None and not self._client.is_closed,
+        }
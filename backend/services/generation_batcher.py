@@ -0,0 +1,286 @@
+"""
+이미지 생성 마이크로 배치 스케줄러
+짧은 시간 창 안에 들어온 생성 요청을 모아 한 번의 파이프라인 호출로 처리
+
+주요 기능:
+1. 최대 배치 크기 / 최대 대기 시간 기반 요청 수집
+2. 배치 키(생성 설정)가 같은 요청끼리만 묶기
+3. 배치 결과를 각 요청자에게 다시 분배
+4. 제출 대기열 크기 제한 (가득 차면 즉시 거절)
+5. 여러 배치 동시 실행 (워커 프로세스 수만큼)
+6. 대기열 깊이 / 대기 시간 / 배치 통계 제공
+7. 배치의 모든 요청자가 떠나면(연결 끊김 / 기한 초과) 취소 토큰으로 실행 중단 요청
+
+몰려드는 요청을 배치로 처리하면 GPU/CPU 코어당 처리량이 크게 올라갑니다.
+"""
+
+import time
+import asyncio
+import logging
+import threading
+from collections import deque
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class QueueFullError(Exception):
+    """제출 대기열이 가득 찼을 때 발생하는 예외"""
+
+
+class CancelToken:
+    """
+    배치 실행 취소 신호 (이벤트 루프에서 취소, 추론 스레드 / 결과 수신 스레드에서 확인)
+    """
+
+    def __init__(self):
+        self._event = threading.Event()
+        self._callbacks: List[Callable[[], None]] = []
+
+    def is_cancelled(self) -> bool:
+        """취소 여부 (어느 스레드에서나 호출 가능)"""
+        return self._event.is_set()
+
+    def add_callback(self, callback: Callable[[], None]):
+        """취소 시 호출할 함수 등록 (이미 취소되었으면 즉시 호출)"""
+        if self._event.is_set():
+            callback()
+        else:
+            self._callbacks.append(callback)
+
+    def cancel(self):
+        """취소 신호 설정 후 등록된 함수 호출"""
+        if self._event.is_set():
+            return
+        self._event.set()
+        for callback in self._callbacks:
+            try:
+                callback()
+            except Exception as e:
+                logger.debug(f"취소 콜백 오류: {e}")
+
+
+class MicroBatcher:
+    """
+    비동기 요청을 모아 배치 실행 함수에 전달하는 스케줄러
+    """
+
+    def __init__(
+        self,
+        run_batch: Callable[[List[Any], CancelToken], Awaitable[List[Any]]],
+        max_batch_size: int = 4,
+        max_wait: float = 0.05,
+        max_queue_size: int = 0,
+        max_concurrent_batches: int = 1
+    ):
+        """
+        스케줄러 초기화
+
+        Args:
+            run_batch: (요청 목록, 취소 토큰)을 받아 같은 순서의 결과 목록을 반환하는 코루틴 함수
+                       (모든 요청자가 떠나 토큰이 취소되면 가능한 빨리 중단하고 예외를 발생시키면 됨)
+            max_batch_size: 한 배치의 최대 요청 수
+            max_wait: 첫 요청 이후 추가 요청을 기다리는 최대 시간 (초)
+            max_queue_size: 대기열 최대 크기 (0이면 제한 없음)
+            max_concurrent_batches: 동시에 실행할 수 있는 최대 배치 수
+        """
+        self.run_batch = run_batch
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max_wait
+        self.max_queue_size = max(0, max_queue_size)
+        self.max_concurrent_batches = max(1, max_concurrent_batches)
+        self._queue: Optional[asyncio.Queue] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._batch_tasks = set()
+        self._worker_task: Optional[asyncio.Task] = None
+        self._carried = deque()  # 배치 키가 달라 다음 배치로 넘긴 요청
+        self._running = 0
+        self._stats = {
+            "requests": 0,
+            "rejected": 0,
+            "batches": 0,
+            "batched_requests": 0,
+            "max_batch_seen": 0,
+            "skipped_requests": 0,
+            "cancelled_batches": 0,
+        }
+        # 대기 시간 통계 (제출 → 실행 시작, 초)
+        self._wait_stats = {"last": 0.0, "max": 0.0, "ewma": 0.0}
+
+    def _ensure_worker(self):
+        """이벤트 루프 안에서 큐와 배치 작업자 태스크를 지연 생성"""
+        if self._queue is None:
+            self._queue = asyncio.Queue(maxsize=self.max_queue_size)
+            self._slots = asyncio.Semaphore(self.max_concurrent_batches)
+        if self._worker_task is None or self._worker_task.done():
+            self._worker_task = asyncio.create_task(self._worker())
+
+    async def submit(self, payload: Any, batch_key: Hashable = None) -> Any:
+        """
+        요청을 제출하고 배치 실행 결과를 기다림
+
+        Args:
+            payload: 배치 실행 함수에 전달할 요청 데이터
+            batch_key: 같은 배치로 묶을 수 있는 요청끼리 같은 값 (예: 생성 설정)
+
+        Returns:
+            해당 요청의 결과
+
+        Raises:
+            QueueFullError: 대기열이 가득 찬 경우
+        """
+        self._ensure_worker()
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        # 배치 키가 달라 다음 배치로 넘긴 요청도 대기 중이므로 함께 계산
+        if self.max_queue_size and self.queue_depth() >= self.max_queue_size:
+            self._stats["rejected"] += 1
+            raise QueueFullError(f"생성 대기열이 가득 찼습니다 (최대 {self.max_queue_size}개)")
+        try:
+            self._queue.put_nowait((batch_key, payload, future, loop.time()))
+        except asyncio.QueueFull:
+            self._stats["rejected"] += 1
+            raise QueueFullError(f"생성 대기열이 가득 찼습니다 (최대 {self.max_queue_size}개)")
+        self._stats["requests"] += 1
+        return await future
+
+    async def _worker(self):
+        """요청을 모아 배치로 실행하는 루프"""
+        loop = asyncio.get_running_loop()
+        carried = self._carried
+
+        while True:
+            # 실행 슬롯이 빌 때까지 기다리는 동안 요청이 쌓여 더 큰 배치가 됨
+            await self._slots.acquire()
+            first = carried.popleft() if carried else await self._queue.get()
+            batch = [first]
+
+            # 이전에 넘겨둔 요청 중 같은 키를 먼저 포함
+            for item in list(carried):
+                if len(batch) >= self.max_batch_size:
+                    break
+                if item[0] == first[0]:
+                    carried.remove(item)
+                    batch.append(item)
+
+            # 최대 대기 시간까지 추가 요청 수집
+            deadline = loop.time() + self.max_wait
+            while len(batch) < self.max_batch_size:
+                item = await self._get_until(deadline)
+                if item is None:
+                    break
+                if item[0] == first[0]:
+                    batch.append(item)
+                else:
+                    carried.append(item)
+
+            task = asyncio.create_task(self._execute(batch))
+            self._batch_tasks.add(task)
+            task.add_done_callback(self._release_slot)
+
+    async def _get_until(self, deadline: float) -> Optional[tuple]:
+        """
+        기한까지 대기열에서 요청 하나를 꺼냄 (기한이 지나면 None)
+
+        wait_for(queue.get())는 시간 초과와 꺼내기가 동시에 끝나면 꺼낸 요청을 잃을 수 있어
+        꺼내기 태스크를 직접 취소하고, 취소 전에 이미 꺼냈으면 그 요청을 사용합니다.
+        """
+        try:
+            return self._queue.get_nowait()
+        except asyncio.QueueEmpty:
+            pass
+
+        timeout = deadline - asyncio.get_running_loop().time()
+        if timeout <= 0:
+            return None
+        getter = asyncio.ensure_future(self._queue.get())
+        try:
+            await asyncio.wait({getter}, timeout=timeout)
+        finally:
+            if not getter.done():
+                getter.cancel()
+                await asyncio.wait({getter})
+        return None if getter.cancelled() else getter.result()
+
+    def _release_slot(self, task: asyncio.Task):
+        """배치 실행이 끝나면 실행 슬롯 반환"""
+        self._batch_tasks.discard(task)
+        self._slots.release()
+
+    async def _execute(self, batch: List[tuple]):
+        """배치 실행 후 결과(또는 예외)를 각 요청자에게 전달"""
+        # 이미 취소된 요청(연결 끊김 / 기한 초과)은 실행 전에 제외
+        active = [item for item in batch if not item[2].done()]
+        self._stats["skipped_requests"] += len(batch) - len(active)
+        batch = active
+        if not batch:
+            return
+
+        # 실행 중 모든 요청자가 떠나면 파이프라인을 다음 스텝 경계에서 중단하도록 취소 신호 전달
+        cancel_token = CancelToken()
+
+        def on_request_done(_):
+            if cancel_token.is_cancelled() or not all(item[2].cancelled() for item in batch):
+                return
+            self._stats["cancelled_batches"] += 1
+            cancel_token.cancel()
+
+        for item in batch:
+            item[2].add_done_callback(on_request_done)
+
+        # 대기 시간 기록 (가장 오래 기다린 요청 기준)
+        now = asyncio.get_running_loop().time()
+        wait = max(now - item[3] for item in batch)
+        self._wait_stats["last"] = wait
+        self._wait_stats["max"] = max(self._wait_stats["max"], wait)
+        self._wait_stats["ewma"] = 0.8 * self._wait_stats["ewma"] + 0.2 * wait
+
+        self._stats["batches"] += 1
+        self._stats["batched_requests"] += len(batch)
+        self._stats["max_batch_seen"] = max(self._stats["max_batch_seen"], len(batch))
+
+        start_time = time.time()
+        self._running += len(batch)
+        try:
+            results = await self.run_batch([item[1] for item in batch], cancel_token)
+        except Exception as e:
+            if cancel_token.is_cancelled():
+                logger.info(f"배치 생성 중단: 요청자 {len(batch)}개가 모두 떠남 ({time.time() - start_time:.3f}초 사용)")
+            for item in batch:
+                if not item[2].done():
+                    item[2].set_exception(e)
+            return
+        finally:
+            self._running -= len(batch)
+
+        logger.info(f"배치 생성 완료: {len(batch)}개 요청, {time.time() - start_time:.3f}초 (대기 {wait:.3f}초)")
+        for (_, _, future, _), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        배치 통계 반환
+        """
+        batches = self._stats["batches"]
+        return {
+            **self._stats,
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": round(self.max_wait * 1000),
+            "avg_batch_size": round(self._stats["batched_requests"] / batches, 2) if batches else 0.0,
+            "queued": self.queue_depth(),
+            "running": self._running,
+            "running_batches": len(self._batch_tasks),
+            "max_concurrent_batches": self.max_concurrent_batches,
+            "max_queue_size": self.max_queue_size,
+            "wait_seconds": {key: round(value, 3) for key, value in self._wait_stats.items()},
+        }
+
+    def queue_depth(self) -> int:
+        """현재 실행을 기다리는 요청 수"""
+        queued = self._queue.qsize() if self._queue is not None else 0
+        return queued + len(self._carried)
+
+    def average_wait(self) -> float:
+        """최근 대기 시간의 지수 이동 평균 (초)"""
+        return self._wait_stats["ewma"]
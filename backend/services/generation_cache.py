@@ -0,0 +1,246 @@
+"""
+생성 이미지 캐시
+같은 키워드 + 같은 생성 파라미터 요청에는 미리 만들어 둔 이미지를 돌려줌
+
+주요 기능:
+1. 키워드 정규화 및 생성 파라미터(+ 요청 옵션) 해시 기반 캐시 키
+2. 키워드당 여러 변형(시드별) 이미지를 라운드 로빈으로 제공
+3. 비어 있는 변형 목록 계산 (백그라운드 채우기용)
+4. 분류 클래스 이름에서 예열용 영문 키워드 추출
+5. 채우기 대상 판단 (두 번 이상 요청된 키워드 또는 분류 대상 곤충만)
+6. 키워드별 상태(라운드 로빈 카운터 / 요청 횟수) LRU 제한, 캐시 파일 수 제한 (오래된 파일부터 삭제)
+
+캐시 파일은 out_put_image 폴더에 평평한 파일명으로 저장되므로
+기존 /generated-images/{filename} 경로로 그대로 제공됩니다.
+"""
+
+import os
+import re
+import json
+import hashlib
+import logging
+import itertools
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# 분류 클래스 이름의 괄호 안 영문 이름 (예: "나비 (Butterfly)")
+SPECIES_KEYWORD_PATTERN = re.compile(r"\(([^)]+)\)")
+
+
+def normalize_keyword(keyword: str) -> str:
+    """
+    키워드를 캐시 키/파일명에 쓸 수 있는 형태로 정규화
+
+    Args:
+        keyword: 사용자 입력 키워드
+
+    Returns:
+        소문자, 공백 → 하이픈, 파일명에 쓸 수 없는 문자 제거
+    """
+    slug = re.sub(r"[^\w]+", "-", keyword.strip().lower()).strip("-_")
+    return slug or "insect"
+
+
+def species_keywords(classes: List[str]) -> List[str]:
+    """
+    분류 클래스 이름 목록에서 예열용 영문 키워드 추출
+
+    Args:
+        classes: 클래스 이름 목록 (예: ["나비 (Butterfly)", ...])
+
+    Returns:
+        영문 키워드 목록 (괄호가 없으면 이름 그대로)
+    """
+    keywords = []
+    for name in classes:
+        match = SPECIES_KEYWORD_PATTERN.search(name)
+        keyword = (match.group(1) if match else name).strip()
+        if keyword and keyword not in keywords:
+            keywords.append(keyword)
+    return keywords
+
+
+class GeneratedImageCache:
+    """
+    키워드별 생성 이미지 변형을 관리하는 파일 캐시
+    """
+
+    def __init__(self, output_dir: str, params: Dict[str, Any], variants: int = 3,
+                 base_seed: int = 0, enabled: bool = True, max_keywords: int = 1000,
+                 max_files: int = 0, preferred_keywords: Iterable[str] = ()):
+        """
+        캐시 초기화
+
+        Args:
+            output_dir: 생성 이미지 저장 폴더 (/generated-images로 제공되는 폴더)
+            params: 결과에 영향을 주는 생성 파라미터 (프롬프트, 스텝, 해상도 등)
+            variants: 키워드당 보관할 변형 이미지 수
+            base_seed: 변형 시드 시작값 (변형 i의 시드 = base_seed + i)
+            enabled: 캐시 사용 여부
+            max_keywords: 라운드 로빈 카운터 / 요청 횟수를 기억할 최대 키워드 수 (오래 안 쓴 것부터 삭제)
+            max_files: 보관할 최대 캐시 파일 수 (0이면 제한 없음, 넘으면 오래된 파일부터 삭제)
+            preferred_keywords: 처음 요청부터 변형을 채울 키워드 (분류 대상 곤충 등)
+        """
+        self.output_dir = output_dir
+        self.variants = max(1, variants)
+        self.base_seed = base_seed
+        self.enabled = enabled
+        self.params = params
+        self.params_hash = self._params_hash()
+        self.max_keywords = max(1, max_keywords)
+        self.max_files = max(0, max_files)
+        self.preferred_keywords = {normalize_keyword(keyword) for keyword in preferred_keywords}
+        self._counters: "OrderedDict[Tuple[str, str], itertools.count]" = OrderedDict()
+        self._requests: "OrderedDict[str, int]" = OrderedDict()  # 정규화 키워드 → 요청 횟수
+        self._stats = {"hits": 0, "misses": 0, "fills": 0, "evicted_files": 0}
+
+    def _params_hash(self, options: Optional[Dict[str, Any]] = None) -> str:
+        """
+        생성 파라미터 + 요청 옵션(디코더 등)의 해시
+        """
+        payload = {**self.params, **(options or {})}
+        return hashlib.sha256(
+            json.dumps(payload, sort_keys=True, ensure_ascii=False).encode("utf-8")
+        ).hexdigest()[:10]
+
+    def seed_for(self, index: int) -> int:
+        """변형 번호의 시드"""
+        return self.base_seed + index
+
+    def variant_filename(self, keyword: str, index: int, options: Optional[Dict[str, Any]] = None) -> str:
+        """
+        변형 이미지 파일명 (키워드 + 파라미터 해시 + 시드)
+        """
+        params_hash = self._params_hash(options) if options else self.params_hash
+        return f"cache_{normalize_keyword(keyword)}_{params_hash}_s{self.seed_for(index)}.png"
+
+    def _exists(self, filename: str) -> bool:
+        """캐시 파일 존재 여부"""
+        return os.path.exists(os.path.join(self.output_dir, filename))
+
+    def cached_variants(self, keyword: str, options: Optional[Dict[str, Any]] = None) -> List[str]:
+        """
+        이미 만들어진 변형 파일명 목록
+        """
+        return [
+            filename for filename in (self.variant_filename(keyword, i, options) for i in range(self.variants))
+            if self._exists(filename)
+        ]
+
+    def missing_variants(self, keyword: str, options: Optional[Dict[str, Any]] = None) -> List[Tuple[int, int]]:
+        """
+        아직 만들어지지 않은 변형의 (번호, 시드) 목록
+        """
+        return [
+            (i, self.seed_for(i)) for i in range(self.variants)
+            if not self._exists(self.variant_filename(keyword, i, options))
+        ]
+
+    def next_variant(self, keyword: str, options: Optional[Dict[str, Any]] = None) -> Optional[str]:
+        """
+        캐시된 변형 중 하나를 라운드 로빈으로 선택
+
+        Args:
+            keyword: 캐릭터 키워드
+            options: 결과에 영향을 주는 요청 옵션 (디코더 등)
+
+        Returns:
+            캐시 파일명 (캐시된 변형이 없으면 None)
+        """
+        if not self.enabled:
+            return None
+
+        available = self.cached_variants(keyword, options)
+        if not available:
+            self._stats["misses"] += 1
+            return None
+
+        counter_key = (normalize_keyword(keyword), self._params_hash(options) if options else self.params_hash)
+        counter = self._counters.pop(counter_key, None) or itertools.count()
+        self._counters[counter_key] = counter
+        while len(self._counters) > self.max_keywords:
+            self._counters.popitem(last=False)
+        self._stats["hits"] += 1
+        return available[next(counter) % len(available)]
+
+    def set_preferred_keywords(self, keywords: Iterable[str]):
+        """처음 요청부터 변형을 채울 키워드 설정 (분류 대상 곤충 목록)"""
+        self.preferred_keywords = {normalize_keyword(keyword) for keyword in keywords}
+
+    def record_request(self, keyword: str):
+        """키워드 요청 횟수 기록 (채우기 대상 판단용)"""
+        slug = normalize_keyword(keyword)
+        self._requests[slug] = self._requests.pop(slug, 0) + 1
+        while len(self._requests) > self.max_keywords:
+            self._requests.popitem(last=False)
+
+    def should_fill(self, keyword: str) -> bool:
+        """
+        나머지 변형을 백그라운드에서 채울 키워드인지 여부
+
+        한 번만 요청된 임의 키워드까지 채우면 생성 작업과 디스크가 낭비되므로
+        분류 대상 곤충이거나 두 번 이상 요청된 키워드만 채웁니다.
+        """
+        slug = normalize_keyword(keyword)
+        return slug in self.preferred_keywords or self._requests.get(slug, 0) > 1
+
+    def record_fill(self):
+        """변형 이미지 하나가 새로 만들어졌음을 기록"""
+        self._stats["fills"] += 1
+
+    def enforce_limit(self) -> int:
+        """
+        캐시 파일 수가 제한을 넘으면 오래된 파일(수정 시각 기준)부터 삭제
+
+        Returns:
+            삭제한 파일 수
+        """
+        if not self.max_files:
+            return 0
+        try:
+            entries = [
+                entry for entry in os.scandir(self.output_dir)
+                if entry.name.startswith("cache_") and entry.name.endswith(".png")
+            ]
+        except FileNotFoundError:
+            return 0
+        excess = len(entries) - self.max_files
+        if excess <= 0:
+            return 0
+
+        def mtime(entry):
+            try:
+                return entry.stat().st_mtime
+            except FileNotFoundError:
+                return 0.0
+
+        removed = 0
+        for entry in sorted(entries, key=mtime)[:excess]:
+            try:
+                os.remove(entry.path)
+                removed += 1
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                logger.warning(f"캐시 이미지 삭제 실패: {entry.name}: {e}")
+        self._stats["evicted_files"] += removed
+        return removed
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        캐시 통계 반환
+        """
+        lookups = self._stats["hits"] + self._stats["misses"]
+        return {
+            **self._stats,
+            "enabled": self.enabled,
+            "variants_per_keyword": self.variants,
+            "params_hash": self.params_hash,
+            "keywords_served": len(self._counters),
+            "keywords_tracked": len(self._requests),
+            "max_keywords": self.max_keywords,
+            "max_files": self.max_files,
+            "hit_rate": round(self._stats["hits"] / lookups, 3) if lookups else 0.0,
+        }
@@ -0,0 +1,124 @@
+"""
+이미지 생성 프로필 및 부하 적응형 프로필 선택
+대기 시간이 길어지면 더 가벼운 프로필로 자동 전환하고, 부하가 줄면 되돌림
+
+주요 기능:
+1. 이름 있는 생성 프로필 (preview / standard / quality)
+2. 요청 프로필 + 디코더 옵션 → 생성 옵션 변환
+3. 생성 대기열 평균 대기 시간 기반 단계적 품질 하향 / 복구 (히스테리시스 + 쿨다운)
+
+아이들이 20초 기다리는 완벽한 카드보다 2초 만에 나오는 조금 단순한 카드가 낫습니다.
+"""
+
+import time
+import logging
+from typing import Any, Dict, List, Optional
+
+from services.diffusion_engine import GENERATION_PARAMS
+
+logger = logging.getLogger(__name__)
+
+# 생성 프로필 (디노이즈 스텝 / 가이던스 / 해상도 / 디코더)
+GENERATION_PROFILES: Dict[str, Dict[str, Any]] = {
+    # 부하가 클 때: 1스텝, 가이던스 없음(turbo 기본), 작은 해상도, 빠른 디코더
+    "preview": {"num_inference_steps": 1, "guidance_scale": 0.0, "width": 512, "height": 320, "decoder": "fast"},
+    # 기본: 기존 서비스 설정
+    "standard": {**GENERATION_PARAMS, "decoder": "full"},
+    # 여유가 있을 때: 스텝과 해상도를 높인 설정
+    "quality": {"num_inference_steps": 4, "guidance_scale": 1.5, "width": 768, "height": 480, "decoder": "full"},
+}
+
+# 비싼 프로필 → 싼 프로필 순서 (품질 하향은 이 순서로 이동)
+PROFILE_ORDER: List[str] = ["quality", "standard", "preview"]
+
+
+def build_generation_options(profile: str, decoder: Optional[str] = None) -> Dict[str, Any]:
+    """
+    프로필 이름과 디코더 지정으로 생성 옵션 구성
+
+    Args:
+        profile: 프로필 이름
+        decoder: 디코더 지정 (None이면 프로필 기본값)
+
+    Returns:
+        {"profile", "num_inference_steps", "guidance_scale", "width", "height", "decoder"}
+    """
+    options = {"profile": profile, **GENERATION_PROFILES[profile]}
+    if decoder:
+        options["decoder"] = decoder
+    return options
+
+
+class AdaptiveProfileController:
+    """
+    생성 대기 시간에 따라 프로필을 단계적으로 낮추거나 되돌리는 제어기
+    """
+
+    def __init__(self, target_wait: float, cooldown: float = 10.0, enabled: bool = True):
+        """
+        제어기 초기화
+
+        Args:
+            target_wait: 목표 대기 시간 (초, 넘으면 한 단계 하향)
+            cooldown: 단계 변경 후 다음 변경까지 최소 간격 (초)
+            enabled: 적응형 하향 사용 여부
+        """
+        self.target_wait = target_wait
+        self.cooldown = cooldown
+        self.enabled = enabled
+        self.level = 0  # 요청 프로필에서 몇 단계 낮출지
+        self._last_change = 0.0
+        self._stats = {"degrade_steps": 0, "recover_steps": 0, "degraded_requests": 0}
+
+    def update(self, average_wait: float):
+        """
+        최근 평균 대기 시간을 반영하여 하향 단계 조정
+
+        목표를 넘으면 한 단계 낮추고, 목표의 절반 아래로 내려가면 한 단계 되돌립니다.
+        그 사이 구간에서는 현재 단계를 유지하여 단계가 흔들리지 않게 합니다.
+        """
+        if not self.enabled:
+            return
+
+        now = time.time()
+        if now - self._last_change < self.cooldown:
+            return
+
+        if average_wait > self.target_wait and self.level < len(PROFILE_ORDER) - 1:
+            self.level += 1
+            self._last_change = now
+            self._stats["degrade_steps"] += 1
+            logger.warning(f"생성 대기 {average_wait:.2f}초 > 목표 {self.target_wait:.2f}초: 프로필 {self.level}단계 하향")
+        elif average_wait < self.target_wait / 2 and self.level > 0:
+            self.level -= 1
+            self._last_change = now
+            self._stats["recover_steps"] += 1
+            logger.info(f"생성 대기 {average_wait:.2f}초로 감소: 프로필 하향 {self.level}단계로 복구")
+
+    def select(self, requested: str) -> str:
+        """
+        요청 프로필에 현재 하향 단계를 적용한 실제 프로필
+
+        Args:
+            requested: 요청된 프로필 이름
+
+        Returns:
+            실행할 프로필 이름
+        """
+        index = min(PROFILE_ORDER.index(requested) + self.level, len(PROFILE_ORDER) - 1)
+        profile = PROFILE_ORDER[index]
+        if profile != requested:
+            self._stats["degraded_requests"] += 1
+        return profile
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        제어기 상태 반환
+        """
+        return {
+            **self._stats,
+            "enabled": self.enabled,
+            "level": self.level,
+            "target_wait_seconds": self.target_wait,
+            "cooldown_seconds": self.cooldown,
+        }
@@ -0,0 +1,367 @@
+"""
+CPU 이미지 생성 워커 프로세스 풀
+여러 프로세스가 같은 모델 가중치를 공유하며 배치 생성을 병렬로 처리
+
+주요 기능:
+1. 워커 프로세스마다 전용 코어 집합 지정 (CPU affinity) 및 연산 스레드 수 설정
+2. safetensors 가중치를 mmap으로 열어 프로세스 간 메모리 페이지 공유
+3. 로컬 큐로 작업 전달 / 결과 수신 후 비동기 future로 전달
+4. 워커 상태 및 처리 통계 제공
+5. 요청자가 모두 떠난 작업은 워커별 공유 값으로 중단 요청 (다음 스텝 경계에서 중단)
+
+하나의 파이프라인이 많은 코어를 효율적으로 쓰지 못하는 CPU 서버에서
+메모리를 N배로 늘리지 않고 생성 처리량을 코어 수에 맞게 확장합니다.
+"""
+
+import os
+import time
+import queue
+import asyncio
+import logging
+import threading
+import itertools
+import multiprocessing
+from typing import Any, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+def split_cores(num_workers: int) -> List[List[int]]:
+    """
+    사용 가능한 CPU 코어를 워커 수만큼 연속된 묶음으로 나누기
+
+    Args:
+        num_workers: 워커 프로세스 수
+
+    Returns:
+        워커별 코어 번호 목록 (코어가 워커보다 적으면 코어를 돌려가며 할당)
+    """
+    if hasattr(os, "sched_getaffinity"):
+        cores = sorted(os.sched_getaffinity(0))
+    else:
+        cores = list(range(os.cpu_count() or 1))
+
+    if len(cores) < num_workers:
+        return [[cores[i % len(cores)]] for i in range(num_workers)]
+
+    per_worker = len(cores) // num_workers
+    return [cores[i * per_worker:(i + 1) * per_worker] for i in range(num_workers)]
+
+
+def _worker_main(worker_id: int, cores: List[int], num_threads: int,
+                 engine_options: Dict[str, Any], job_queue, result_queue, cancel_job):
+    """
+    워커 프로세스 진입점 (spawn으로 실행)
+
+    torch를 불러오기 전에 코어를 고정하고 스레드 수를 맞춘 뒤,
+    엔진을 로드하고 작업 큐가 닫힐 때까지 배치를 처리합니다.
+    cancel_job에 처리 중인 job_id가 기록되면 해당 배치를 중단합니다.
+    """
+    if cores and hasattr(os, "sched_setaffinity"):
+        os.sched_setaffinity(0, cores)
+    threads = num_threads or len(cores) or 1
+    os.environ["OMP_NUM_THREADS"] = str(threads)
+
+    import torch
+    from services.diffusion_engine import DiffusionEngine, GenerationCancelled
+
+    torch.set_num_threads(threads)
+    torch.set_num_interop_threads(1)
+
+    try:
+        engine = DiffusionEngine(**engine_options)
+        engine.load()
+        engine.warmup()
+    except Exception as e:
+        result_queue.put(("failed", worker_id, str(e)))
+        return
+
+    result_queue.put(("ready", worker_id, {"pid": os.getpid(), "cores": cores,
+                                           "threads": threads, "load_time": engine.load_time}))
+
+    while True:
+        job = job_queue.get()
+        if job is None:  # 종료 신호
+            break
+
+        job_id, requests = job
+        result_queue.put(("accepted", worker_id, job_id))
+        start_time = time.time()
+
+        def on_step(step: int, total: int, previews=None, job_id=job_id):
+            result_queue.put(("progress", job_id, step, total, previews))
+
+        def should_stop(job_id=job_id) -> bool:
+            return cancel_job.value == job_id
+
+        try:
+            images = engine.run_batch(requests, on_step, should_stop)
+            result_queue.put(("result", job_id, images, time.time() - start_time))
+        except GenerationCancelled:
+            result_queue.put(("cancelled", job_id, time.time() - start_time))
+        except Exception as e:
+            result_queue.put(("error", job_id, str(e)))
+
+
+class GenerationWorkerPool:
+    """
+    생성 워커 프로세스 풀 (API 프로세스 측 관리자)
+    """
+
+    def __init__(self, num_workers: int, threads_per_worker: int = 0,
+                 engine_options: Optional[Dict[str, Any]] = None):
+        """
+        풀 설정 (프로세스 실행은 start()에서 수행)
+
+        Args:
+            num_workers: 워커 프로세스 수
+            threads_per_worker: 워커당 연산 스레드 수 (0이면 할당된 코어 수)
+            engine_options: DiffusionEngine 생성 인자
+        """
+        self.num_workers = max(1, num_workers)
+        self.threads_per_worker = threads_per_worker
+        self.engine_options = engine_options or {}
+        self._ctx = multiprocessing.get_context("spawn")  # torch 스레드 상태를 물려받지 않도록 spawn 사용
+        self._job_queue = None
+        self._result_queue = None
+        self._processes: List[Any] = []
+        self._listener: Optional[threading.Thread] = None
+        self._job_ids = itertools.count()
+        self._pending: Dict[int, tuple] = {}  # job_id → (loop, future)
+        self._progress: Dict[int, Callable[..., None]] = {}  # job_id → 스텝 진행 콜백
+        self._assigned: Dict[int, int] = {}  # worker_id → 처리 중인 job_id
+        self._cancel_values: List[Any] = []  # 워커별 중단할 job_id (공유 메모리 값)
+        self._cancelled: set = set()  # 요청자가 모두 떠난 job_id (워커가 받으면 바로 중단, 워커가 끝내면 제거)
+        self._workers: Dict[int, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        self._stopping = False
+        self._stats = {"jobs": 0, "completed": 0, "failed": 0, "cancelled": 0, "busy_seconds": 0.0}
+
+    def start(self):
+        """
+        워커 프로세스와 결과 수신 스레드 시작
+
+        spawn 자식은 메인 모듈을 다시 import하므로, 서버 시작 이벤트에서 호출해야
+        자식 프로세스가 또 다른 풀을 만들지 않습니다.
+        """
+        if self._processes:
+            return
+
+        self._job_queue = self._ctx.Queue()
+        self._result_queue = self._ctx.Queue()
+
+        for worker_id, cores in enumerate(split_cores(self.num_workers)):
+            cancel_job = self._ctx.Value("q", -1, lock=False)
+            self._cancel_values.append(cancel_job)
+            process = self._ctx.Process(
+                target=_worker_main,
+                args=(worker_id, cores, self.threads_per_worker, self.engine_options,
+                      self._job_queue, self._result_queue, cancel_job),
+                name=f"generation-worker-{worker_id}",
+                daemon=True
+            )
+            process.start()
+            self._processes.append(process)
+            self._workers[worker_id] = {"state": "loading", "cores": cores}
+            logger.info(f"생성 워커 {worker_id} 시작 (pid={process.pid}, 코어={cores})")
+
+        self._listener = threading.Thread(target=self._listen, name="generation-results", daemon=True)
+        self._listener.start()
+
+    def is_ready(self) -> bool:
+        """작업을 받을 수 있는 워커가 하나 이상 있는지 여부"""
+        return any(worker["state"] == "ready" for worker in self._workers.values())
+
+    def has_live_workers(self) -> bool:
+        """로딩 중이거나 준비된 워커가 하나 이상 있는지 여부 (모두 실패 / 종료면 False)"""
+        return any(worker["state"] in ("loading", "ready") for worker in self._workers.values())
+
+    async def run_batch(self, requests: List[Dict[str, Any]],
+                        on_step: Optional[Callable[..., None]] = None,
+                        cancel_token: Optional[Any] = None) -> List[Any]:
+        """
+        생성 요청 배치를 워커 큐에 넣고 결과를 기다림
+
+        Args:
+            requests: 생성 요청 목록 (DiffusionEngine.run_batch 형식)
+            on_step: 워커가 스텝을 마칠 때마다 (완료 스텝 수, 전체 스텝 수, 미리보기 목록)으로 호출할 함수
+                     (수신 스레드에서 호출)
+            cancel_token: 배치 취소 토큰 (취소되면 처리 중인 워커에 중단 요청)
+
+        Returns:
+            요청 순서대로 생성된 이미지 목록
+
+        Raises:
+            RuntimeError: 작업을 처리할 수 있는 워커가 없는 경우 (모두 로딩 실패 / 종료)
+        """
+        if not self.has_live_workers():
+            raise RuntimeError("작업을 처리할 수 있는 생성 워커가 없습니다 (모두 로딩 실패 또는 종료)")
+
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        job_id = next(self._job_ids)
+        with self._lock:
+            self._pending[job_id] = (loop, future)
+            if on_step is not None:
+                self._progress[job_id] = on_step
+        self._stats["jobs"] += 1
+        if cancel_token is not None:
+            cancel_token.add_callback(lambda: self._cancel(job_id))
+        self._job_queue.put((job_id, requests))
+        return await future
+
+    def _cancel(self, job_id: int):
+        """
+        작업 중단 요청 (처리 중인 워커가 있으면 공유 값에 job_id 기록)
+
+        아직 워커가 받지 않은 작업은 요청자 쪽 future를 바로 취소 오류로 끝내고,
+        나중에 워커가 받으면 즉시 중단 요청을 보냅니다.
+        """
+        with self._lock:
+            if job_id not in self._pending:
+                return
+            self._cancelled.add(job_id)
+            accepted = False
+            for worker_id, assigned in self._assigned.items():
+                if assigned == job_id:
+                    self._cancel_values[worker_id].value = job_id
+                    accepted = True
+        if not accepted:
+            self._stats["cancelled"] += 1
+            self._resolve(job_id, error=RuntimeError("요청이 모두 취소되어 생성을 중단했습니다"))
+
+    def _listen(self):
+        """워커 결과 큐를 읽어 대기 중인 future에 전달 (전용 스레드)"""
+        while not self._stopping:
+            try:
+                message = self._result_queue.get(timeout=1.0)
+            except queue.Empty:
+                self._check_workers()
+                continue
+            except (EOFError, OSError):
+                break
+
+            kind = message[0]
+            if kind == "ready":
+                _, worker_id, info = message
+                self._workers[worker_id].update(state="ready", **info)
+                logger.info(f"생성 워커 {worker_id} 준비 완료 (로딩 {info['load_time']:.2f}초)")
+            elif kind == "failed":
+                _, worker_id, error = message
+                self._workers[worker_id].update(state="failed", error=error)
+                logger.error(f"생성 워커 {worker_id} 로딩 실패: {error}")
+                self._fail_all_if_no_workers()
+            elif kind == "accepted":
+                _, worker_id, job_id = message
+                with self._lock:
+                    self._assigned[worker_id] = job_id
+                    if job_id in self._cancelled:
+                        self._cancel_values[worker_id].value = job_id
+            elif kind == "progress":
+                _, job_id, step, total, previews = message
+                on_step = self._progress.get(job_id)
+                if on_step is not None:
+                    on_step(step, total, previews)
+            elif kind == "result":
+                _, job_id, images, elapsed = message
+                self._forget_assignment(job_id)
+                self._stats["completed"] += 1
+                self._stats["busy_seconds"] += elapsed
+                self._resolve(job_id, result=images)
+            elif kind == "cancelled":
+                _, job_id, elapsed = message
+                self._forget_assignment(job_id)
+                if job_id in self._pending:
+                    self._stats["cancelled"] += 1
+                self._stats["busy_seconds"] += elapsed
+                self._resolve(job_id, error=RuntimeError("요청이 모두 취소되어 생성을 중단했습니다"))
+            elif kind == "error":
+                _, job_id, error = message
+                self._forget_assignment(job_id)
+                self._stats["failed"] += 1
+                self._resolve(job_id, error=RuntimeError(error))
+
+    def _check_workers(self):
+        """종료된 워커를 표시하고, 처리 중이던 작업을 실패로 돌려줌"""
+        for worker_id, process in enumerate(self._processes):
+            worker = self._workers[worker_id]
+            if process.is_alive() or worker["state"] == "exited":
+                continue
+            worker["state"] = "exited"
+            logger.error(f"생성 워커 {worker_id}가 종료되었습니다 (exitcode={process.exitcode})")
+            with self._lock:
+                job_id = self._assigned.pop(worker_id, None)
+            if job_id is not None:
+                self._stats["failed"] += 1
+                with self._lock:
+                    self._cancelled.discard(job_id)
+                self._resolve(job_id, error=RuntimeError("생성 워커 프로세스가 비정상 종료되었습니다"))
+        self._fail_all_if_no_workers()
+
+    def _fail_all_if_no_workers(self):
+        """살아 있는 워커가 하나도 없으면 대기 중인 모든 작업을 실패로 돌려줌 (큐에 남은 작업 포함)"""
+        if self._stopping or not self._workers or self.has_live_workers():
+            return
+        with self._lock:
+            job_ids = list(self._pending)
+        if not job_ids:
+            return
+        logger.error(f"살아 있는 생성 워커가 없어 대기 중인 작업 {len(job_ids)}개를 실패 처리합니다")
+        for job_id in job_ids:
+            self._stats["failed"] += 1
+            self._resolve(job_id, error=RuntimeError("작업을 처리할 수 있는 생성 워커가 없습니다"))
+
+    def _forget_assignment(self, job_id: int):
+        """완료된 작업의 워커 할당 / 취소 기록 제거"""
+        with self._lock:
+            self._cancelled.discard(job_id)
+            for worker_id, assigned in list(self._assigned.items()):
+                if assigned == job_id:
+                    del self._assigned[worker_id]
+
+    def _resolve(self, job_id: int, result: Any = None, error: Optional[Exception] = None):
+        """수신 스레드에서 이벤트 루프 쪽 future로 결과 전달"""
+        with self._lock:
+            pending = self._pending.pop(job_id, None)
+            self._progress.pop(job_id, None)
+        if pending is None:
+            return
+        loop, future = pending
+
+        def _set():
+            if future.done():
+                return
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(result)
+
+        loop.call_soon_threadsafe(_set)
+
+    def close(self, timeout: float = 5.0):
+        """
+        워커 프로세스 종료 (서버 종료 시 호출)
+        """
+        if not self._processes:
+            return
+        self._stopping = True
+        for _ in self._processes:
+            self._job_queue.put(None)
+        for process in self._processes:
+            process.join(timeout)
+            if process.is_alive():
+                process.terminate()
+        self._processes = []
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        워커 풀 통계 반환
+        """
+        return {
+            **self._stats,
+            "busy_seconds": round(self._stats["busy_seconds"], 2),
+            "num_workers": self.num_workers,
+            "ready_workers": sum(1 for worker in self._workers.values() if worker["state"] == "ready"),
+            "in_flight": len(self._pending),
+            "workers": {worker_id: dict(worker) for worker_id, worker in self._workers.items()},
+        }
@@ -0,0 +1,86 @@
+"""
+Gemini 업로드 전 이미지 전처리 (ingest) 단계
+원본 업로드(최대 10MB)를 분류에 충분한 크기로 줄여 전송량을 최소화
+
+주요 기능:
+1. EXIF 방향 정보 적용
+2. JPEG draft 모드를 이용한 빠른 축소 디코딩
+3. 긴 변 기준 리사이즈 후 JPEG/WebP 재인코딩 (최대 바이트 수 제한)
+4. 전처리 전/후 바이트 수 보고
+"""
+
+import io
+import time
+from typing import Any, Dict, Tuple
+
+from PIL import Image, ImageOps
+
+# 출력 형식별 MIME 타입
+OUTPUT_MIME_TYPES = {
+    "JPEG": "image/jpeg",
+    "WEBP": "image/webp",
+}
+
+
+def prepare_image_for_upload(
+    image_bytes: bytes,
+    max_long_edge: int = 768,
+    output_format: str = "JPEG",
+    quality: int = 85,
+    max_bytes: int = 300_000,
+    min_quality: int = 50
+) -> Tuple[bytes, str, Dict[str, Any]]:
+    """
+    업로드용 이미지 축소 및 재인코딩
+
+    Args:
+        image_bytes: 원본 이미지 바이트
+        max_long_edge: 출력 이미지의 최대 긴 변 (px)
+        output_format: 출력 형식 ("JPEG" 또는 "WEBP")
+        quality: 초기 인코딩 품질
+        max_bytes: 출력 최대 바이트 수 (초과 시 품질을 낮춰 재인코딩)
+        min_quality: 허용하는 최저 품질
+
+    Returns:
+        Tuple[bytes, str, Dict]: (전처리된 바이트, MIME 타입, 전/후 통계)
+    """
+    start_time = time.time()
+    output_format = output_format.upper()
+    if output_format not in OUTPUT_MIME_TYPES:
+        output_format = "JPEG"
+
+    image = Image.open(io.BytesIO(image_bytes))
+    original_size = image.size
+
+    # JPEG는 DCT 단계에서 1/2, 1/4, 1/8로 축소 디코딩 (목표 크기 이상 유지)
+    image.draft("RGB", (max_long_edge, max_long_edge))
+
+    # EXIF 방향 적용 후 RGB 변환 (GIF는 첫 프레임 사용)
+    image = ImageOps.exif_transpose(image)
+    if image.mode != "RGB":
+        image = image.convert("RGB")
+
+    # 긴 변 기준 축소 (비율 유지, 확대하지 않음)
+    if max(image.size) > max_long_edge:
+        image.thumbnail((max_long_edge, max_long_edge), Image.LANCZOS)
+
+    # 최대 바이트 수를 넘으면 품질을 단계적으로 낮춰 재인코딩
+    current_quality = quality
+    while True:
+        buf = io.BytesIO()
+        image.save(buf, format=output_format, quality=current_quality, optimize=True)
+        encoded = buf.getvalue()
+        if len(encoded) <= max_bytes or current_quality <= min_quality:
+            break
+        current_quality = max(min_quality, current_quality - 10)
+
+    stats = {
+        "original_bytes": len(image_bytes),
+        "processed_bytes": len(encoded),
+        "original_size": list(original_size),
+        "processed_size": list(image.size),
+        "format": output_format,
+        "quality": current_quality,
+        "processing_ms": round((time.time() - start_time) * 1000, 1),
+    }
+    return encoded, OUTPUT_MIME_TYPES[output_format], stats
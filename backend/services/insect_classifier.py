@@ -17,13 +17,126 @@ import torch
 import torchvision.transforms as transforms
 from typing import Dict, List, Tuple, Optional, Any
 import random
-import requests
 import base64
 import json
 import tempfile
 import shutil
 import io
 import re
+import time
+import hashlib
+
+from config import settings
+from services.gemini_client import GeminiClient
+from services.classification_cache import ClassificationCache
+from services.perceptual_index import PerceptualHashIndex, compute_dhash
+from services.image_preprocessor import prepare_image_for_upload
+from services.single_flight import SingleFlight
+from services.model_status import ModelStatus
+
+# 어린이용 분류 응답 형식 (parse_classification_response가 이 형식을 파싱)
+KID_FRIENDLY_FORMAT = """🐛 곤충 이름: [곤충의 이름 (쉬운 한국어로)]
+🐛 곤충 이름(영문): [곤충의 이름 (영문으로)]
+📚 곤충 종류: [어떤 종류의 곤충인지 쉽게 설명]
+✨ 특별한 모습: [어떻게 생겼는지, 색깔이나 모양 등을 재미있게 설명]
+🏡 어디에 살까: [어디서 만날 수 있는지]
+🍽️ 무엇을 먹을까: [무엇을 좋아해서 먹는지]
+🎯 재미있는 점: [이 곤충의 신기하고 재미있는 특징]
+😊 친구가 되려면: [이 곤충과 친하게 지내는 방법이나 주의할 점]"""
+
+# 곤충이 아닌 경우 처리 및 설명 톤 안내
+KID_FRIENDLY_GUIDE = """만약 곤충이 아니라면, "어? 이건 곤충이 아니야! 이것은 [무엇인지]이야~" 라고 친근하게 설명해줘.
+
+모든 설명은 10살 어린이가 쉽게 이해할 수 있도록 간단하고 재미있게 해줘. 무서운 표현은 피하고 긍정적이고 호기심을 자극하는 방식으로 설명해줘! 이모지도 적절히 사용해서 더 재미있게 만들어줘."""
+
+# 어린이용 프롬프트 (사진 1장)
+KID_FRIENDLY_PROMPT = f"""안녕! 나는 곤충 박사야! 🐛 
+이 사진에 있는 곤충 친구를 알아보자!
+
+다음처럼 쉽고 재미있게 설명해줄게:
+
+{KID_FRIENDLY_FORMAT}
+
+{KID_FRIENDLY_GUIDE}"""
+
+# 어린이용 프롬프트 (사진 여러 장을 한 번에 분류)
+KID_FRIENDLY_MULTI_PROMPT = f"""안녕! 나는 곤충 박사야! 🐛 
+아래에 사진 {{count}}장이 "사진 1", "사진 2" ... 순서로 주어져. 각 사진에 있는 곤충 친구를 알아보자!
+
+사진마다 반드시 "=== 사진 번호 ===" 줄(예: === 사진 1 ===)로 시작하는 구역을 만들고,
+그 아래에 다음처럼 쉽고 재미있게 설명해줘. 사진 순서와 번호를 꼭 지켜줘:
+
+{KID_FRIENDLY_FORMAT}
+
+{KID_FRIENDLY_GUIDE}"""
+
+# 구조화(JSON) 응답 필드: (스키마 속성 이름, parsed_data 키, 응답 형식의 항목 이름)
+STRUCTURED_FIELDS = [
+    ("name", "곤충_이름", "🐛 곤충 이름"),
+    ("name_en", "곤충_이름_영문", "🐛 곤충 이름(영문)"),
+    ("category", "곤충_종류", "📚 곤충 종류"),
+    ("appearance", "특별한_모습", "✨ 특별한 모습"),
+    ("habitat", "서식지", "🏡 어디에 살까"),
+    ("food", "먹이", "🍽️ 무엇을 먹을까"),
+    ("fun_fact", "재미있는_점", "🎯 재미있는 점"),
+    ("friendship", "친구_되는_법", "😊 친구가 되려면"),
+]
+
+# 사진 1장 분류용 Gemini 응답 스키마
+CLASSIFICATION_SCHEMA = {
+    "type": "OBJECT",
+    "properties": {name: {"type": "STRING"} for name, _, _ in STRUCTURED_FIELDS},
+    "required": [name for name, _, _ in STRUCTURED_FIELDS],
+    "propertyOrdering": [name for name, _, _ in STRUCTURED_FIELDS],
+}
+
+# 사진 여러 장 분류용 Gemini 응답 스키마 (사진 번호 포함 배열)
+MULTI_CLASSIFICATION_SCHEMA = {
+    "type": "ARRAY",
+    "items": {
+        "type": "OBJECT",
+        "properties": {
+            "image_number": {"type": "INTEGER"},
+            **CLASSIFICATION_SCHEMA["properties"],
+        },
+        "required": ["image_number", *CLASSIFICATION_SCHEMA["required"]],
+        "propertyOrdering": ["image_number", *CLASSIFICATION_SCHEMA["propertyOrdering"]],
+    },
+}
+
+# 구조화 응답 모드에서 프롬프트 뒤에 붙이는 안내
+STRUCTURED_OUTPUT_INSTRUCTION = """
+
+응답은 지정된 JSON 형식으로만 해줘. 각 항목에는 위 형식의 [ ] 안에 들어갈 내용만 넣어줘."""
+
+STRUCTURED_MULTI_OUTPUT_INSTRUCTION = """
+
+응답은 사진마다 image_number(사진 번호)를 포함한 JSON 배열로만 해줘. 각 항목에는 위 형식의 [ ] 안에 들어갈 내용만 넣어줘."""
+
+# 분류와 함께 만드는 음성용 요약 필드 (분류+요약 통합 모드)
+VOICE_SUMMARY_FIELD = ("voice_summary", "음성_요약", "🎤 음성 요약")
+
+# 분류+요약 통합 모드에서 프롬프트 뒤에 붙이는 안내
+COMBINED_SUMMARY_INSTRUCTION = """
+
+그리고 이 곤충 이야기를 어린이들이 듣기 좋은 음성용 요약으로도 만들어줘:
+- "안녕 친구들!" 같은 인사말로 시작하는 친근한 말투
+- 1분 내외로 읽을 수 있는 길이 (약 200-300자)
+- 가장 흥미로운 특징 3-4가지와 마지막 격려나 응원의 메시지 포함
+- 이모티콘은 넣지 않기"""
+
+# 분류+요약 통합 모드 + 텍스트 응답일 때 요약 위치 안내
+COMBINED_SUMMARY_TEXT_FORMAT = """
+요약은 설명 마지막 줄에 "🎤 음성 요약: [요약 내용]" 형식으로 적어줘."""
+
+# 여러 장 응답에서 사진별 구역을 나누는 헤더 패턴
+MULTI_SECTION_PATTERN = re.compile(r"={2,}\s*사진\s*(\d+)\s*={2,}")
+
+try:
+    import onnxruntime as ort
+    ONNXRUNTIME_AVAILABLE = True
+except ImportError:
+    ONNXRUNTIME_AVAILABLE = False
 
 class InsectClassifier:
     """
@@ -48,6 +161,42 @@ class InsectClassifier:
             self.headers = None
             print("경고: GEMINI_API_KEY가 설정되지 않았습니다. 더미 모드로 실행됩니다.")
         
+        # 공유 커넥션 풀을 사용하는 비동기 Gemini 클라이언트
+        self.gemini_client = GeminiClient(self.base_url, api_key=self.api_key)
+        
+        # 이미지 다이제스트 기반 분류 결과 캐시 (메모리 LRU + 디스크)
+        self.cache = ClassificationCache(
+            cache_dir=settings.CLASSIFICATION_CACHE_DIR,
+            max_memory_entries=settings.CLASSIFICATION_CACHE_MEMORY_SIZE,
+            enabled=settings.CLASSIFICATION_CACHE_ENABLED,
+            max_disk_entries=settings.CLASSIFICATION_CACHE_DISK_MAX_ENTRIES
+        )
+        
+        # 같은 내용으로 동시에 들어온 요청을 하나의 Gemini 호출로 병합
+        self.classify_flight = SingleFlight()
+        self.summary_flight = SingleFlight()
+        
+        # 음성 요약 통계 (reused: 분류 결과에 저장된 요약 재사용, generated: 별도 Gemini 요청,
+        # coalesced: 진행 중인 같은 요약 요청에 합류)
+        self.summary_stats = {"reused": 0, "generated": 0, "coalesced": 0}
+        
+        # 구조화(JSON) 응답 디코딩 통계 (fallbacks: 정규식 파서로 처리한 횟수)
+        self.structured_stats = {"decoded": 0, "fallbacks": 0}
+        
+        # 여러 장 단일 프롬프트 분류 통계
+        self.packed_stats = {"packed_calls": 0, "packed_images": 0, "fallbacks": 0}
+        
+        # 업로드 전처리 누적 통계 (전/후 바이트 수)
+        self.ingest_stats = {"images": 0, "original_bytes": 0, "processed_bytes": 0}
+        
+        # 재인코딩/리사이즈된 같은 사진을 찾기 위한 지각 해시 인덱스
+        self.phash_index = PerceptualHashIndex(
+            index_path=settings.PHASH_INDEX_PATH,
+            max_distance=settings.PHASH_MAX_DISTANCE,
+            enabled=settings.PHASH_INDEX_ENABLED,
+            max_entries=settings.PHASH_INDEX_MAX_ENTRIES
+        )
+        
         # 기존 호환성을 위한 속성들
         self.device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
         self.classes = [
@@ -71,6 +220,16 @@ class InsectClassifier:
                                std=[0.229, 0.224, 0.225])
         ])
         
+        # 로컬 CPU 분류 모델 (TorchScript 또는 ONNX, 없으면 Gemini만 사용)
+        # 로딩은 서버 시작 후 백그라운드에서 수행 (start_local_model_loading), 그동안은 Gemini로 분류
+        self.local_model = None
+        self.local_backend = None
+        self.local_stats = {"answered": 0, "escalated": 0}
+        self.local_model_path = os.path.join(settings.MODEL_PATH, settings.CLASSIFICATION_MODEL)
+        local_available = settings.LOCAL_CLASSIFIER_ENABLED and os.path.exists(self.local_model_path)
+        self.local_status = ModelStatus("local_classifier", "pending" if local_available else "disabled")
+        self._local_load_task = None
+        
         print(f"곤충 분류 모델이 초기화되었습니다. API 키 상태: {'설정됨' if self.api_key else '미설정'}")
     
     def set_api_key(self, api_key: str):
@@ -90,15 +249,126 @@ class InsectClassifier:
         else:
             self.headers = None
             print("API 키가 해제되었습니다.")
+        self.gemini_client.set_api_key(api_key)
+
+    async def close(self):
+        """
+        Gemini 커넥션 풀 종료 (서버 종료 시 호출)
+        """
+        await self.gemini_client.aclose()
+
+    def start_local_model_loading(self):
+        """
+        로컬 분류 모델 로딩을 백그라운드 작업으로 시작 (서버 시작 이벤트에서 호출)
+        """
+        if self.local_status.state != "pending" or self._local_load_task is not None:
+            return
+        self._local_load_task = asyncio.create_task(self._load_local_model())
+
+    async def _load_local_model(self):
+        """별도 스레드에서 로컬 분류 모델 로딩 후 상태 기록"""
+        self.local_status.mark("loading")
+        await asyncio.to_thread(self.load_model, self.local_model_path)
+        if self.local_model is not None:
+            self.local_status.mark("ready")
+        else:
+            self.local_status.mark("failed", "로컬 분류 모델 로딩 실패 (Gemini로만 분류)")
+
+    def get_status(self) -> Dict:
+        """
+        /health 응답용 분류기 상태 (Gemini 분류는 API 키만 있으면 바로 사용 가능)
+        """
+        return {
+            "state": "ready" if self.api_key else "no_api_key",
+            "local_model": self.local_status.to_dict()
+        }
 
     def load_model(self, model_path: str):
         """
-        호환성을 위한 함수 (Gemini API 사용 시 불필요)
+        로컬 CPU 분류 모델 로딩
+        .onnx 파일은 ONNX Runtime, 그 외(.pt/.pth)는 TorchScript로 로드
+        모델 출력은 self.classes 순서의 로짓이어야 합니다.
         
         Args:
             model_path: 모델 파일 경로
         """
-        print(f"Gemini API 기반 분류기는 별도 모델 로딩이 불필요합니다.")
+        try:
+            if model_path.endswith(".onnx"):
+                if not ONNXRUNTIME_AVAILABLE:
+                    print("onnxruntime 패키지가 설치되지 않았습니다. pip install onnxruntime")
+                    return
+                options = ort.SessionOptions()
+                options.intra_op_num_threads = settings.LOCAL_CLASSIFIER_THREADS
+                self.local_model = ort.InferenceSession(
+                    model_path, sess_options=options, providers=["CPUExecutionProvider"]
+                )
+                self.local_backend = "onnx"
+            else:
+                # torch 스레드 수는 프로세스 전체 설정이라 생성 파이프라인 튜닝을 덮어쓰지 않도록 건드리지 않음
+                self.local_model = torch.jit.load(model_path, map_location="cpu")
+                self.local_model.eval()
+                self.local_backend = "torchscript"
+            print(f"로컬 분류 모델 로딩 완료 ({self.local_backend}): {model_path}")
+        except Exception as e:
+            self.local_model = None
+            self.local_backend = None
+            print(f"로컬 분류 모델 로딩 실패: {e}")
+    
+    def _predict_local(self, image_bytes: bytes) -> Dict:
+        """
+        로컬 모델로 곤충 분류 (CPU, 동기 실행)
+        
+        Args:
+            image_bytes: 이미지 바이트
+            
+        Returns:
+            예측 결과 딕셔너리 (상위 3개 클래스 포함)
+        """
+        start_time = time.time()
+        image = Image.open(io.BytesIO(image_bytes))
+        image.draft("RGB", (256, 256))
+        tensor = self.transform(image.convert("RGB")).unsqueeze(0)
+        
+        if self.local_backend == "onnx":
+            input_name = self.local_model.get_inputs()[0].name
+            logits = torch.from_numpy(self.local_model.run(None, {input_name: tensor.numpy()})[0])
+        else:
+            with torch.inference_mode():
+                logits = self.local_model(tensor)
+        
+        probabilities = torch.softmax(logits[0].float(), dim=0)
+        top_probs, top_indices = torch.topk(probabilities, k=min(3, len(self.classes)))
+        predictions = [
+            {"class": self.classes[idx], "confidence": round(prob, 3)}
+            for prob, idx in zip(top_probs.tolist(), top_indices.tolist())
+        ]
+        
+        return {
+            "predicted_class": predictions[0]["class"],
+            "confidence": predictions[0]["confidence"],
+            "all_predictions": predictions,
+            "processing_time": f"{time.time() - start_time:.3f}초 (로컬 CPU)",
+            "model_version": f"local-{self.local_backend}",
+            "status": "success"
+        }
+    
+    async def classify_local(self, image_bytes: bytes) -> Optional[Dict]:
+        """
+        로컬 모델 분류 (스레드에서 실행, 모델이 없거나 실패하면 None)
+        
+        Args:
+            image_bytes: 이미지 바이트
+            
+        Returns:
+            Optional[Dict]: 예측 결과
+        """
+        if self.local_model is None:
+            return None
+        try:
+            return await asyncio.to_thread(self._predict_local, image_bytes)
+        except Exception as e:
+            print(f"로컬 분류 중 오류: {e}")
+            return None
     
     def encode_image_to_base64(self, image_bytes: bytes) -> Optional[str]:
         """
@@ -137,6 +407,44 @@ class InsectClassifier:
         }
         return mime_types.get(extension, 'image/jpeg')
     
+    async def prepare_upload_image(self, image_bytes: bytes, filename: str) -> Tuple[bytes, str]:
+        """
+        Gemini 업로드용 이미지 전처리 (EXIF 방향 적용, 축소, 재인코딩)
+        전처리에 실패하면 원본을 그대로 사용
+        
+        Args:
+            image_bytes (bytes): 원본 이미지 바이트
+            filename (str): 파일명
+            
+        Returns:
+            Tuple[bytes, str]: (업로드할 이미지 바이트, MIME 타입)
+        """
+        if not settings.INGEST_ENABLED:
+            return image_bytes, self.get_image_mime_type(filename)
+        
+        try:
+            processed, mime_type, stats = await asyncio.to_thread(
+                prepare_image_for_upload,
+                image_bytes,
+                max_long_edge=settings.INGEST_MAX_LONG_EDGE,
+                output_format=settings.INGEST_FORMAT,
+                quality=settings.INGEST_QUALITY,
+                max_bytes=settings.INGEST_MAX_BYTES
+            )
+        except Exception as e:
+            print(f"이미지 전처리 실패 (원본 사용): {e}")
+            return image_bytes, self.get_image_mime_type(filename)
+        
+        self.ingest_stats["images"] += 1
+        self.ingest_stats["original_bytes"] += stats["original_bytes"]
+        self.ingest_stats["processed_bytes"] += stats["processed_bytes"]
+        print(
+            f"이미지 전처리: {stats['original_bytes']:,} → {stats['processed_bytes']:,} bytes "
+            f"({stats['original_size'][0]}x{stats['original_size'][1]} → "
+            f"{stats['processed_size'][0]}x{stats['processed_size'][1]}, {stats['processing_ms']}ms)"
+        )
+        return processed, mime_type
+    
     def preprocess_image(self, image_path: str) -> torch.Tensor:
         """
         호환성을 위한 이미지 전처리 함수
@@ -159,6 +467,181 @@ class InsectClassifier:
         except Exception as e:
             raise Exception(f"이미지 전처리 중 오류 발생: {e}")
 
+    def _build_classification_prompt(self, count: Optional[int] = None) -> str:
+        """
+        분류 프롬프트 생성 (구조화 응답/분류+요약 통합 모드 안내 포함)
+        
+        Args:
+            count: 여러 장을 한 번에 분류할 때 사진 수 (None이면 1장)
+            
+        Returns:
+            str: 프롬프트 텍스트
+        """
+        if count is None:
+            prompt = KID_FRIENDLY_PROMPT
+        else:
+            prompt = KID_FRIENDLY_MULTI_PROMPT.format(count=count)
+        
+        if settings.GEMINI_COMBINED_SUMMARY:
+            prompt += COMBINED_SUMMARY_INSTRUCTION
+            if not settings.GEMINI_STRUCTURED_OUTPUT:
+                prompt += COMBINED_SUMMARY_TEXT_FORMAT
+        
+        if settings.GEMINI_STRUCTURED_OUTPUT:
+            prompt += STRUCTURED_OUTPUT_INSTRUCTION if count is None else STRUCTURED_MULTI_OUTPUT_INSTRUCTION
+        return prompt
+    
+    def _classification_schema(self, multi: bool = False) -> Dict[str, Any]:
+        """
+        분류 응답 스키마 반환 (통합 요약 모드면 voice_summary 필드 추가)
+        
+        Args:
+            multi: 여러 장 분류용 배열 스키마 여부
+            
+        Returns:
+            Dict[str, Any]: Gemini 응답 스키마
+        """
+        schema = MULTI_CLASSIFICATION_SCHEMA if multi else CLASSIFICATION_SCHEMA
+        if not settings.GEMINI_COMBINED_SUMMARY:
+            return schema
+        
+        name = VOICE_SUMMARY_FIELD[0]
+        target = dict(schema["items"] if multi else schema)
+        target["properties"] = {**target["properties"], name: {"type": "STRING"}}
+        target["required"] = [*target["required"], name]
+        target["propertyOrdering"] = [*target["propertyOrdering"], name]
+        return {**schema, "items": target} if multi else target
+    
+    def _cache_namespace(self) -> str:
+        """분류 캐시 키 구분자 (통합 요약 모드는 요약이 포함된 결과를 따로 저장)"""
+        return "kids-voice" if settings.GEMINI_COMBINED_SUMMARY else "kids"
+    
+    def _structured_generation_config(self, schema: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        구조화(JSON) 응답을 요청하는 generationConfig 생성
+        
+        Args:
+            schema: Gemini 응답 스키마
+            
+        Returns:
+            Dict[str, Any]: generationConfig
+        """
+        return {
+            "responseMimeType": "application/json",
+            "responseSchema": schema
+        }
+    
+    def _fields_from_json(self, data: Any) -> Optional[Dict[str, str]]:
+        """JSON 객체를 parsed_data 형식으로 변환 (형식이 맞지 않으면 None)"""
+        if not isinstance(data, dict):
+            return None
+        parsed_data = {}
+        for name, key, _ in STRUCTURED_FIELDS:
+            value = data.get(name)
+            # null은 텍스트 파싱과 같이 빈 값으로 처리 ("None"이 화면 / 음성에 나오지 않도록)
+            if value is None:
+                parsed_data[key] = ""
+            else:
+                parsed_data[key] = value.strip() if isinstance(value, str) else str(value)
+        if not any(parsed_data.values()):
+            return None
+        
+        name, key, _ = VOICE_SUMMARY_FIELD
+        if isinstance(data.get(name), str) and data[name].strip():
+            parsed_data[key] = data[name].strip()
+        return parsed_data
+    
+    def decode_structured_response(self, response_text: str) -> Optional[Dict[str, str]]:
+        """
+        구조화(JSON) 응답을 parsed_data로 변환
+        
+        Args:
+            response_text (str): Gemini API 응답 텍스트 (JSON)
+            
+        Returns:
+            Optional[Dict[str, str]]: 파싱된 데이터 (JSON이 아니거나 형식이 다르면 None)
+        """
+        try:
+            return self._fields_from_json(json.loads(response_text))
+        except (ValueError, TypeError):
+            return None
+    
+    def decode_structured_multi_response(self, response_text: str) -> Optional[Dict[int, Dict[str, str]]]:
+        """
+        여러 장 구조화(JSON 배열) 응답을 사진 번호별 parsed_data로 변환
+        
+        Args:
+            response_text (str): Gemini API 응답 텍스트 (JSON 배열)
+            
+        Returns:
+            Optional[Dict[int, Dict[str, str]]]: 사진 번호(1부터) → 파싱된 데이터
+        """
+        try:
+            items = json.loads(response_text)
+        except (ValueError, TypeError):
+            return None
+        if not isinstance(items, list):
+            return None
+        
+        decoded = {}
+        for item in items:
+            parsed_data = self._fields_from_json(item)
+            if parsed_data is None:
+                continue
+            try:
+                number = int(item.get("image_number"))
+            except (TypeError, ValueError):
+                continue
+            decoded.setdefault(number, parsed_data)
+        return decoded or None
+    
+    def format_classification_text(self, parsed_data: Dict[str, str]) -> str:
+        """
+        parsed_data를 기존 응답과 같은 형식의 텍스트로 변환
+        구조화 응답 모드에서도 classification 필드를 사람이 읽을 수 있게 유지
+        
+        Args:
+            parsed_data (Dict[str, str]): 파싱된 곤충 정보
+            
+        Returns:
+            str: "🐛 곤충 이름: ..." 형식의 텍스트
+        """
+        lines = [f"{label}: {parsed_data.get(key, '')}" for _, key, label in STRUCTURED_FIELDS]
+        _, key, label = VOICE_SUMMARY_FIELD
+        if parsed_data.get(key):
+            lines.append(f"{label}: {parsed_data[key]}")
+        return "\n".join(lines)
+    
+    def parse_response_content(self, content: str) -> Tuple[str, Dict[str, str]]:
+        """
+        분류 응답을 (classification 텍스트, parsed_data)로 변환
+        구조화 응답 모드면 JSON을 바로 사용하고, 실패하면 정규식 파서로 처리
+        
+        Args:
+            content (str): Gemini API 응답 텍스트
+            
+        Returns:
+            Tuple[str, Dict[str, str]]: (classification 텍스트, 파싱된 데이터)
+        """
+        if settings.GEMINI_STRUCTURED_OUTPUT:
+            parsed_data = self.decode_structured_response(content)
+            if parsed_data is not None:
+                self.structured_stats["decoded"] += 1
+                return self.format_classification_text(parsed_data), parsed_data
+            self.structured_stats["fallbacks"] += 1
+        parsed_data = self.parse_classification_response(content)
+        if settings.GEMINI_COMBINED_SUMMARY:
+            self._attach_text_voice_summary(content, parsed_data)
+        return content, parsed_data
+    
+    def _attach_text_voice_summary(self, response_text: str, parsed_data: Dict[str, str]):
+        """텍스트 응답의 "🎤 음성 요약:" 줄을 parsed_data에 추가 (있는 경우)"""
+        match = re.search(r"🎤\s*음성\s*요약\s*:\s*(.+)", response_text, re.DOTALL)
+        if match:
+            summary = match.group(1).strip()
+            bracket_match = re.fullmatch(r"\[([^\]]+)\]", summary)
+            parsed_data[VOICE_SUMMARY_FIELD[1]] = bracket_match.group(1).strip() if bracket_match else summary
+    
     def parse_classification_response(self, response_text: str) -> Dict[str, str]:
         """
         분류 응답에서 특정 섹션의 내용을 추출
@@ -180,7 +663,7 @@ class InsectClassifier:
             "서식지": r"🏡\s*어디에\s*살까\s*:\s*(.+?)(?=🍽️|$)",
             "먹이": r"🍽️\s*무엇을\s*먹을까\s*:\s*(.+?)(?=🎯|$)",
             "재미있는_점": r"🎯\s*재미있는\s*점\s*:\s*(.+?)(?=😊|$)",
-            "친구_되는_법": r"😊\s*친구가\s*되려면\s*:\s*(.+?)(?=\n\n|$)"
+            "친구_되는_법": r"😊\s*친구가\s*되려면\s*:\s*(.+?)(?=\n\n|🎤|$)"
         }
         
         for key, pattern in patterns.items():
@@ -227,14 +710,23 @@ class InsectClassifier:
             분류 결과 딕셔너리
         """
         try:
-            # Gemini API가 설정되어 있으면 실제 분류 수행
+            # 이미지 파일 읽기
+            with open(image_path, 'rb') as f:
+                image_bytes = f.read()
+            
+            # 1단계: 로컬 CPU 모델 (확신도가 높으면 바로 응답)
+            local_result = await self.classify_local(image_bytes)
+            if local_result and local_result["confidence"] >= settings.LOCAL_CONFIDENCE_THRESHOLD:
+                self.local_stats["answered"] += 1
+                return local_result
+            
+            # 2단계: 확신도가 낮으면 Gemini API로 분류 수행
             if self.api_key and self.headers:
-                # 이미지 파일 읽기
-                with open(image_path, 'rb') as f:
-                    image_bytes = f.read()
+                if local_result:
+                    self.local_stats["escalated"] += 1
                 
                 # Gemini API로 분류 수행
-                result = self.classify_insect_for_kids(image_bytes, os.path.basename(image_path))
+                result = await self.classify_insect_for_kids(image_bytes, os.path.basename(image_path))
                 
                 # 기존 형식에 맞춰 결과 변환
                 if "success" in result and result["success"]:
@@ -248,6 +740,9 @@ class InsectClassifier:
                         "model_version": "Gemini-2.0-flash",
                         "status": "success"
                     }
+                elif local_result:
+                    # Gemini 실패 시 로컬 예측이라도 반환
+                    return local_result
                 else:
                     return {
                         "predicted_class": "분류 실패",
@@ -255,17 +750,21 @@ class InsectClassifier:
                         "error": result.get("error", "알 수 없는 오류"),
                         "status": "error"
                     }
+            elif local_result:
+                # 오프라인 모드: API 키가 없으면 로컬 예측 반환
+                return local_result
             else:
-                # API 키가 없으면 더미 결과 생성
+                # API 키와 로컬 모델이 모두 없으면 더미 결과 생성
                 result = await self._generate_dummy_result()
                 return result
             
         except Exception as e:
             raise Exception(f"곤충 분류 중 오류 발생: {e}")
 
-    def create_summary_for_voice(self, insect_data: Dict[str, str]) -> str:
+    async def create_summary_for_voice(self, insect_data: Dict[str, str]) -> str:
         """
         곤충 정보를 음성용 요약 텍스트로 변환
+        같은 곤충 정보로 동시에 들어온 요청은 하나의 요약 작업을 함께 기다림
         
         Args:
             insect_data (Dict[str, str]): 파싱된 곤충 정보
@@ -273,6 +772,30 @@ class InsectClassifier:
         Returns:
             str: 음성용 요약 텍스트
         """
+        # 분류+요약 통합 모드로 이미 만들어진 요약이 있으면 Gemini 호출 없이 사용
+        stored_summary = insect_data.get(VOICE_SUMMARY_FIELD[1])
+        if isinstance(stored_summary, str) and stored_summary.strip():
+            self.summary_stats["reused"] += 1
+            return stored_summary.strip()
+        
+        summary_key = hashlib.sha256(
+            json.dumps(insect_data, sort_keys=True, ensure_ascii=False).encode("utf-8")
+        ).hexdigest()
+        if self.summary_flight.is_running(summary_key):
+            self.summary_stats["coalesced"] += 1
+        return await self.summary_flight.run(summary_key, self._create_summary_for_voice, insect_data)
+    
+    async def _create_summary_for_voice(self, insect_data: Dict[str, str]) -> str:
+        """
+        음성용 요약 실제 처리 (Gemini 호출)
+        
+        Args:
+            insect_data (Dict[str, str]): 파싱된 곤충 정보
+            
+        Returns:
+            str: 음성용 요약 텍스트
+        """
+        self.summary_stats["generated"] += 1
         # 이미지를 base64로 인코딩 (더미 이미지 데이터)
         summary_prompt = f"""다음 곤충 정보를 바탕으로 어린이들이 듣기 좋은 1분 내외의 재미있는 이야기로 요약해주세요.
 
@@ -311,11 +834,10 @@ class InsectClassifier:
         }
         
         try:
-            # API 호출
-            response = requests.post(
-                self.base_url,
-                headers=self.headers,
-                data=json.dumps(payload)
+            # API 호출 (공유 커넥션 풀, 요약 전용 타임아웃)
+            response = await self.gemini_client.generate_content(
+                payload,
+                timeout=settings.GEMINI_SUMMARY_TIMEOUT
             )
             
             if response.status_code == 200:
@@ -334,43 +856,73 @@ class InsectClassifier:
             print(f"요약 생성 중 오류: {e}")
             return f"안녕 친구들! 오늘은 {insect_data.get('곤충_이름', '신기한 곤충')} 친구를 만나보자!"
 
-    def classify_insect_for_kids(self, image_bytes: bytes, filename: str) -> Dict[str, Any]:
+    async def classify_insect_for_kids(self, image_bytes: bytes, filename: str) -> Dict[str, Any]:
         """
         어린이를 위한 곤충 분류 및 설명 제공
+        같은 이미지로 동시에 들어온 요청은 하나의 분류 작업을 함께 기다림
+        
+        Args:
+            image_bytes (bytes): 분석할 이미지 바이트
+            filename (str): 파일명
+            
+        Returns:
+            Dict[str, Any]: 분류 결과와 설명
+        """
+        cache_key = self.cache.make_key(image_bytes, self._cache_namespace())
+        result = await self.classify_flight.run(
+            cache_key, self._classify_insect_for_kids, image_bytes, filename, cache_key
+        )
+        # 병합된 호출도 자신의 파일명으로 응답
+        return {**result, "filename": filename} if result.get("success") else result
+    
+    async def _classify_insect_for_kids(self, image_bytes: bytes, filename: str, cache_key: str) -> Dict[str, Any]:
+        """
+        어린이용 분류 실제 처리 (캐시 조회 → Gemini 호출)
         
         Args:
             image_bytes (bytes): 분석할 이미지 바이트
             filename (str): 파일명
+            cache_key (str): 이미지 다이제스트 캐시 키
             
         Returns:
             Dict[str, Any]: 분류 결과와 설명
         """
+        # 같은(또는 거의 같은) 이미지의 분류 결과가 있으면 네트워크 호출 없이 반환
+        cached, image_hash = await self._lookup_cached_result(cache_key, image_bytes)
+        if cached is not None:
+            return self._cached_response(cached, filename)
+        
+        return await self._request_classification(image_bytes, filename, cache_key, image_hash)
+    
+    async def _request_classification(
+        self,
+        image_bytes: bytes,
+        filename: str,
+        cache_key: str,
+        image_hash: Optional[int]
+    ) -> Dict[str, Any]:
+        """
+        Gemini API로 사진 1장 분류 (캐시 조회 이후 단계)
+        
+        Args:
+            image_bytes (bytes): 분석할 이미지 바이트
+            filename (str): 파일명
+            cache_key (str): 결과를 저장할 캐시 키
+            image_hash (Optional[int]): 지각 해시 (인덱스 등록용)
+            
+        Returns:
+            Dict[str, Any]: 분류 결과와 설명
+        """
+        # 업로드 전 축소/재인코딩으로 전송량 감소
+        upload_bytes, mime_type = await self.prepare_upload_image(image_bytes, filename)
+        
         # 이미지를 base64로 인코딩
-        encoded_image = self.encode_image_to_base64(image_bytes)
+        encoded_image = self.encode_image_to_base64(upload_bytes)
         if not encoded_image:
             return {"error": "이미지를 읽을 수 없습니다."}
         
-        # MIME 타입 결정
-        mime_type = self.get_image_mime_type(filename)
-        
-        # 어린이용 프롬프트
-        kid_friendly_prompt = """안녕! 나는 곤충 박사야! 🐛 
-이 사진에 있는 곤충 친구를 알아보자!
-
-다음처럼 쉽고 재미있게 설명해줄게:
-
-🐛 곤충 이름: [곤충의 이름 (쉬운 한국어로)]
-🐛 곤충 이름(영문): [곤충의 이름 (영문으로)]
-📚 곤충 종류: [어떤 종류의 곤충인지 쉽게 설명]
-✨ 특별한 모습: [어떻게 생겼는지, 색깔이나 모양 등을 재미있게 설명]
-🏡 어디에 살까: [어디서 만날 수 있는지]
-🍽️ 무엇을 먹을까: [무엇을 좋아해서 먹는지]
-🎯 재미있는 점: [이 곤충의 신기하고 재미있는 특징]
-😊 친구가 되려면: [이 곤충과 친하게 지내는 방법이나 주의할 점]
-
-만약 곤충이 아니라면, "어? 이건 곤충이 아니야! 이것은 [무엇인지]이야~" 라고 친근하게 설명해줘.
-
-모든 설명은 10살 어린이가 쉽게 이해할 수 있도록 간단하고 재미있게 해줘. 무서운 표현은 피하고 긍정적이고 호기심을 자극하는 방식으로 설명해줘! 이모지도 적절히 사용해서 더 재미있게 만들어줘."""
+        # 어린이용 프롬프트 (구조화 응답/통합 요약 모드 안내 포함)
+        kid_friendly_prompt = self._build_classification_prompt()
         
         # API 요청 데이터 구성
         payload = {
@@ -391,13 +943,13 @@ class InsectClassifier:
             ]
         }
         
+        # 구조화 응답 모드: JSON 스키마로 응답 형식 지정
+        if settings.GEMINI_STRUCTURED_OUTPUT:
+            payload["generationConfig"] = self._structured_generation_config(self._classification_schema())
+        
         try:
-            # API 호출
-            response = requests.post(
-                self.base_url,
-                headers=self.headers,
-                data=json.dumps(payload)
-            )
+            # API 호출 (공유 커넥션 풀 사용)
+            response = await self.gemini_client.generate_content(payload)
             
             if response.status_code == 200:
                 result = response.json()
@@ -406,8 +958,11 @@ class InsectClassifier:
                 if 'candidates' in result and len(result['candidates']) > 0:
                     content = result['candidates'][0]['content']['parts'][0]['text']
                     
-                    # 응답 파싱해서 구조화된 데이터 생성
-                    parsed_data = self.parse_classification_response(content)
+                    # 응답 파싱해서 구조화된 데이터 생성 (JSON 우선, 실패 시 정규식)
+                    content, parsed_data = self.parse_response_content(content)
+                    
+                    # 성공한 결과만 캐시에 저장
+                    await self._store_result(cache_key, image_hash, content, parsed_data)
                     
                     return {
                         "success": True,
@@ -426,6 +981,214 @@ class InsectClassifier:
         except Exception as e:
             return {"error": f"요청 중 오류 발생: {str(e)}"}
     
+    async def classify_insects_for_kids_batch(self, images: List[Tuple[bytes, str]]) -> List[Dict[str, Any]]:
+        """
+        여러 장의 사진을 하나의 generateContent 호출로 분류
+        긴 어린이용 프롬프트와 요청 오버헤드를 여러 장이 나눠 씀
+        응답에서 사진별 구역을 파싱하지 못한 사진은 1장씩 다시 분류
+        
+        Args:
+            images (List[Tuple[bytes, str]]): (이미지 바이트, 파일명) 목록
+            
+        Returns:
+            List[Dict[str, Any]]: 입력 순서대로의 분류 결과 (classify_insect_for_kids와 같은 형식)
+        """
+        results: List[Optional[Dict[str, Any]]] = [None] * len(images)
+        pending = []
+        
+        # 캐시에 있는 사진은 바로 처리
+        for index, (image_bytes, filename) in enumerate(images):
+            cache_key = self.cache.make_key(image_bytes, self._cache_namespace())
+            cached, image_hash = await self._lookup_cached_result(cache_key, image_bytes)
+            if cached is not None:
+                results[index] = self._cached_response(cached, filename)
+            else:
+                pending.append((index, image_bytes, filename, cache_key, image_hash))
+        
+        # 나머지는 MULTI_IMAGE_BATCH_SIZE장씩 묶어서 한 번에 요청
+        batch_size = max(1, settings.MULTI_IMAGE_BATCH_SIZE)
+        for start in range(0, len(pending), batch_size):
+            chunk = pending[start:start + batch_size]
+            packed = await self._request_packed_classification(chunk) if len(chunk) > 1 else {}
+            
+            fallback = []
+            for index, image_bytes, filename, cache_key, image_hash in chunk:
+                if index in packed:
+                    results[index] = packed[index]
+                else:
+                    fallback.append((index, image_bytes, filename, cache_key, image_hash))
+            
+            if fallback and len(chunk) > 1:
+                self.packed_stats["fallbacks"] += len(fallback)
+                print(f"여러 장 분류 응답 파싱 실패: {len(fallback)}장을 개별 요청으로 다시 분류합니다.")
+            
+            fallback_results = await asyncio.gather(*[
+                self._request_classification(image_bytes, filename, cache_key, image_hash)
+                for _, image_bytes, filename, cache_key, image_hash in fallback
+            ])
+            for (index, *_), result in zip(fallback, fallback_results):
+                results[index] = result
+        
+        return results
+    
+    async def _request_packed_classification(self, chunk: List[Tuple]) -> Dict[int, Dict[str, Any]]:
+        """
+        사진 여러 장을 하나의 프롬프트로 분류
+        
+        Args:
+            chunk: (index, 이미지 바이트, 파일명, 캐시 키, 지각 해시) 목록
+            
+        Returns:
+            Dict[int, Dict[str, Any]]: 파싱에 성공한 사진의 index → 분류 결과
+        """
+        uploads = await asyncio.gather(*[
+            self.prepare_upload_image(image_bytes, filename)
+            for _, image_bytes, filename, _, _ in chunk
+        ])
+        
+        parts = [{"text": self._build_classification_prompt(count=len(chunk))}]
+        for number, (upload_bytes, mime_type) in enumerate(uploads, start=1):
+            encoded_image = self.encode_image_to_base64(upload_bytes)
+            if not encoded_image:
+                return {}
+            parts.append({"text": f"사진 {number}"})
+            parts.append({
+                "inline_data": {
+                    "mime_type": mime_type,
+                    "data": encoded_image
+                }
+            })
+        
+        payload = {"contents": [{"parts": parts}]}
+        if settings.GEMINI_STRUCTURED_OUTPUT:
+            payload["generationConfig"] = self._structured_generation_config(self._classification_schema(multi=True))
+        
+        try:
+            response = await self.gemini_client.generate_content(
+                payload,
+                timeout=settings.GEMINI_TIMEOUT * 2
+            )
+            if response.status_code != 200:
+                print(f"여러 장 분류 API 호출 실패: {response.status_code}")
+                return {}
+            result = response.json()
+            content = result['candidates'][0]['content']['parts'][0]['text']
+        except Exception as e:
+            print(f"여러 장 분류 요청 중 오류: {e}")
+            return {}
+        
+        self.packed_stats["packed_calls"] += 1
+        self.packed_stats["packed_images"] += len(chunk)
+        
+        # 구조화 응답이면 JSON 배열을 바로 사용, 아니면 "=== 사진 N ===" 구역 분리
+        structured = self.decode_structured_multi_response(content) if settings.GEMINI_STRUCTURED_OUTPUT else None
+        if structured is not None:
+            self.structured_stats["decoded"] += 1
+        else:
+            if settings.GEMINI_STRUCTURED_OUTPUT:
+                self.structured_stats["fallbacks"] += 1
+            sections = self.split_multi_image_response(content)
+        
+        packed = {}
+        for number, (index, _, filename, cache_key, image_hash) in enumerate(chunk, start=1):
+            if structured is not None:
+                parsed_data = structured.get(number)
+                if not parsed_data:
+                    continue
+                section = self.format_classification_text(parsed_data)
+            else:
+                section = sections.get(number)
+                if not section:
+                    continue
+                parsed_data = self.parse_classification_response(section)
+                if settings.GEMINI_COMBINED_SUMMARY:
+                    self._attach_text_voice_summary(section, parsed_data)
+                # 필드가 모두 비어 있고 "곤충이 아니야" 안내도 없으면 파싱 실패로 간주
+                if not any(parsed_data.values()) and "곤충이 아니" not in section:
+                    continue
+            await self._store_result(cache_key, image_hash, section, parsed_data)
+            packed[index] = {
+                "success": True,
+                "classification": section,
+                "parsed_data": parsed_data,
+                "filename": filename,
+                "packed": True
+            }
+        return packed
+    
+    def split_multi_image_response(self, response_text: str) -> Dict[int, str]:
+        """
+        여러 장 분류 응답을 "=== 사진 N ===" 헤더 기준으로 사진별 구역으로 분리
+        
+        Args:
+            response_text (str): Gemini API 응답 텍스트
+            
+        Returns:
+            Dict[int, str]: 사진 번호(1부터) → 해당 구역 텍스트
+        """
+        sections = {}
+        matches = list(MULTI_SECTION_PATTERN.finditer(response_text))
+        for i, match in enumerate(matches):
+            end = matches[i + 1].start() if i + 1 < len(matches) else len(response_text)
+            number = int(match.group(1))
+            if number not in sections:
+                sections[number] = response_text[match.end():end].strip()
+        return sections
+    
+    def _cached_response(self, cached: Dict, filename: str) -> Dict[str, Any]:
+        """캐시된 분류 결과를 classify_insect_for_kids 응답 형식으로 변환"""
+        return {
+            "success": True,
+            "classification": cached["classification"],
+            "parsed_data": cached["parsed_data"],
+            "filename": filename,
+            "cached": True,
+            **cached.get("match", {})
+        }
+    
+    async def _store_result(self, cache_key: str, image_hash: Optional[int], content: str, parsed_data: Dict[str, str]):
+        """성공한 분류 결과를 캐시와 지각 해시 인덱스에 저장"""
+        await self.cache.aput(cache_key, {
+            "classification": content,
+            "parsed_data": parsed_data
+        })
+        if image_hash is not None:
+            await asyncio.to_thread(self.phash_index.add, image_hash, cache_key)
+    
+    async def _lookup_cached_result(self, cache_key: str, image_bytes: bytes) -> Tuple[Optional[Dict], Optional[int]]:
+        """
+        캐시된 분류 결과 조회 (정확한 다이제스트 → 지각 해시 순)
+        
+        Args:
+            cache_key: 이미지 다이제스트 캐시 키
+            image_bytes: 이미지 바이트
+            
+        Returns:
+            Tuple[Optional[Dict], Optional[int]]: (캐시된 결과, 이미지 지각 해시)
+        """
+        cached = await self.cache.aget(cache_key)
+        if cached is not None:
+            return cached, None
+        
+        if not self.phash_index.enabled:
+            return None, None
+        
+        try:
+            image_hash = await asyncio.to_thread(compute_dhash, image_bytes)
+        except Exception as e:
+            print(f"지각 해시 계산 오류: {e}")
+            return None, None
+        
+        # 인덱스 잠금과 후보 검색이 이벤트 루프를 막지 않도록 스레드에서 조회
+        match = await asyncio.to_thread(self.phash_index.lookup, image_hash)
+        if match is not None:
+            matched_key, distance = match
+            cached = await self.cache.aget(matched_key)
+            if cached is not None:
+                return {**cached, "match": {"near_duplicate": True, "hash_distance": distance}}, image_hash
+        
+        return None, image_hash
+    
     async def _generate_dummy_result(self) -> Dict:
         """
         더미 분류 결과 생성 (개발/테스트용)
@@ -475,5 +1238,37 @@ class InsectClassifier:
             "device": str(self.device),
             "num_classes": len(self.classes),
             "input_size": "Variable (Gemini API)",
-            "model_version": "Gemini-2.0-flash" if self.api_key else "Dummy Mode"
+            "local_model": {
+                "loaded": self.local_model is not None,
+                "status": self.local_status.to_dict(),
+                "backend": self.local_backend,
+                "input_size": "224x224",
+                "confidence_threshold": settings.LOCAL_CONFIDENCE_THRESHOLD,
+                **self.local_stats
+            },
+            "model_version": "Gemini-2.0-flash" if self.api_key else "Dummy Mode",
+            "gemini_connection_pool": self.gemini_client.get_pool_info(),
+            "classification_cache": self.cache.get_stats(),
+            "perceptual_index": self.phash_index.get_stats(),
+            "request_coalescing": {
+                "classification": self.classify_flight.get_stats(),
+                "voice_summary": self.summary_flight.get_stats()
+            },
+            "voice_summary": {
+                "combined_with_classification": settings.GEMINI_COMBINED_SUMMARY,
+                **self.summary_stats
+            },
+            "structured_output": {
+                "enabled": settings.GEMINI_STRUCTURED_OUTPUT,
+                **self.structured_stats
+            },
+            "multi_image_classification": {
+                "batch_size": settings.MULTI_IMAGE_BATCH_SIZE,
+                **self.packed_stats
+            },
+            "upload_ingest": {
+                "enabled": settings.INGEST_ENABLED,
+                "max_long_edge": settings.INGEST_MAX_LONG_EDGE,
+                **self.ingest_stats
+            }
         }
@@ -0,0 +1,357 @@
+"""
+비동기 작업(Job) 관리자
+오래 걸리는 생성 요청을 작업으로 접수하고, 우선순위 순서로 백그라운드에서 처리
+
+주요 기능:
+1. 작업 접수 즉시 작업 ID 반환 (HTTP 연결을 오래 붙잡지 않음)
+2. 우선순위(high / normal / low) + 접수 순서 기반 처리
+3. 상태(queued / running / done / failed), 진행률, 대기 순번 조회
+4. 작업 종류별 처리 함수 등록 (예: character, voice)
+5. 완료된 작업 기록 개수 제한
+6. 작업 저장소(SQLite) 연동: 재시작 시 끝나지 않은 작업 재접수
+   (저장은 전용 스레드 하나에서 순서대로 처리하여 디스크가 느려도 이벤트 루프를 막지 않음)
+7. 종료 시 새 작업 접수 중단 후 진행 중 작업 완료 대기, 시간 초과 시 대기 상태로 되돌려 저장
+
+프론트엔드는 작업을 제출한 뒤 상태를 폴링하고, 완료되면 결과를 가져옵니다.
+"""
+
+import time
+import uuid
+import heapq
+import asyncio
+import itertools
+import logging
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from services.generation_batcher import QueueFullError
+from services.job_store import JobStore
+
+logger = logging.getLogger(__name__)
+
+# 우선순위 이름 → 정렬 순서 (작을수록 먼저 처리)
+JOB_PRIORITIES = {"high": 0, "normal": 1, "low": 2}
+
+# 작업 처리 함수: (작업 파라미터, 진행률 콜백) → 결과 딕셔너리
+JobHandler = Callable[[Dict[str, Any], Callable[[float], None]], Awaitable[Dict[str, Any]]]
+
+
+class JobManager:
+    """
+    우선순위 작업 큐와 작업 상태 테이블
+    """
+
+    def __init__(self, concurrency: int = 4, max_queued: int = 200, history_size: int = 1000,
+                 store: Optional[JobStore] = None):
+        """
+        작업 관리자 초기화
+
+        Args:
+            concurrency: 동시에 처리할 최대 작업 수 (생성 배치가 만들어질 수 있도록 배치 크기 이상 권장)
+            max_queued: 대기 중 작업 최대 수 (초과 시 접수 거절)
+            history_size: 보관할 완료 작업 최대 수
+            store: 작업 저장소 (None이면 메모리에만 보관)
+        """
+        self.concurrency = max(1, concurrency)
+        self.max_queued = max(1, max_queued)
+        self.history_size = max(1, history_size)
+        self.store = store
+        # 저장소 읽기 / 쓰기 전용 스레드 (하나뿐이라 작업별 저장 순서가 접수 순서대로 유지됨)
+        self._store_executor = (
+            ThreadPoolExecutor(max_workers=1, thread_name_prefix="job-store") if store is not None else None
+        )
+        self.draining = False
+        self._handlers: Dict[str, JobHandler] = {}
+        self._jobs: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._heap: List[tuple] = []
+        self._sequence = itertools.count()
+        self._available: Optional[asyncio.Condition] = None
+        self._workers: List[asyncio.Task] = []
+        self._running: Dict[str, asyncio.Task] = {}
+        self._stats = {
+            "submitted": 0, "rejected": 0, "completed": 0, "failed": 0, "restored": 0, "checkpointed": 0,
+            "store_errors": 0,
+        }
+
+    def register_handler(self, kind: str, handler: JobHandler):
+        """
+        작업 종류별 처리 함수 등록
+
+        Args:
+            kind: 작업 종류 이름 (예: "character")
+            handler: 처리 코루틴 함수
+        """
+        self._handlers[kind] = handler
+
+    def _ensure_workers(self):
+        """이벤트 루프 안에서 작업 처리 태스크를 지연 생성"""
+        if self._available is None:
+            self._available = asyncio.Condition()
+        self._workers = [task for task in self._workers if not task.done()]
+        while len(self._workers) < self.concurrency:
+            self._workers.append(asyncio.create_task(self._worker()))
+
+    async def submit(self, kind: str, params: Dict[str, Any], priority: str = "normal") -> Dict[str, Any]:
+        """
+        작업 접수
+
+        Args:
+            kind: 작업 종류
+            params: 처리 함수에 전달할 파라미터
+            priority: 우선순위 (high / normal / low)
+
+        Returns:
+            접수된 작업 정보
+
+        Raises:
+            ValueError: 알 수 없는 작업 종류 / 우선순위
+            QueueFullError: 대기 작업이 너무 많거나 서버가 종료 중인 경우
+        """
+        if self.draining:
+            self._stats["rejected"] += 1
+            raise QueueFullError("서버가 종료 중이라 새 작업을 받지 않습니다")
+        if kind not in self._handlers:
+            raise ValueError(f"지원하지 않는 작업 종류입니다: {kind}")
+        if priority not in JOB_PRIORITIES:
+            raise ValueError(f"지원하지 않는 우선순위입니다: {priority} (가능: {', '.join(JOB_PRIORITIES)})")
+        if len(self._heap) >= self.max_queued:
+            self._stats["rejected"] += 1
+            raise QueueFullError(f"작업 대기열이 가득 찼습니다 (최대 {self.max_queued}개)")
+
+        self._ensure_workers()
+        job = {
+            "job_id": uuid.uuid4().hex,
+            "kind": kind,
+            "status": "queued",
+            "priority": priority,
+            "progress": 0.0,
+            "params": params,
+            "result": None,
+            "error": None,
+            "created_at": time.time(),
+            "started_at": None,
+            "finished_at": None,
+        }
+        self._jobs[job["job_id"]] = job
+        self._persist(job)
+        self._stats["submitted"] += 1
+        await self._enqueue(job)
+        return job
+
+    async def _enqueue(self, job: Dict[str, Any]):
+        """작업을 우선순위 대기열에 넣고 처리 태스크 하나를 깨움"""
+        async with self._available:
+            heapq.heappush(self._heap, (JOB_PRIORITIES[job["priority"]], next(self._sequence), job["job_id"]))
+            self._available.notify()
+
+    def _persist(self, job: Dict[str, Any]):
+        """
+        작업 상태를 저장 스레드에 넘겨 기록 (완료를 기다리지 않음, 저장 실패는 작업 처리에 영향 없음)
+        """
+        if self.store is None:
+            return
+        # 저장 전에 상태가 다시 바뀌어도 지금 상태가 기록되도록 복사본을 넘김
+        future = self._store_executor.submit(self.store.save, dict(job))
+        future.add_done_callback(lambda done: self._log_store_error(done, f"작업 저장 실패 ({job['job_id']})"))
+
+    def _log_store_error(self, future: Future, message: str):
+        """저장 스레드 작업의 예외 기록"""
+        error = future.exception()
+        if error is not None:
+            self._stats["store_errors"] += 1
+            logger.warning(f"{message}: {error}")
+
+    async def _store_call(self, func: Callable, *args) -> Any:
+        """저장소 호출을 저장 스레드에서 실행하고 결과를 기다림 (앞서 넘긴 저장이 모두 반영된 뒤 실행)"""
+        return await asyncio.get_running_loop().run_in_executor(self._store_executor, func, *args)
+
+    async def restore(self) -> int:
+        """
+        저장소에 남아 있는 끝나지 않은 작업을 다시 대기열에 넣음 (서버 시작 시 호출)
+
+        실행 중에 프로세스가 종료된 작업은 처음부터 다시 실행합니다.
+
+        Returns:
+            재접수된 작업 수
+        """
+        if self.store is None:
+            return 0
+
+        jobs = [job for job in await self._store_call(self.store.load_unfinished) if job["kind"] in self._handlers]
+        if not jobs:
+            return 0
+
+        self._ensure_workers()
+        for job in jobs:
+            job.update(status="queued", progress=0.0, started_at=None)
+            self._jobs[job["job_id"]] = job
+            self._persist(job)
+            await self._enqueue(job)
+
+        self._stats["restored"] += len(jobs)
+        logger.info(f"끝나지 않은 작업 {len(jobs)}개를 다시 접수했습니다.")
+        return len(jobs)
+
+    async def _worker(self):
+        """대기열에서 우선순위가 가장 높은 작업을 꺼내 처리하는 루프"""
+        while True:
+            async with self._available:
+                while not self._heap or self.draining:
+                    await self._available.wait()
+                _, _, job_id = heapq.heappop(self._heap)
+
+            job = self._jobs.get(job_id)
+            if job is None or job["status"] != "queued":
+                continue
+
+            task = asyncio.create_task(self._run(job))
+            self._running[job_id] = task
+            try:
+                await asyncio.shield(task)
+            except asyncio.CancelledError:
+                if not task.done():
+                    task.cancel()
+                raise
+            finally:
+                self._running.pop(job_id, None)
+
+    async def _run(self, job: Dict[str, Any]):
+        """작업 하나 실행 후 상태 기록"""
+        job["status"] = "running"
+        job["started_at"] = time.time()
+        self._persist(job)
+
+        def on_progress(progress: float):
+            job["progress"] = round(max(job["progress"], min(progress, 1.0)), 3)
+
+        try:
+            job["result"] = await self._handlers[job["kind"]](job["params"], on_progress)
+            job["status"] = "done"
+            job["progress"] = 1.0
+            self._stats["completed"] += 1
+        except asyncio.CancelledError:
+            # 종료 대기 시간 안에 끝나지 못한 작업: 다음 시작 때 다시 실행되도록 대기 상태로 저장
+            job.update(status="queued", progress=0.0, started_at=None)
+            self._persist(job)
+            self._stats["checkpointed"] += 1
+            raise
+        except Exception as e:
+            job["status"] = "failed"
+            job["error"] = getattr(e, "detail", None) or str(e)
+            self._stats["failed"] += 1
+            logger.error(f"작업 실패 ({job['kind']} {job['job_id']}): {job['error']}")
+
+        job["finished_at"] = time.time()
+        self._persist(job)
+        self._trim_history()
+
+    def _trim_history(self):
+        """오래된 완료 작업부터 제거하여 기록 개수 제한"""
+        finished = [job_id for job_id, job in self._jobs.items() if job["status"] in ("done", "failed")]
+        for job_id in finished[:max(0, len(finished) - self.history_size)]:
+            del self._jobs[job_id]
+        if self.store is not None and len(finished) > self.history_size:
+            future = self._store_executor.submit(self.store.trim, self.history_size)
+            future.add_done_callback(lambda done: self._log_store_error(done, "완료 작업 정리 실패"))
+
+    async def drain(self, timeout: float) -> Dict[str, int]:
+        """
+        새 작업 접수를 멈추고 실행 중인 작업이 끝나기를 기다림 (서버 종료 시 호출)
+
+        시간 안에 끝나지 않은 작업은 취소하고 대기 상태로 저장하여 다음 시작 때 다시 실행합니다.
+        대기 중이던 작업은 저장소에 대기 상태로 남아 있으므로 그대로 다음 시작 때 처리됩니다.
+
+        Args:
+            timeout: 실행 중인 작업을 기다리는 최대 시간 (초)
+
+        Returns:
+            {"finished": 시간 안에 끝난 작업 수, "checkpointed": 대기 상태로 되돌린 작업 수, "queued": 남은 대기 작업 수}
+        """
+        self.draining = True
+        running = list(self._running.values())
+        logger.info(f"작업 종료 대기: 실행 중 {len(running)}개, 대기 중 {len(self._heap)}개 (최대 {timeout:.0f}초)")
+
+        finished, pending = set(), set()
+        if running:
+            finished, pending = await asyncio.wait(running, timeout=timeout)
+            for task in pending:
+                task.cancel()
+            if pending:
+                await asyncio.gather(*pending, return_exceptions=True)
+
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+
+        # 대기 상태로 되돌린 작업까지 저장이 끝나도록 저장 스레드 비우기
+        if self.store is not None:
+            await self._store_call(lambda: None)
+
+        summary = {"finished": len(finished), "checkpointed": len(pending), "queued": len(self._heap)}
+        logger.info(f"작업 종료 처리 완료: {summary}")
+        return summary
+
+    async def close(self):
+        """
+        남은 저장을 마친 뒤 저장소 연결과 저장 스레드 종료 (drain 이후 호출)
+        """
+        if self.store is None:
+            return
+        await self._store_call(self.store.close)
+        self._store_executor.shutdown(wait=True)
+
+    async def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """작업 레코드 조회 (메모리에 없으면 저장소에서, 둘 다 없으면 None)"""
+        job = self._jobs.get(job_id)
+        if job is None and self.store is not None:
+            job = await self._store_call(self.store.get, job_id)
+        return job
+
+    def position(self, job_id: str) -> Optional[int]:
+        """
+        대기 중 작업의 처리 순번 (1부터, 대기 중이 아니면 None)
+        """
+        job = self._jobs.get(job_id)
+        if job is None or job["status"] != "queued":
+            return None
+        key = next((entry for entry in self._heap if entry[2] == job_id), None)
+        if key is None:
+            return None
+        return 1 + sum(1 for entry in self._heap if entry < key)
+
+    async def describe(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """
+        상태 조회용 작업 정보 (파라미터 / 결과 본문 제외)
+        """
+        job = await self.get(job_id)
+        if job is None:
+            return None
+        return {
+            "job_id": job["job_id"],
+            "kind": job["kind"],
+            "status": job["status"],
+            "priority": job["priority"],
+            "progress": job["progress"],
+            "position": self.position(job_id),
+            "error": job["error"],
+            "created_at": job["created_at"],
+            "started_at": job["started_at"],
+            "finished_at": job["finished_at"],
+        }
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        작업 관리자 통계 반환
+        """
+        running = sum(1 for job in self._jobs.values() if job["status"] == "running")
+        return {
+            **self._stats,
+            "queued": len(self._heap),
+            "running": running,
+            "concurrency": self.concurrency,
+            "max_queued": self.max_queued,
+            "draining": self.draining,
+            "persistent": self.store is not None,
+        }
@@ -0,0 +1,154 @@
+"""
+작업(Job) 영구 저장소
+접수된 생성 / 음성 작업과 상태를 SQLite 파일에 기록
+
+주요 기능:
+1. 작업 레코드 저장 및 상태 갱신 (queued / running / done / failed)
+2. 서버 재시작 시 끝나지 않은 작업 목록 조회 (재접수용)
+3. 작업 ID로 완료된 작업 조회 (메모리 기록에서 밀려난 작업 포함)
+4. 오래된 완료 작업 정리
+
+배포나 메모리 부족으로 프로세스가 재시작되어도 접수된 작업이 사라지지 않도록 합니다.
+"""
+
+import os
+import json
+import sqlite3
+import threading
+import logging
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# 작업 레코드에서 JSON으로 저장하는 필드
+JSON_FIELDS = ("params", "result")
+
+# 작업 레코드 필드 (테이블 열 순서)
+JOB_FIELDS = (
+    "job_id", "kind", "status", "priority", "progress", "params", "result", "error",
+    "created_at", "started_at", "finished_at",
+)
+
+
+class JobStore:
+    """
+    SQLite 기반 작업 저장소
+    """
+
+    def __init__(self, path: str):
+        """
+        저장소 초기화 (파일과 테이블이 없으면 생성)
+
+        Args:
+            path: SQLite 파일 경로
+        """
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        # 이벤트 루프와 종료 처리에서 함께 쓰므로 연결 하나를 잠금으로 보호
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS jobs (
+                job_id TEXT PRIMARY KEY,
+                kind TEXT NOT NULL,
+                status TEXT NOT NULL,
+                priority TEXT NOT NULL,
+                progress REAL NOT NULL DEFAULT 0,
+                params TEXT,
+                result TEXT,
+                error TEXT,
+                created_at REAL NOT NULL,
+                started_at REAL,
+                finished_at REAL
+            )
+            """
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, created_at)")
+        self._conn.commit()
+
+    def save(self, job: Dict[str, Any]):
+        """
+        작업 레코드 저장 (있으면 덮어쓰기)
+
+        Args:
+            job: 작업 레코드
+        """
+        values = [
+            json.dumps(job[field], ensure_ascii=False) if field in JSON_FIELDS else job[field]
+            for field in JOB_FIELDS
+        ]
+        placeholders = ", ".join("?" for _ in JOB_FIELDS)
+        with self._lock:
+            self._conn.execute(f"INSERT OR REPLACE INTO jobs ({', '.join(JOB_FIELDS)}) VALUES ({placeholders})", values)
+            self._conn.commit()
+
+    def _to_job(self, row: tuple) -> Dict[str, Any]:
+        """테이블 행 → 작업 레코드"""
+        job = dict(zip(JOB_FIELDS, row))
+        for field in JSON_FIELDS:
+            job[field] = json.loads(job[field]) if job[field] else None
+        return job
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """
+        작업 레코드 조회 (없으면 None)
+        """
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT {', '.join(JOB_FIELDS)} FROM jobs WHERE job_id = ?", (job_id,)
+            ).fetchone()
+        return self._to_job(row) if row else None
+
+    def load_unfinished(self) -> List[Dict[str, Any]]:
+        """
+        끝나지 않은 작업(queued / running) 목록을 접수 순서대로 조회
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT {', '.join(JOB_FIELDS)} FROM jobs "
+                "WHERE status IN ('queued', 'running') ORDER BY created_at"
+            ).fetchall()
+        return [self._to_job(row) for row in rows]
+
+    def trim(self, history_size: int) -> int:
+        """
+        오래된 완료 작업부터 삭제하여 보관 개수 제한
+
+        Args:
+            history_size: 보관할 완료 작업 최대 수
+
+        Returns:
+            삭제된 작업 수
+        """
+        with self._lock:
+            cursor = self._conn.execute(
+                """
+                DELETE FROM jobs WHERE job_id IN (
+                    SELECT job_id FROM jobs WHERE status IN ('done', 'failed')
+                    ORDER BY finished_at DESC LIMIT -1 OFFSET ?
+                )
+                """,
+                (history_size,)
+            )
+            self._conn.commit()
+        return cursor.rowcount
+
+    def count(self) -> Dict[str, int]:
+        """
+        상태별 작업 수
+        """
+        with self._lock:
+            rows = self._conn.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall()
+        return dict(rows)
+
+    def close(self):
+        """
+        데이터베이스 연결 종료
+        """
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,247 @@
+"""
+고정(pinned) 로컬 모델 스냅샷 관리
+허브 캐시를 거치지 않고 미리 받아 둔 모델 디렉토리에서 바로 로딩하기 위한 도구
+
+주요 기능:
+1. 모델 스냅샷 내려받기 + 파일별 크기 / sha256 체크섬 매니페스트 작성 (materialize_model.py에서 사용)
+2. 서버 시작 시 매니페스트로 스냅샷 무결성 검증
+   - size: 파일 존재 여부와 크기만 확인 (서버 시작 기본값, 새 노드에서도 수 GB를 해시하지 않음)
+   - sha256: 전체 내용 해시 (검증 결과를 파일 크기 / 수정 시각과 함께 기록해 두고, 바뀌지 않았으면 다시 해시하지 않음,
+     매니페스트 작성 때 이미 해시한 파일도 기록하므로 이미지에 함께 담으면 첫 시작부터 다시 해시하지 않음)
+   - off: 검증 안 함
+3. 로컬 스냅샷이 없거나 검증에 실패하면 (설정에 따라) 허브 모델 ID로 대체
+
+네트워크가 막힌 노드에서는 허브 조회 시간 초과 없이 바로 로컬 파일을 사용합니다.
+"""
+
+import os
+import json
+import time
+import hashlib
+import logging
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# 스냅샷 디렉토리 안의 매니페스트 / 검증 기록 파일
+MANIFEST_FILENAME = "manifest.json"
+VERIFIED_FILENAME = ".manifest_verified.json"
+
+# 검증 방식
+VERIFY_MODES = ("sha256", "size", "off")
+
+# 해시 계산 시 한 번에 읽는 크기
+HASH_CHUNK_SIZE = 8 * 1024 * 1024
+
+
+class SnapshotError(Exception):
+    """로컬 스냅샷이 없거나 매니페스트와 맞지 않을 때 발생하는 예외"""
+
+
+def file_sha256(path: str) -> str:
+    """파일 내용의 sha256"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def list_snapshot_files(snapshot_dir: str) -> List[str]:
+    """
+    스냅샷의 모델 파일 목록 (상대 경로, 숨김 파일 / 폴더와 매니페스트 제외)
+    """
+    files = []
+    for root, dirs, names in os.walk(snapshot_dir):
+        dirs[:] = sorted(d for d in dirs if not d.startswith("."))
+        for name in sorted(names):
+            if name.startswith(".") or name == MANIFEST_FILENAME:
+                continue
+            files.append(os.path.relpath(os.path.join(root, name), snapshot_dir))
+    return files
+
+
+def write_manifest(snapshot_dir: str, model_id: str, revision: Optional[str] = None) -> Dict[str, Any]:
+    """
+    스냅샷 파일별 크기와 sha256으로 매니페스트 작성
+
+    Args:
+        snapshot_dir: 스냅샷 디렉토리
+        model_id: 원본 허브 모델 ID
+        revision: 내려받은 리비전 (커밋 해시 권장)
+
+    Returns:
+        작성된 매니페스트
+    """
+    files = {}
+    stamps = {}
+    for relpath in list_snapshot_files(snapshot_dir):
+        path = os.path.join(snapshot_dir, relpath)
+        files[relpath] = {"size": os.path.getsize(path), "sha256": file_sha256(path)}
+        stamps[relpath] = _file_stamp(path)
+
+    manifest = {
+        "model_id": model_id,
+        "revision": revision,
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "files": files,
+    }
+    manifest_path = os.path.join(snapshot_dir, MANIFEST_FILENAME)
+    with open(manifest_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+
+    # 방금 해시한 파일은 검증된 것으로 기록 (sha256 모드로 시작해도 다시 해시하지 않음)
+    _save_verified(snapshot_dir, file_sha256(manifest_path), stamps)
+    return manifest
+
+
+def load_manifest(snapshot_dir: str) -> Dict[str, Any]:
+    """
+    매니페스트 읽기
+
+    Raises:
+        SnapshotError: 매니페스트가 없거나 읽을 수 없는 경우
+    """
+    path = os.path.join(snapshot_dir, MANIFEST_FILENAME)
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError) as e:
+        raise SnapshotError(f"매니페스트를 읽을 수 없습니다: {path} ({e})")
+
+
+def snapshot_revision(model_source: str) -> str:
+    """
+    모델 위치의 리비전 식별자 (파생 캐시 키용)
+
+    로컬 스냅샷이면 매니페스트의 리비전, 리비전이 없으면 매니페스트 해시 앞부분을 쓰고
+    허브 ID처럼 매니페스트가 없으면 빈 문자열을 반환합니다.
+    """
+    manifest_path = os.path.join(model_source, MANIFEST_FILENAME)
+    if not os.path.isfile(manifest_path):
+        return ""
+    try:
+        revision = load_manifest(model_source).get("revision")
+        return revision or file_sha256(manifest_path)[:12]
+    except (SnapshotError, OSError) as e:
+        logger.warning(f"스냅샷 리비전을 확인할 수 없습니다: {e}")
+        return ""
+
+
+def _file_stamp(path: str) -> List[int]:
+    """검증 기록용 (크기, 수정 시각) 값"""
+    stat = os.stat(path)
+    return [stat.st_size, stat.st_mtime_ns]
+
+
+def _load_verified(snapshot_dir: str, manifest_hash: str) -> Dict[str, List[int]]:
+    """이전 sha256 검증 기록 (매니페스트가 바뀌었으면 무효)"""
+    try:
+        with open(os.path.join(snapshot_dir, VERIFIED_FILENAME), "r", encoding="utf-8") as f:
+            record = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if record.get("manifest") != manifest_hash:
+        return {}
+    return record.get("files", {})
+
+
+def _save_verified(snapshot_dir: str, manifest_hash: str, stamps: Dict[str, List[int]]):
+    """sha256 검증 기록 저장 (읽기 전용 디렉토리면 다음 시작 때 다시 해시)"""
+    path = os.path.join(snapshot_dir, VERIFIED_FILENAME)
+    try:
+        with open(f"{path}.tmp", "w", encoding="utf-8") as f:
+            json.dump({"manifest": manifest_hash, "files": stamps}, f)
+        os.replace(f"{path}.tmp", path)
+    except OSError as e:
+        logger.warning(f"스냅샷 검증 기록을 저장할 수 없습니다 (다음 시작 때 다시 해시합니다): {e}")
+
+
+def verify_snapshot(snapshot_dir: str, mode: str = "sha256") -> Dict[str, Any]:
+    """
+    매니페스트 기준 스냅샷 무결성 검증
+
+    Args:
+        snapshot_dir: 스냅샷 디렉토리
+        mode: 검증 방식 (sha256 / size / off)
+
+    Returns:
+        {"files", "hashed", "bytes_hashed", "seconds"} 검증 요약
+
+    Raises:
+        SnapshotError: 파일이 없거나 크기 / 체크섬이 다른 경우
+    """
+    if mode not in VERIFY_MODES:
+        raise ValueError(f"지원하지 않는 검증 방식입니다: {mode} (가능: {', '.join(VERIFY_MODES)})")
+
+    start_time = time.time()
+    summary = {"files": 0, "hashed": 0, "bytes_hashed": 0, "seconds": 0.0}
+    if mode == "off":
+        return summary
+
+    manifest = load_manifest(snapshot_dir)
+    manifest_hash = file_sha256(os.path.join(snapshot_dir, MANIFEST_FILENAME))
+    verified = _load_verified(snapshot_dir, manifest_hash) if mode == "sha256" else {}
+    stamps = {}
+
+    for relpath, expected in manifest.get("files", {}).items():
+        path = os.path.join(snapshot_dir, relpath)
+        if not os.path.isfile(path):
+            raise SnapshotError(f"스냅샷 파일이 없습니다: {relpath}")
+        stamp = _file_stamp(path)
+        if stamp[0] != expected["size"]:
+            raise SnapshotError(f"스냅샷 파일 크기가 다릅니다: {relpath} ({stamp[0]} != {expected['size']})")
+
+        if mode == "sha256":
+            # 이전에 같은 크기 / 수정 시각으로 검증한 파일은 다시 해시하지 않음
+            if verified.get(relpath) != stamp:
+                if file_sha256(path) != expected["sha256"]:
+                    raise SnapshotError(f"스냅샷 파일 체크섬이 다릅니다: {relpath}")
+                summary["hashed"] += 1
+                summary["bytes_hashed"] += stamp[0]
+            stamps[relpath] = stamp
+        summary["files"] += 1
+
+    if mode == "sha256" and summary["hashed"]:
+        _save_verified(snapshot_dir, manifest_hash, stamps)
+
+    summary["seconds"] = round(time.time() - start_time, 2)
+    return summary
+
+
+def is_snapshot_dir(path: str) -> bool:
+    """diffusers 파이프라인 스냅샷 디렉토리인지 여부 (model_index.json 존재)"""
+    return os.path.isfile(os.path.join(path, "model_index.json"))
+
+
+def resolve_model_source(snapshot_dir: str, hub_id: str, verify: str = "size",
+                         allow_hub_fallback: bool = True) -> str:
+    """
+    로딩할 모델 경로 결정 (검증된 로컬 스냅샷 우선, 실패 시 허브 모델 ID)
+
+    Args:
+        snapshot_dir: 고정 로컬 스냅샷 디렉토리
+        hub_id: 대체용 허브 모델 ID
+        verify: 매니페스트 검증 방식 (size / sha256 / off)
+        allow_hub_fallback: 로컬 스냅샷을 쓸 수 없을 때 허브 모델 ID 사용 여부
+
+    Returns:
+        로컬 스냅샷 디렉토리 또는 허브 모델 ID
+
+    Raises:
+        SnapshotError: 로컬 스냅샷을 쓸 수 없고 허브 대체도 허용되지 않은 경우
+    """
+    try:
+        if not is_snapshot_dir(snapshot_dir):
+            raise SnapshotError(f"로컬 모델 스냅샷이 없습니다: {snapshot_dir} (materialize_model.py로 준비)")
+        summary = verify_snapshot(snapshot_dir, verify)
+        logger.info(
+            f"로컬 모델 스냅샷 사용: {snapshot_dir} (검증 {verify}: 파일 {summary['files']}개, "
+            f"해시 {summary['hashed']}개 / {summary['bytes_hashed'] / 1024**3:.2f} GB, {summary['seconds']:.2f}초)"
+        )
+        return snapshot_dir
+    except SnapshotError as e:
+        if not allow_hub_fallback:
+            raise
+        logger.warning(f"{e} → 허브 모델 사용: {hub_id}")
+        return hub_id
@@ -0,0 +1,82 @@
+"""
+모델 로딩 상태 추적
+서버 시작 후 백그라운드에서 로딩되는 모델의 상태와 단계별 소요 시간을 기록
+
+주요 기능:
+1. 상태 전환 기록 (pending → loading → warming → ready / failed, 사용 안 함은 disabled)
+2. 단계별 소요 시간 (로딩 / warmup) 측정
+3. /health 응답용 상태 정보 제공
+
+서버는 모델 로딩을 기다리지 않고 바로 포트를 열고, 각 엔드포인트는 자기 모델 상태만 확인합니다.
+"""
+
+import time
+from typing import Any, Dict, Optional
+
+# 모델 상태 값
+MODEL_STATES = ("pending", "loading", "warming", "ready", "failed", "disabled")
+
+
+class ModelStatus:
+    """
+    모델 하나의 로딩 상태와 단계별 시간
+    """
+
+    def __init__(self, name: str, state: str = "pending"):
+        """
+        Args:
+            name: 모델 이름 (로그 / 응답 표시용)
+            state: 초기 상태
+        """
+        self.name = name
+        self.state = state
+        self.error: Optional[str] = None
+        self.started_at: Optional[float] = None
+        self.ready_at: Optional[float] = None
+        self.durations: Dict[str, float] = {}
+        self._phase_started = time.time()
+
+    def mark(self, state: str, error: Optional[str] = None):
+        """
+        상태 전환 기록 (직전 단계의 소요 시간을 함께 기록)
+
+        Args:
+            state: 새 상태 (MODEL_STATES 중 하나)
+            error: 실패 사유 (failed인 경우)
+        """
+        if state not in MODEL_STATES:
+            raise ValueError(f"알 수 없는 모델 상태입니다: {state}")
+
+        now = time.time()
+        if self.state in ("loading", "warming"):
+            self.durations[self.state] = round(now - self._phase_started, 2)
+        if state == "loading" and self.started_at is None:
+            self.started_at = now
+        if state == "ready":
+            self.ready_at = now
+
+        self.state = state
+        self.error = error
+        self._phase_started = now
+
+    @property
+    def ready(self) -> bool:
+        """요청을 처리할 수 있는 상태인지 여부"""
+        return self.state == "ready"
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        /health 응답용 상태 정보
+        """
+        info: Dict[str, Any] = {
+            "state": self.state,
+            "load_seconds": self.durations.get("loading"),
+            "warmup_seconds": self.durations.get("warming"),
+        }
+        if self.state in ("loading", "warming"):
+            info["phase_elapsed_seconds"] = round(time.time() - self._phase_started, 2)
+        if self.started_at is not None and self.ready_at is not None:
+            info["total_seconds"] = round(self.ready_at - self.started_at, 2)
+        if self.error:
+            info["error"] = self.error
+        return info
@@ -0,0 +1,251 @@
+"""
+지각 해시(Perceptual Hash) 기반 유사 이미지 인덱스
+재인코딩/리사이즈/스크린샷된 같은 곤충 사진을 찾아 분류 결과를 재사용
+
+주요 기능:
+1. Pillow + NumPy로 64비트 dHash 계산
+2. 멀티 인덱스 해싱(Multi-Index Hashing)으로 해밍 거리 임계값 이내 항목 검색
+3. 추가 전용(append-only) 파일로 인덱스 영구 저장
+   (최대 항목 수를 넘으면 오래된 항목부터 제거, 중복 / 덮어쓴 줄이 쌓이면 파일을 다시 작성)
+
+해시를 (임계값 + 1)개 조각으로 나누면, 비둘기집 원리에 의해 임계값 이내의
+해시는 적어도 한 조각이 정확히 일치합니다. 따라서 조각별 버킷만 확인하면 되어
+수십만 개 항목에서도 빠르게 검색됩니다.
+"""
+
+import os
+import io
+import uuid
+import threading
+from collections import defaultdict
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from PIL import Image, ImageOps
+
+HASH_BITS = 64
+
+
+def compute_dhash(image_bytes: bytes, hash_size: int = 8) -> int:
+    """
+    이미지 바이트로 dHash(차이 해시) 계산
+
+    Args:
+        image_bytes: 이미지 바이트 데이터
+        hash_size: 해시 한 변 크기 (8이면 64비트)
+
+    Returns:
+        int: 64비트 지각 해시
+    """
+    image = Image.open(io.BytesIO(image_bytes))
+    # JPEG는 draft 모드로 작게 디코딩하여 속도 향상
+    image.draft("L", (hash_size * 16, hash_size * 16))
+    image = ImageOps.exif_transpose(image).convert("L")
+    image = image.resize((hash_size + 1, hash_size), Image.LANCZOS)
+
+    pixels = np.asarray(image, dtype=np.int16)
+    diff = pixels[:, 1:] > pixels[:, :-1]
+
+    return int.from_bytes(np.packbits(diff.flatten()).tobytes(), "big")
+
+
+def hamming_distance(a: int, b: int) -> int:
+    """두 해시의 해밍 거리"""
+    return bin(a ^ b).count("1")
+
+
+class PerceptualHashIndex:
+    """
+    해밍 거리 임계값 검색을 위한 멀티 인덱스 해싱 인덱스
+    해시 → 분류 캐시 키를 저장합니다.
+    """
+
+    # 파일 줄 수가 항목 수의 이 배수를 넘으면 다시 작성
+    COMPACT_RATIO = 2
+
+    def __init__(self, index_path: str, max_distance: int = 4, enabled: bool = True, max_entries: int = 100000):
+        """
+        인덱스 초기화 및 저장된 항목 로드
+
+        Args:
+            index_path: 인덱스 저장 파일 경로
+            max_distance: 같은 이미지로 볼 최대 해밍 거리 (0 이상)
+            enabled: 인덱스 사용 여부
+            max_entries: 최대 항목 수 (넘으면 오래된 항목부터 제거)
+        """
+        if max_distance < 0:
+            raise ValueError(f"max_distance는 0 이상이어야 합니다: {max_distance}")
+        self.index_path = index_path
+        self.max_distance = max_distance
+        self.max_entries = max(1, max_entries)
+        self.enabled = enabled
+        self.num_chunks = max_distance + 1
+        self._chunk_ranges = self._make_chunk_ranges(self.num_chunks)
+
+        self._entries: Dict[int, str] = {}
+        self._buckets: List[Dict[int, List[int]]] = [defaultdict(list) for _ in range(self.num_chunks)]
+        self._lock = threading.Lock()
+        # 파일 추가는 별도 잠금으로 순서만 보장 (이벤트 루프에서 부르는 lookup이 디스크 쓰기를 기다리지 않도록)
+        self._file_lock = threading.Lock()
+        self._file_lines = 0
+        self._stats = {"lookups": 0, "hits": 0, "candidates_checked": 0, "evictions": 0, "compactions": 0}
+
+        if self.enabled:
+            os.makedirs(os.path.dirname(self.index_path) or ".", exist_ok=True)
+            self._load()
+
+    @staticmethod
+    def _make_chunk_ranges(num_chunks: int) -> List[Tuple[int, int]]:
+        """64비트를 num_chunks개 조각으로 나눈 (시프트, 마스크) 목록"""
+        base, extra = divmod(HASH_BITS, num_chunks)
+        ranges = []
+        shift = 0
+        for i in range(num_chunks):
+            width = base + (1 if i < extra else 0)
+            ranges.append((shift, (1 << width) - 1))
+            shift += width
+        return ranges
+
+    def _chunks(self, value: int) -> List[int]:
+        """해시를 조각 값 목록으로 분리"""
+        return [(value >> shift) & mask for shift, mask in self._chunk_ranges]
+
+    def _insert(self, value: int, key: str):
+        """
+        메모리 인덱스에 항목 추가 (잠금 보유 상태에서 호출)
+        다시 추가된 항목은 가장 최근 항목이 되고, 최대 항목 수를 넘으면 가장 오래된 항목 제거
+        """
+        if value in self._entries:
+            del self._entries[value]
+        else:
+            for i, chunk in enumerate(self._chunks(value)):
+                self._buckets[i][chunk].append(value)
+        self._entries[value] = key
+
+        while len(self._entries) > self.max_entries:
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+            self._stats["evictions"] += 1
+
+    def _remove(self, value: int):
+        """메모리 인덱스에서 항목 제거 (잠금 보유 상태에서 호출)"""
+        del self._entries[value]
+        for i, chunk in enumerate(self._chunks(value)):
+            bucket = self._buckets[i][chunk]
+            bucket.remove(value)
+            if not bucket:
+                del self._buckets[i][chunk]
+
+    def _load(self):
+        """저장 파일에서 인덱스 복원 (중복 / 덮어쓴 / 잘못된 줄이 있으면 파일 다시 작성)"""
+        if not os.path.exists(self.index_path):
+            return
+        lines = 0
+        try:
+            with open(self.index_path, "r", encoding="utf-8") as f:
+                for line in f:
+                    lines += 1
+                    parts = line.split()
+                    if len(parts) != 2:
+                        continue
+                    self._insert(int(parts[0], 16), parts[1])
+            print(f"지각 해시 인덱스 로드 완료: {len(self._entries)}개 항목")
+        except Exception as e:
+            print(f"지각 해시 인덱스 로드 오류: {e}")
+
+        self._file_lines = lines
+        if lines > len(self._entries):
+            self._compact()
+
+    def _compact(self):
+        """현재 항목만으로 인덱스 파일 다시 작성 (임시 파일에 쓴 뒤 교체)"""
+        with self._lock:
+            entries = list(self._entries.items())
+        with self._file_lock:
+            temp_path = f"{self.index_path}.{uuid.uuid4().hex[:6]}.tmp"
+            try:
+                with open(temp_path, "w", encoding="utf-8") as f:
+                    for value, key in entries:
+                        f.write(f"{value:016x} {key}\n")
+                os.replace(temp_path, self.index_path)
+                self._file_lines = len(entries)
+                self._stats["compactions"] += 1
+            except Exception as e:
+                print(f"지각 해시 인덱스 정리 오류: {e}")
+                if os.path.exists(temp_path):
+                    os.remove(temp_path)
+
+    def add(self, value: int, key: str):
+        """
+        해시 항목 추가 (메모리 + 파일)
+
+        Args:
+            value: 지각 해시
+            key: 연결할 분류 캐시 키
+        """
+        if not self.enabled:
+            return
+        with self._lock:
+            if self._entries.get(value) == key:
+                return
+            self._insert(value, key)
+
+        with self._file_lock:
+            try:
+                with open(self.index_path, "a", encoding="utf-8") as f:
+                    f.write(f"{value:016x} {key}\n")
+                self._file_lines += 1
+            except Exception as e:
+                print(f"지각 해시 인덱스 저장 오류: {e}")
+            needs_compact = self._file_lines > self.COMPACT_RATIO * max(len(self._entries), 1000)
+
+        if needs_compact:
+            self._compact()
+
+    def lookup(self, value: int) -> Optional[Tuple[str, int]]:
+        """
+        임계값 이내에서 가장 가까운 항목 검색
+
+        Args:
+            value: 조회할 지각 해시
+
+        Returns:
+            Optional[Tuple[str, int]]: (분류 캐시 키, 해밍 거리) 또는 None
+        """
+        if not self.enabled:
+            return None
+        with self._lock:
+            self._stats["lookups"] += 1
+            if value in self._entries:
+                self._stats["hits"] += 1
+                return self._entries[value], 0
+
+            best: Optional[Tuple[str, int]] = None
+            seen = set()
+            for i, chunk in enumerate(self._chunks(value)):
+                for candidate in self._buckets[i].get(chunk, ()):
+                    if candidate in seen:
+                        continue
+                    seen.add(candidate)
+                    distance = hamming_distance(value, candidate)
+                    if distance <= self.max_distance and (best is None or distance < best[1]):
+                        best = (self._entries[candidate], distance)
+            self._stats["candidates_checked"] += len(seen)
+
+            if best is not None:
+                self._stats["hits"] += 1
+            return best
+
+    def get_stats(self) -> Dict:
+        """
+        인덱스 통계 반환
+        """
+        return {
+            "enabled": self.enabled,
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "file_lines": self._file_lines,
+            "max_distance": self.max_distance,
+            "num_chunks": self.num_chunks,
+            **self._stats,
+        }
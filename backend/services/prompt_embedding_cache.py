@@ -0,0 +1,157 @@
+"""
+프롬프트 임베딩 캐시
+같은 프롬프트의 SDXL 텍스트 인코더 결과를 재사용
+
+주요 기능:
+1. 프롬프트별 임베딩 4종 (prompt / negative / pooled / negative pooled) 보관
+2. 크기 제한 LRU 메모리 캐시
+3. 선택적 디스크 저장 (torch.save, 재시작 / 워커 프로세스 간 공유)
+4. 모델 / 리비전 / 자료형별 구분 (키와 저장 폴더), CFG 사용 여부별 구분 (키)
+5. 적중률 통계 제공
+
+CPU에서는 두 개의 텍스트 인코더가 3스텝 turbo 생성 시간의 상당 부분을 차지합니다.
+"""
+
+import os
+import uuid
+import hashlib
+import logging
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+import torch
+
+logger = logging.getLogger(__name__)
+
+# (prompt_embeds, negative_prompt_embeds, pooled_prompt_embeds, negative_pooled_prompt_embeds)
+PromptEmbeddings = Tuple[torch.Tensor, Optional[torch.Tensor], torch.Tensor, Optional[torch.Tensor]]
+
+
+class PromptEmbeddingCache:
+    """
+    프롬프트 텍스트 → 임베딩 텐서 LRU 캐시
+    """
+
+    def __init__(self, max_entries: int = 64, cache_dir: Optional[str] = None, namespace: str = ""):
+        """
+        캐시 초기화
+
+        Args:
+            max_entries: 메모리에 보관할 최대 프롬프트 수 (0이면 캐시 사용 안 함)
+            cache_dir: 임베딩 저장 폴더 (None 또는 빈 문자열이면 메모리만 사용)
+            namespace: 임베딩을 만든 모델 구분자 (모델 ID / 리비전 / 자료형 등)
+        """
+        self.max_entries = max(0, max_entries)
+        self.base_dir = cache_dir or None
+        self.cache_dir = None
+        self._entries: "OrderedDict[str, PromptEmbeddings]" = OrderedDict()
+        self._stats = {"hits": 0, "disk_hits": 0, "misses": 0, "evictions": 0}
+        self.set_namespace(namespace)
+
+    def set_namespace(self, namespace: str):
+        """
+        모델 구분자 설정 (모델 로딩 후 리비전이 확인되면 호출)
+
+        다른 모델 / 리비전 / 자료형의 임베딩을 재사용하지 않도록 메모리 캐시를 비우고
+        구분자별 하위 폴더에 저장합니다.
+        """
+        self.namespace = namespace
+        self._entries.clear()
+        if self.base_dir:
+            digest = hashlib.sha256(namespace.encode("utf-8")).hexdigest()[:12]
+            self.cache_dir = os.path.join(self.base_dir, digest)
+            os.makedirs(self.cache_dir, exist_ok=True)
+
+    @property
+    def enabled(self) -> bool:
+        """캐시 사용 여부"""
+        return self.max_entries > 0
+
+    def make_key(self, prompt: str, guidance: bool = True) -> str:
+        """모델 구분자 + CFG 사용 여부 + 프롬프트 텍스트의 sha256 키"""
+        payload = f"{self.namespace}|cfg={int(guidance)}|{prompt}"
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _disk_path(self, key: str) -> str:
+        """디스크 저장 경로"""
+        return os.path.join(self.cache_dir, f"{key}.pt")
+
+    def get(self, prompt: str, device: str, guidance: bool = True) -> Optional[PromptEmbeddings]:
+        """
+        캐시된 임베딩 조회 (메모리 → 디스크 순)
+
+        Args:
+            prompt: 프롬프트 텍스트
+            device: 디스크에서 불러올 때 올릴 장치
+            guidance: classifier-free guidance 사용 여부 (negative 임베딩 포함 여부가 달라짐)
+
+        Returns:
+            임베딩 튜플 (없으면 None)
+        """
+        if not self.enabled:
+            return None
+
+        key = self.make_key(prompt, guidance)
+        embeddings = self._entries.get(key)
+        if embeddings is not None:
+            self._entries.move_to_end(key)
+            self._stats["hits"] += 1
+            return embeddings
+
+        if self.cache_dir and os.path.exists(self._disk_path(key)):
+            try:
+                embeddings = tuple(torch.load(self._disk_path(key), map_location=device, weights_only=True))
+                self._remember(key, embeddings)
+                self._stats["disk_hits"] += 1
+                return embeddings
+            except Exception as e:
+                logger.warning(f"프롬프트 임베딩 파일 읽기 실패: {e}")
+
+        self._stats["misses"] += 1
+        return None
+
+    def put(self, prompt: str, embeddings: PromptEmbeddings, guidance: bool = True):
+        """
+        임베딩 저장 (메모리, 설정된 경우 디스크)
+        """
+        if not self.enabled:
+            return
+
+        key = self.make_key(prompt, guidance)
+        self._remember(key, embeddings)
+
+        if self.cache_dir:
+            path = self._disk_path(key)
+            temp_path = f"{path}.{uuid.uuid4().hex[:6]}.tmp"
+            try:
+                # 여러 워커가 같은 파일을 쓸 수 있으므로 임시 파일에 쓴 뒤 교체
+                torch.save([tensor.cpu() if tensor is not None else None for tensor in embeddings], temp_path)
+                os.replace(temp_path, path)
+            except Exception as e:
+                logger.warning(f"프롬프트 임베딩 파일 저장 실패: {e}")
+                try:
+                    os.remove(temp_path)
+                except OSError:
+                    pass
+
+    def _remember(self, key: str, embeddings: PromptEmbeddings):
+        """메모리 LRU에 추가하고 한도를 넘으면 가장 오래된 항목 제거"""
+        self._entries[key] = embeddings
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self._stats["evictions"] += 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        캐시 통계 반환
+        """
+        lookups = self._stats["hits"] + self._stats["disk_hits"] + self._stats["misses"]
+        return {
+            **self._stats,
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "persistent": self.cache_dir is not None,
+            "namespace": self.namespace,
+            "hit_rate": round((self._stats["hits"] + self._stats["disk_hits"]) / lookups, 3) if lookups else 0.0,
+        }
@@ -0,0 +1,89 @@
+"""
+동일 요청 병합(single-flight) 유틸리티
+같은 키로 동시에 들어온 요청은 하나의 실행 결과를 함께 기다림
+
+주요 기능:
+1. 키별 진행 중 작업 추적
+2. 중복 호출을 기존 작업에 합류시켜 업스트림 호출 1회로 축소
+3. 병합된 호출 수 통계 제공
+4. (선택) 기다리는 호출자가 모두 취소되면 공유 작업도 취소
+
+프론트엔드 재시도나 여러 탭에서 같은 사진을 올릴 때 Gemini 중복 호출을 막습니다.
+"""
+
+import asyncio
+from typing import Any, Awaitable, Callable, Dict
+
+
+class SingleFlight:
+    """
+    키 단위 비동기 요청 병합기
+    """
+
+    def __init__(self, cancel_abandoned: bool = False):
+        """
+        진행 중 작업 테이블과 통계 초기화
+
+        Args:
+            cancel_abandoned: 기다리는 호출자가 모두 취소되면 공유 작업도 취소할지 여부
+        """
+        self.cancel_abandoned = cancel_abandoned
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self._waiters: Dict[str, int] = {}
+        self._stats = {"calls": 0, "executions": 0, "collapsed": 0, "abandoned": 0}
+
+    async def run(self, key: str, func: Callable[..., Awaitable[Any]], *args, **kwargs) -> Any:
+        """
+        같은 키로 진행 중인 작업이 있으면 그 결과를 기다리고, 없으면 새로 실행
+
+        Args:
+            key: 요청 내용 키 (같은 키 = 같은 결과)
+            func: 실행할 코루틴 함수
+            *args, **kwargs: func 인자
+
+        Returns:
+            func 실행 결과 (병합된 호출은 같은 결과를 공유)
+        """
+        self._stats["calls"] += 1
+        task = self._inflight.get(key)
+        if task is None:
+            self._stats["executions"] += 1
+            task = asyncio.ensure_future(func(*args, **kwargs))
+            self._inflight[key] = task
+            task.add_done_callback(lambda done: self._forget(key, done))
+        else:
+            self._stats["collapsed"] += 1
+
+        # 한 호출자가 취소되어도 공유 작업은 계속 진행되도록 shield 사용
+        self._waiters[key] = self._waiters.get(key, 0) + 1
+        try:
+            return await asyncio.shield(task)
+        except asyncio.CancelledError:
+            if self.cancel_abandoned and self._waiters[key] == 1 and not task.done():
+                # 마지막 호출자까지 떠났으면 공유 작업 취소 (새 호출은 새 작업으로 시작)
+                self._stats["abandoned"] += 1
+                self._forget(key, task)
+                task.cancel()
+            raise
+        finally:
+            self._waiters[key] -= 1
+            if not self._waiters[key]:
+                del self._waiters[key]
+
+    def is_running(self, key: str) -> bool:
+        """같은 키로 진행 중인 작업이 있는지 여부 (있으면 다음 run 호출은 병합됨)"""
+        return key in self._inflight
+
+    def _forget(self, key: str, task: asyncio.Task):
+        """완료(또는 취소)된 작업을 진행 중 테이블에서 제거"""
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        병합 통계 반환
+        """
+        return {
+            **self._stats,
+            "in_flight": len(self._inflight),
+        }
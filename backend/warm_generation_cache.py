@@ -0,0 +1,38 @@
+"""
+생성 이미지 캐시 예열 스크립트
+자주 요청되는 곤충 캐릭터 이미지를 미리 생성하여 out_put_image에 저장
+
+사용법:
+python warm_generation_cache.py                 # 분류 클래스의 영문 이름 전체
+python warm_generation_cache.py butterfly bee   # 지정한 키워드만
+
+서버와 같은 설정(GENERATION_CACHE_VARIANTS, GENERATION_CACHE_SEED 등)을 사용하므로
+backend 디렉토리에서 실행해야 서버가 같은 캐시 파일을 찾을 수 있습니다.
+"""
+
+import sys
+import asyncio
+
+from services.character_generator import CharacterGenerator
+from services.generation_cache import species_keywords
+from services.insect_classifier import InsectClassifier
+
+
+async def main(keywords):
+    generator = CharacterGenerator()
+    generator.start()
+    try:
+        results = await generator.warm_cache(keywords)
+    finally:
+        generator.close()
+
+    print("=" * 50)
+    print("🐛 생성 이미지 캐시 예열 결과")
+    print("=" * 50)
+    for keyword, count in results.items():
+        print(f"{keyword}: {count}/{generator.image_cache.variants}개")
+
+
+if __name__ == "__main__":
+    keywords = sys.argv[1:] or species_keywords(InsectClassifier().classes)
+    asyncio.run(main(keywords))
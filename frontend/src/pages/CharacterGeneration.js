@@ -24,7 +24,11 @@ import {
   FaPlus,
   FaUpload
 } from 'react-icons/fa';
-import { generateCharacterFromInsect } from '../services/api';
+import {
+  generateCharacterJobFromInsect,
+  getCharacterKeyword,
+  streamCharacterGeneration
+} from '../services/api';
 import html2canvas from 'html2canvas';
 
 const CharacterContainer = styled.div`
@@ -460,6 +464,24 @@ const LoadingText = styled.p`
   text-align: center;
 `;
 
+const StepPreviewImage = styled.img`
+  width: 280px;
+  height: 175px;
+  object-fit: cover;
+  border-radius: 12px;
+  border: 3px solid #FFD700;
+  margin-bottom: 20px;
+  filter: blur(1px);
+`;
+
+const LoadingSubText = styled.p`
+  font-size: 14px;
+  color: #A0522D;
+  margin: 10px 0 0;
+  font-family: 'Jua', sans-serif;
+  text-align: center;
+`;
+
 const ErrorContent = styled.div`
   display: flex;
   flex-direction: column;
@@ -872,6 +894,58 @@ function CharacterGeneration() {
   const [showPreviewModal, setShowPreviewModal] = useState(false); // 미리보기 모달 표시 여부
   const [previewImageData, setPreviewImageData] = useState(null); // 미리보기 이미지 데이터
   const [isRegenerating, setIsRegenerating] = useState(false); // 재생성 중 상태
+  const [jobStatus, setJobStatus] = useState(null); // 생성 작업 상태 (대기 순서, 진행률)
+  const [stepPreview, setStepPreview] = useState(null); // 스트리밍 스텝 미리보기 ({step, total, image})
+  const jobAbortRef = useRef(null); // 진행 중인 작업 폴링 중단용
+  const streamRef = useRef(null); // 진행 중인 스트리밍 연결
+
+  // 페이지를 벗어나면 스트리밍 연결과 작업 상태 폴링 중단
+  useEffect(() => {
+    return () => {
+      streamRef.current?.close();
+      jobAbortRef.current?.abort();
+    };
+  }, []);
+
+  // 캐릭터 생성 작업 제출 후 완료까지 대기 (이전 폴링은 중단)
+  const requestCharacterJob = () => {
+    jobAbortRef.current?.abort();
+    const controller = new AbortController();
+    jobAbortRef.current = controller;
+    setJobStatus(null);
+    return generateCharacterJobFromInsect(insectData, {}, setJobStatus, controller.signal);
+  };
+
+  // 스트리밍으로 스텝 미리보기를 받으며 생성
+  // 스트림 연결 자체가 안 되면(모델 로딩 중, 프록시 차단 등) 작업 API로 대신 생성
+  const requestCharacter = () => {
+    streamRef.current?.close();
+    setStepPreview(null);
+    if (typeof EventSource === 'undefined') {
+      return requestCharacterJob();
+    }
+
+    return new Promise((resolve, reject) => {
+      let started = false;
+      streamRef.current = streamCharacterGeneration(getCharacterKeyword(insectData), {}, {
+        onStart: () => {
+          started = true;
+        },
+        onPreview: (preview) => {
+          started = true;
+          setStepPreview(preview);
+        },
+        onResult: (data) => resolve({ success: true, data: data }),
+        onError: (error) => {
+          if (error.connectionFailed && !started) {
+            requestCharacterJob().then(resolve, reject);
+          } else {
+            reject(error);
+          }
+        }
+      });
+    });
+  };
 
   // 사전 생성된 이미지가 있는지 확인
   const preGeneratedImageUrl = location.state?.generatedImageUrl;
@@ -917,8 +991,8 @@ function CharacterGeneration() {
         }
       });
       
-      // 실제 백엔드 API 호출
-      const response = await generateCharacterFromInsect(insectData);
+      // 스트리밍(또는 작업 API)으로 생성 요청
+      const response = await requestCharacter();
       
       if (response.success) {
         // 생성된 이미지 URL 설정
@@ -935,6 +1009,7 @@ function CharacterGeneration() {
       }
       
     } catch (error) {
+      if (error.name === 'AbortError') return;
       console.error('캐릭터 생성 실패:', error);
       setGenerationStatus('error');
     } finally {
@@ -1070,7 +1145,7 @@ function CharacterGeneration() {
       console.log('이미지 재생성 시작...');
       
       // 백엔드에서 새로운 이미지 생성
-      const response = await generateCharacterFromInsect(insectData);
+      const response = await requestCharacter();
       
       if (response.success) {
         // 생성된 이미지 URL 설정
@@ -1088,6 +1163,7 @@ function CharacterGeneration() {
       }
       
     } catch (error) {
+      if (error.name === 'AbortError') return;
       console.error('이미지 재생성 실패:', error);
       setGenerationStatus('error');
       alert('이미지 재생성 실패: ' + error.message);
@@ -1135,11 +1211,24 @@ function CharacterGeneration() {
         {/* 로딩 중일 때 */}
         {generationStatus === 'generating' && (
           <LoadingCard>
-            <LoadingSpinner />
+            {stepPreview ? (
+              <StepPreviewImage src={stepPreview.image} alt="생성 중인 캐릭터 미리보기" />
+            ) : (
+              <LoadingSpinner />
+            )}
             <LoadingText>
               AI가 {insectData.곤충_이름} 캐릭터 카드를<br />
               만들고 있습니다...
             </LoadingText>
+            {jobStatus?.status === 'queued' && jobStatus.position && (
+              <LoadingSubText>대기 순서: {jobStatus.position}번째</LoadingSubText>
+            )}
+            {stepPreview && (
+              <LoadingSubText>그리는 중: {stepPreview.step} / {stepPreview.total} 단계</LoadingSubText>
+            )}
+            {jobStatus?.status === 'running' && (
+              <LoadingSubText>진행률: {Math.round(jobStatus.progress * 100)}%</LoadingSubText>
+            )}
           </LoadingCard>
         )}
 
@@ -353,29 +353,139 @@ export const validateImageFile = (file) => {
 };
 
 /**
- * AI 캐릭터 이미지 생성 (곤충 정보 기반)
- * @param {Object} insectData - 곤충 정보 데이터
- * @returns {Promise<Object>} 생성된 캐릭터 이미지 정보
+ * 곤충 정보에서 캐릭터 생성 키워드 추출
+ * @param {Object} insectData - 곤충 분류 결과 데이터
+ * @returns {string} 캐릭터 키워드
+ */
+export const getCharacterKeyword = (insectData) => {
+  return insectData.곤충_이름_영문 || insectData.곤충_이름 || insectData.곤충_종류 || '곤충';
+};
+
+/**
+ * 캐릭터 생성 스트리밍 (스텝마다 저해상도 미리보기를 받은 뒤 최종 이미지 정보 수신)
+ * @param {string} keyword - 캐릭터 키워드
+ * @param {Object} options - 생성 옵션 (예: { profile: 'preview' })
+ * @param {Object} handlers - { onStart(), onPreview({step, total, image}), onResult(data), onError(error) }
+ *   연결 자체가 실패한 경우(모델 로딩 중 503, 프록시 차단 등) error.connectionFailed가 true
+ * @returns {EventSource} 연결 객체 (화면을 벗어나면 close() 호출)
+ */
+export const streamCharacterGeneration = (keyword, options = {}, handlers = {}) => {
+  const params = new URLSearchParams({ keyword: keyword });
+  Object.entries(options).forEach(([key, value]) => {
+    if (value !== undefined && value !== null) {
+      params.append(key, value);
+    }
+  });
+
+  const source = new EventSource(`${API_BASE_URL}/generate-character/stream?${params.toString()}`);
+
+  source.addEventListener('start', () => {
+    handlers.onStart?.();
+  });
+  source.addEventListener('preview', (event) => {
+    handlers.onPreview?.(JSON.parse(event.data));
+  });
+  source.addEventListener('result', (event) => {
+    source.close();
+    handlers.onResult?.(JSON.parse(event.data));
+  });
+  source.addEventListener('error', (event) => {
+    source.close();
+    const detail = event.data ? JSON.parse(event.data).detail : '서버 연결이 끊어졌습니다.';
+    const error = new Error(`캐릭터 이미지 생성 실패: ${detail}`);
+    error.connectionFailed = !event.data;
+    handlers.onError?.(error);
+  });
+
+  return source;
+};
+
+/**
+ * 캐릭터 생성 작업 제출 (생성 완료를 기다리지 않고 작업 ID를 바로 받음)
+ * @param {string} keyword - 캐릭터 키워드
+ * @param {Object} options - 생성 옵션 (예: { profile: 'preview', priority: 'high' })
+ * @returns {Promise<Object>} 작업 정보 (job_id, status, status_url, result_url)
  */
-export const generateCharacterFromInsect = async (insectData) => {
+export const submitCharacterJob = async (keyword, options = {}) => {
   try {
-    // 곤충 이름에서 키워드 추출
-    const keyword = insectData.곤충_이름_영문 || insectData.곤충_이름 || insectData.곤충_종류 || '곤충';
-    
-    const response = await api.post('/generate-character', null, {
-      params: { keyword: keyword },
-      timeout: 12000000, // AI 이미지 생성은 시간이 오래 걸릴 수 있음 (2분)
+    const response = await api.post('/jobs/character', null, {
+      params: { keyword: keyword, ...options },
     });
+    return response.data;
+  } catch (error) {
+    throw new Error(`캐릭터 생성 작업 접수 실패: ${error.response?.data?.detail || error.message}`);
+  }
+};
 
-    return {
-      success: true,
-      data: response.data
-    };
+/**
+ * 작업 상태 조회
+ * @param {string} jobId - 작업 ID
+ * @returns {Promise<Object>} 작업 상태 (status, progress, position)
+ */
+export const getJobStatus = async (jobId) => {
+  try {
+    const response = await api.get(`/jobs/${jobId}`);
+    return response.data;
   } catch (error) {
-    throw new Error(`캐릭터 이미지 생성 실패: ${error.response?.data?.detail || error.message}`);
+    throw new Error(`작업 상태 조회 실패: ${error.response?.data?.detail || error.message}`);
+  }
+};
+
+/**
+ * 완료된 작업 결과 조회
+ * @param {string} jobId - 작업 ID
+ * @returns {Promise<Object>} 작업 결과 (캐릭터 작업이면 image_url 포함)
+ */
+export const getJobResult = async (jobId) => {
+  try {
+    const response = await api.get(`/jobs/${jobId}/result`);
+    return response.data;
+  } catch (error) {
+    throw new Error(`작업 결과 조회 실패: ${error.response?.data?.detail || error.message}`);
   }
 };
 
+/**
+ * 작업이 끝날 때까지 상태를 폴링한 뒤 결과 반환
+ * @param {string} jobId - 작업 ID
+ * @param {Function} onProgress - 상태가 바뀔 때마다 호출 (선택)
+ * @param {number} interval - 폴링 간격 (ms)
+ * @param {AbortSignal} signal - 화면을 벗어나면 폴링 중단 (선택, 중단 시 AbortError)
+ * @returns {Promise<Object>} 작업 결과
+ */
+export const waitForJob = async (jobId, onProgress = null, interval = 1000, signal = null) => {
+  while (true) {
+    if (signal?.aborted) {
+      throw new DOMException('작업 대기가 중단되었습니다.', 'AbortError');
+    }
+    const status = await getJobStatus(jobId);
+    if (onProgress) {
+      onProgress(status);
+    }
+    if (status.status === 'done' || status.status === 'failed') {
+      return getJobResult(jobId);
+    }
+    await new Promise((resolve) => setTimeout(resolve, interval));
+  }
+};
+
+/**
+ * 곤충 정보로 캐릭터 생성 (작업 API 사용, 긴 HTTP 연결 없이 진행률 표시 가능)
+ * @param {Object} insectData - 곤충 분류 결과 데이터
+ * @param {Object} options - 생성 옵션 (profile, decoder, priority)
+ * @param {Function} onProgress - 작업 상태 콜백 (선택)
+ * @param {AbortSignal} signal - 폴링 중단 신호 (선택)
+ * @returns {Promise<Object>} 생성된 캐릭터 이미지 정보
+ */
+export const generateCharacterJobFromInsect = async (insectData, options = {}, onProgress = null, signal = null) => {
+  const job = await submitCharacterJob(getCharacterKeyword(insectData), options);
+  const result = await waitForJob(job.job_id, onProgress, 1000, signal);
+  return {
+    success: true,
+    data: result
+  };
+};
+
 /**
  * AI 캐릭터 이미지 생성
  * @param {Object} characterData - 캐릭터 생성 데이터